@@ -1,3 +1,10 @@
 #!/usr/bin/env bash
 
-aws s3 cp ./lrc_database/db.sqlite3 s3://lrc-database-backups/db-$(date -I).sqlite3
+DATABASE_PATH="${LRC_DATABASE_PATH:-./lrc_database/db.sqlite3}"
+BACKUP_PATH="$(mktemp -d)/db.sqlite3"
+
+# The database is in WAL mode, so recent commits may only be in the -wal file next to it. .backup takes a consistent
+# copy that includes them.
+sqlite3 "$DATABASE_PATH" ".backup '$BACKUP_PATH'"
+aws s3 cp "$BACKUP_PATH" s3://lrc-database-backups/db-$(date -I).sqlite3
+rm "$BACKUP_PATH"
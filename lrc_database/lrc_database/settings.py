@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 from typing import List
 
@@ -50,6 +51,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "main.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -83,14 +85,78 @@ WSGI_APPLICATION = "lrc_database.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
+#
+# SQLite runs in WAL mode, so that reads don't block writes and vice versa. Because of that, the database's -wal and
+# -shm files have to stay next to it: put LRC_DATABASE_PATH in a directory, not a single bind-mounted file, and back
+# it up with "sqlite3 db.sqlite3 .backup" rather than by copying it.
+#
+# Views decorated with @read_only_database read through the "read_only" alias (see main/routers.py), a second
+# connection to the same database that can't write.
+
+DATABASE_PATH = os.environ.get("LRC_DATABASE_PATH", BASE_DIR / "db.sqlite3")
+
+SQLITE_PRAGMAS = {
+    # Commits in WAL mode are durable after a checkpoint, rather than immediately, and much cheaper.
+    "synchronous": "NORMAL",
+    # Wait this many milliseconds for a lock rather than failing immediately.
+    "busy_timeout": 5000,
+    # In KiB when negative.
+    "cache_size": -20000,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "ENGINE": "main.backends.sqlite3",
+        "NAME": DATABASE_PATH,
+        "CONN_MAX_AGE": int(os.environ.get("LRC_DATABASE_CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+        # Write transactions take the write lock when they begin; see main/backends/sqlite3/base.py.
+        "OPTIONS": {"pragmas": {"journal_mode": "WAL", **SQLITE_PRAGMAS}, "transaction_mode": "IMMEDIATE"},
+        # Tests use a real file rather than an in-memory database, so that concurrent connections lock it the same way
+        # as in production. It's named after the process so that test runs (say, in two checkouts) don't share it.
+        "TEST": {"NAME": os.path.join(tempfile.gettempdir(), f"lrc_database_test_{os.getpid()}.sqlite3")},
+    },
+    "read_only": {
+        "ENGINE": "main.backends.sqlite3",
+        "NAME": DATABASE_PATH,
+        "CONN_MAX_AGE": int(os.environ.get("LRC_DATABASE_CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"pragmas": {**SQLITE_PRAGMAS, "query_only": "ON"}},
+        "TEST": {"MIRROR": "default"},
+    },
 }
 
+DATABASE_ROUTERS = ["main.routers.ReadOnlyRouter"]
+
+
+# Caching
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+#
+# Some derived data (e.g. which groups a user is in) is cached and invalidated by signals. Signals only reach the
+# process that made the change, so when running more than one process, set LRC_DATABASE_CACHE_DIR to a directory that
+# all of them share. That includes the runjobs worker, since the jobs it runs change shifts and users too.
+
+if CACHE_DIR := os.environ.get("LRC_DATABASE_CACHE_DIR"):
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": CACHE_DIR}}
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+# Metrics
+#
+# Request and SQL metrics are served at api/metrics in the Prometheus text format, to privileged users or to requests
+# with an "Authorization: Bearer <METRICS_TOKEN>" header. Every process keeps its own totals, so when running more
+# than one gunicorn worker, set LRC_DATABASE_METRICS_DIR to a directory that all of the workers share.
+
+METRICS_DIR = os.environ.get("LRC_DATABASE_METRICS_DIR")
+
+METRICS_TOKEN = os.environ.get("LRC_DATABASE_METRICS_TOKEN")
+
+# How often, in seconds, each process writes its totals to METRICS_DIR.
+METRICS_FLUSH_INTERVAL = 5.0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -189,4 +255,10 @@ AWS_SES_REGION_ENDPOINT = "email.us-east-2.amazonaws.com"
 # Sentry
 
 if SENTRY_DSN := os.environ.get("SENTRY_DSN"):
-    sentry_sdk.init(dsn=SENTRY_DSN, integrations=[DjangoIntegration()], traces_sample_rate=1.0, send_default_pii=True)
+    sentry_sdk.init(
+        dsn=SENTRY_DSN,
+        integrations=[DjangoIntegration()],
+        # Tracing every request is expensive; per-view timings are in the metrics above.
+        traces_sample_rate=float(os.environ.get("SENTRY_TRACES_SAMPLE_RATE", "0.05")),
+        send_default_pii=True,
+    )
@@ -1,7 +1,44 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils.functional import cached_property
 
-from .models import Course, Hardware, Loan, LRCDatabaseUser, Shift, ShiftChangeRequest
+from .jobs import requeue
+from .models import Course, Hardware, Job, Loan, LRCDatabaseUser, Shift, ShiftChangeRequest, ShiftSeries
+
+# Changelists stop counting rows past this many, so at most this many rows can be paged through. Past that, narrow the
+# list down with the date hierarchy, filters or search.
+MAX_COUNTED_ROWS = 10_000
+
+
+class BoundedCountPaginator(Paginator):
+    @cached_property
+    def count(self) -> int:
+        return self.object_list[:MAX_COUNTED_ROWS].count()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    An admin for tables that are too big to count or scan. Searching matches the whole search term against the start of
+    each of search_fields, ignoring case, rather than looking for each word anywhere in them. Each field should have an
+    index on Lower() of it.
+    """
+
+    paginator = BoundedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip().lower()
+        if not term:
+            return queryset, False
+        keys = {f"search_key_{i}": Lower(field) for i, field in enumerate(self.search_fields)}
+        matches = Q()
+        for key in keys:
+            # A range rather than LIKE, since SQLite can only use an index for LIKE on case-insensitive columns.
+            matches |= Q(**{f"{key}__gte": term, f"{key}__lt": term + "\U0010ffff"})
+        return queryset.alias(**keys).filter(matches), False
 
 
 @admin.register(Course)
@@ -10,22 +47,42 @@ class CourseAdmin(admin.ModelAdmin):
 
 
 @admin.register(LRCDatabaseUser)
-class LRCDatabaseUserAdmin(UserAdmin):
-    pass
+class LRCDatabaseUserAdmin(LargeTableAdmin, UserAdmin):
+    search_fields = ("username", "first_name", "last_name", "email")
+    search_help_text = "Search by the start of a username, first name, last name or email address."
 
 
 @admin.register(Shift)
-class ShiftAdmin(admin.ModelAdmin):
+class ShiftAdmin(LargeTableAdmin):
     list_display = (
         "associated_person",
         "start",
         "duration",
         "location",
     )
+    list_select_related = ("associated_person",)
+    autocomplete_fields = ("associated_person",)
+    # The local date is indexed, unlike the date part of start.
+    date_hierarchy = "local_date"
+    search_fields = ("associated_person__username",)
+    search_help_text = "Search by the start of the username of the person working the shift."
+
+    def get_queryset(self, request):
+        # Shifts are shown as "<person> in <location> at...", including in other admins' autocomplete results.
+        return super().get_queryset(request).select_related("associated_person")
+
+
+@admin.register(ShiftSeries)
+class ShiftSeriesAdmin(admin.ModelAdmin):
+    list_display = ("associated_person", "start_time", "location", "kind", "first_date", "last_date", "every_weeks")
+    list_filter = ("kind",)
+    list_select_related = ("associated_person",)
+    autocomplete_fields = ("associated_person",)
+    ordering = ("-last_date",)
 
 
 @admin.register(ShiftChangeRequest)
-class ShiftChangeRequestAdmin(admin.ModelAdmin):
+class ShiftChangeRequestAdmin(LargeTableAdmin):
     fieldsets = (
         (
             "Approval",
@@ -52,20 +109,52 @@ class ShiftChangeRequestAdmin(admin.ModelAdmin):
         # "approved_by",
         # "approved_on",
     )
+    list_select_related = ("shift_to_update__associated_person",)
+    autocomplete_fields = ("shift_to_update", "new_associated_person")
+    date_hierarchy = "new_start"
+    search_fields = ("new_associated_person__username",)
+    search_help_text = "Search by the start of the username of the person who made the request."
 
 
 @admin.register(Hardware)
-class HardwareAdmin(admin.ModelAdmin):
+class HardwareAdmin(LargeTableAdmin):
     list_display = ("name", "is_available")
-    ordering = ("name", "is_available")
-    list_editable = ("is_available",)
+    ordering = ("name",)
+    search_fields = ("name",)
+    search_help_text = "Search by the start of the hardware's name."
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_availability()
+
+    @admin.display(boolean=True, ordering="is_available")
+    def is_available(self, hardware: Hardware) -> bool:
+        return hardware.is_available
 
 
 @admin.register(Loan)
-class LoanAdmin(admin.ModelAdmin):
+class LoanAdmin(LargeTableAdmin):
     list_display = (
         "target",
         "start_time",
         "return_time",
         "hardware_user",
     )
+    list_select_related = ("target", "hardware_user")
+    autocomplete_fields = ("target", "hardware_user")
+    date_hierarchy = "start_time"
+    search_fields = ("target__name", "hardware_user__username")
+    search_help_text = "Search by the start of the hardware's name or the borrower's username."
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "state", "progress", "total", "created_by", "created_at", "finished_at")
+    list_filter = ("state", "kind")
+    list_select_related = ("created_by",)
+    ordering = ("-id",)
+    actions = ("requeue_jobs",)
+
+    @admin.action(description="Requeue selected failed or stalled jobs")
+    def requeue_jobs(self, request, queryset):
+        requeued = requeue(queryset)
+        self.message_user(request, f"Requeued {requeued} jobs.", messages.SUCCESS if requeued else messages.WARNING)
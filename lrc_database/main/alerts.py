@@ -0,0 +1,101 @@
+"""
+Counts of new shift change requests, shown in the navbar of every page that office staff and supervisors see.
+
+The counts are computed with a single query and then kept in the cache, where the receivers in signals.py adjust them
+as change requests are created, change state, or are deleted. Rendering the navbar therefore costs no queries unless
+the counts were evicted. Code that changes requests without sending signals (e.g. QuerySet.update()) must call
+invalidate_alert_counts() afterwards. Counts are only adjusted or dropped once the change commits: before then another
+request could recompute them from the old rows, and a rolled-back change mustn't move them at all.
+"""
+
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import ShiftChangeRequest
+
+# Maps each count to the (kind, is_drop_request) of the requests it counts.
+ALERT_BUCKETS: Dict[str, Tuple[str, bool]] = {
+    "pending_si_change_count": ("SI", False),
+    "pending_tutoring_change_count": ("Tutoring", False),
+    "pending_si_drop_count": ("SI", True),
+    "pending_tutoring_drop_count": ("Tutoring", True),
+}
+
+# The counts are kept up to date incrementally; the timeout only limits how long they can drift if an update is missed.
+ALERT_COUNT_TIMEOUT = 60 * 60
+
+
+def _cache_key(bucket: str) -> str:
+    return f"alerts:{bucket}"
+
+
+def compute_alert_counts() -> Dict[str, int]:
+    """
+    Counts new change requests for every bucket in one query. A request counts towards a kind if either the kind it
+    asks for or the kind of the shift it changes matches.
+    """
+
+    aggregates = {
+        bucket: Count(
+            "id",
+            filter=(Q(new_kind=kind) | Q(shift_to_update__kind=kind)) & Q(is_drop_request=is_drop_request),
+        )
+        for bucket, (kind, is_drop_request) in ALERT_BUCKETS.items()
+    }
+    return ShiftChangeRequest.objects.filter(state="New").aggregate(**aggregates)
+
+
+def get_alert_counts() -> Dict[str, int]:
+    keys = {_cache_key(bucket): bucket for bucket in ALERT_BUCKETS}
+    cached = cache.get_many(keys.keys())
+    if len(cached) == len(keys):
+        return {keys[key]: count for key, count in cached.items()}
+    counts = compute_alert_counts()
+    cache.set_many({_cache_key(bucket): count for bucket, count in counts.items()}, ALERT_COUNT_TIMEOUT)
+    return counts
+
+
+def _drop_alert_counts() -> None:
+    cache.delete_many([_cache_key(bucket) for bucket in ALERT_BUCKETS])
+
+
+def invalidate_alert_counts() -> None:
+    transaction.on_commit(_drop_alert_counts)
+
+
+def alert_buckets(
+    state: Optional[str], is_drop_request: bool, new_kind: Optional[str], shift_kind: Optional[str]
+) -> FrozenSet[str]:
+    """
+    Returns the buckets that a change request with the given values is counted in.
+    """
+
+    if state != "New":
+        return frozenset()
+    return frozenset(
+        bucket
+        for bucket, (kind, drop) in ALERT_BUCKETS.items()
+        if drop == is_drop_request and kind in (new_kind, shift_kind)
+    )
+
+
+def adjust_alert_counts(before: FrozenSet[str], after: FrozenSet[str]) -> None:
+    """
+    Moves one request out of the buckets in before and into the buckets in after. If any count isn't cached, all of
+    them are dropped so that they're recomputed together.
+    """
+
+    def adjust() -> None:
+        try:
+            for bucket in before - after:
+                cache.decr(_cache_key(bucket))
+            for bucket in after - before:
+                cache.incr(_cache_key(bucket))
+        except ValueError:
+            _drop_alert_counts()
+
+    if before != after:
+        transaction.on_commit(adjust)
@@ -0,0 +1,115 @@
+"""
+Searches for the autocomplete widgets that pick users, courses and hardware in forms.
+
+Rather than rendering every row of a table as an <option>, the widgets render only the selected ones, and
+static/js/autocomplete.js fetches the rows that start with what's been typed from the autocomplete view. Every search
+is a range over an index on the lowercased column, so it reads only the rows it returns.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+from django import forms
+from django.db.models import Model, Q, QuerySet
+from django.db.models.functions import Lower
+from django.urls import reverse
+
+from .models import Course, Hardware, LRCDatabaseUser
+
+# The most results that a search returns.
+RESULT_LIMIT = 20
+
+
+def _starts_with(key: str, prefix: str) -> Q:
+    """
+    Matches rows whose key, an alias of an indexed expression, starts with prefix. SQLite can only answer LIKE from an
+    index on a case-insensitive column, so this is a range instead.
+    """
+
+    return Q(**{f"{key}__gte": prefix, f"{key}__lt": prefix + "\U0010ffff"})
+
+
+def search_users(term: str) -> QuerySet:
+    users = LRCDatabaseUser.objects.only("username", "first_name", "last_name").alias(
+        username_key=Lower("username"), first_name_key=Lower("first_name"), last_name_key=Lower("last_name")
+    )
+    matches = _starts_with("username_key", term) | _starts_with("first_name_key", term)
+    matches |= _starts_with("last_name_key", term)
+    first_name, _, last_name = term.partition(" ")
+    if last_name:
+        # "jane d" finds Jane Doe.
+        matches |= Q(first_name_key=first_name) & _starts_with("last_name_key", last_name.strip())
+    return users.filter(matches).order_by("username")
+
+
+def search_courses(term: str) -> QuerySet:
+    courses = Course.objects.alias(department_key=Lower("department"), name_key=Lower("name"))
+    matches = _starts_with("name_key", term)
+    department, _, number = term.partition(" ")
+    if number:
+        # "compsci 18" finds COMPSCI 187 and COMPSCI 189C.
+        matches |= Q(department_key=department) & _starts_with("number", number.strip().upper())
+    else:
+        matches |= _starts_with("department_key", term)
+    return courses.filter(matches)
+
+
+def search_hardware(term: str) -> QuerySet:
+    return Hardware.objects.alias(name_key=Lower("name")).filter(_starts_with("name_key", term)).order_by("name_key")
+
+
+SEARCHES: Dict[str, Callable[[str], QuerySet]] = {
+    "users": search_users,
+    "courses": search_courses,
+    "hardware": search_hardware,
+}
+
+
+def search(kind: str, term: str) -> List[Dict[str, object]]:
+    """
+    Returns up to RESULT_LIMIT rows of the given kind that start with term, ignoring case, as {"id", "text"} dicts.
+    """
+
+    term = term.strip().lower()
+    if not term:
+        return []
+    return [{"id": obj.pk, "text": str(obj)} for obj in SEARCHES[kind](term)[:RESULT_LIMIT]]
+
+
+class AutocompleteMixin:
+    """
+    Renders only the selected choices of a ModelChoiceField or ModelMultipleChoiceField, and has autocomplete.js fetch
+    the rest from the autocomplete view for the given kind.
+    """
+
+    def __init__(self, kind: str, attrs: Optional[Dict[str, str]] = None) -> None:
+        if kind not in SEARCHES:
+            raise ValueError(f"Unknown autocomplete kind: {kind}")
+        self.kind = kind
+        super().__init__(attrs)
+
+    class Media:
+        js = ("js/autocomplete.js",)
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs["data-autocomplete-url"] = reverse("autocomplete", args=(self.kind,))
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = [v for v in value if v not in ("", None)]
+        options = []
+        if not self.allow_multiple_selected and field.empty_label is not None:
+            options.append(self.create_option(name, "", field.empty_label, not selected, 0))
+        objects: List[Model] = list(self.choices.queryset.filter(pk__in=selected)) if selected else []
+        for obj in objects:
+            options.append(self.create_option(name, obj.pk, field.label_from_instance(obj), True, len(options)))
+        return [(None, options, 0)]
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
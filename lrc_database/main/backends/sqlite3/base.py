@@ -0,0 +1,40 @@
+"""
+Django's SQLite backend, plus settings for how connections and transactions are set up.
+
+OPTIONS can include:
+ - "pragmas": PRAGMA statements run on every new connection, e.g. {"journal_mode": "WAL"}. See
+   https://www.sqlite.org/pragma.html for what they do.
+ - "transaction_mode": how transactions begin, e.g. "IMMEDIATE". See https://www.sqlite.org/lang_transaction.html.
+   Immediate transactions take the write lock when they begin instead of at their first write, so that two
+   transactions that both read and then write can't deadlock, which SQLite would report as "database is locked".
+   The time spent waiting for the lock is recorded in the metrics (see main/metrics.py).
+"""
+
+import time
+
+from django.db.backends.sqlite3 import base
+
+from ...metrics import record_lock_wait
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop("pragmas", None)
+        kwargs.pop("transaction_mode", None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for pragma, value in self.settings_dict["OPTIONS"].get("pragmas", {}).items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        transaction_mode = self.settings_dict["OPTIONS"].get("transaction_mode")
+        if transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+            return
+        started = time.perf_counter()
+        self.cursor().execute(f"BEGIN {transaction_mode}")
+        record_lock_wait(time.perf_counter() - started)
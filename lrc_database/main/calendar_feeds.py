@@ -0,0 +1,159 @@
+"""
+Serializes shifts into iCalendar (RFC 5545) feeds that calendar apps can subscribe to.
+
+Calendar apps can't log in, so every feed URL carries a token. A token is the subscriber's ID and an HMAC of it, the
+feed, and their password hash, so it opens that one feed and nothing else, nothing is stored, and changing the password
+revokes every feed URL they've handed out.
+
+A feed covers the days from FEED_DAYS_BEFORE before today to FEED_DAYS_AFTER after it. It's built from the same queries
+as the JSON event feeds and streamed an event at a time: shifts are read through a cursor, and occurrences of shift
+series are expanded one series at a time, so memory use doesn't grow with the feed. Calendar apps poll their
+subscriptions, so feeds are served conditionally, with ETags from the same versions as the JSON feeds (see
+event_feeds.py).
+"""
+
+import datetime
+from typing import Iterable, Iterator, Optional, Tuple
+
+from django.db.models import QuerySet
+from django.http import HttpRequest, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .event_feeds import EVENT_COLUMNS, occurrence_url_template, shift_url_template
+from .models import LOCAL_TIME_ZONE, LRCDatabaseUser, Shift
+
+FEED_DAYS_BEFORE = 28
+
+FEED_DAYS_AFTER = 182
+
+# How often calendar apps that honor it should check for changes.
+REFRESH_INTERVAL = "PT15M"
+
+_TOKEN_SALT = "main.calendar_feeds"
+
+# Lines longer than this many bytes are folded onto continuation lines.
+_LINE_LENGTH = 75
+
+
+def feed_token(user: LRCDatabaseUser, kind: str, feed_id: int) -> str:
+    """
+    The token for user to subscribe to the feed of the user or course (kind) with ID feed_id.
+    """
+
+    message = f"{kind}:{feed_id}|{user.pk}|{user.password}"
+    digest = salted_hmac(_TOKEN_SALT, message, algorithm="sha256").hexdigest()
+    return f"{user.pk}-{digest[:32]}"
+
+
+def subscriber(token: str, kind: str, feed_id: int) -> Optional[LRCDatabaseUser]:
+    """
+    The active user that the token was made for, if it was made for this feed and is still valid, otherwise None.
+    """
+
+    user_id, _, _ = token.partition("-")
+    if not user_id.isdigit():
+        return None
+    user = LRCDatabaseUser.objects.filter(pk=int(user_id), is_active=True).first()
+    if user is None or not constant_time_compare(token, feed_token(user, kind, feed_id)):
+        return None
+    return user
+
+
+def feed_window() -> Tuple[datetime.datetime, datetime.datetime]:
+    today = timezone.localdate()
+    midnight = datetime.datetime.combine(today, datetime.time())
+    start = timezone.make_aware(midnight - datetime.timedelta(days=FEED_DAYS_BEFORE), LOCAL_TIME_ZONE)
+    end = timezone.make_aware(midnight + datetime.timedelta(days=FEED_DAYS_AFTER + 1), LOCAL_TIME_ZONE)
+    return start, end
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    encoded = line.encode()
+    if len(encoded) <= _LINE_LENGTH:
+        return line + "\r\n"
+    pieces = []
+    start = 0
+    while start < len(encoded):
+        # Continuation lines start with a space, which counts towards their length.
+        end = min(start + (_LINE_LENGTH if not pieces else _LINE_LENGTH - 1), len(encoded))
+        # Never split a UTF-8 sequence.
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        pieces.append(encoded[start:end].decode())
+        start = end
+    return "\r\n ".join(pieces) + "\r\n"
+
+
+def _timestamp(moment: datetime.datetime) -> str:
+    return moment.astimezone(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _event(
+    uid: str, stamp: str, start: datetime.datetime, end: datetime.datetime, summary: str, location: str, url: str
+) -> str:
+    lines = (
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART:{_timestamp(start)}",
+        f"DTEND:{_timestamp(end)}",
+        f"SUMMARY:{_escape(summary)}",
+        f"LOCATION:{_escape(location)}",
+        f"URL:{url}",
+        "END:VEVENT",
+    )
+    return "".join(map(_fold, lines))
+
+
+def calendar_events(
+    request: HttpRequest, name: str, shifts: QuerySet[Shift], occurrences: Iterable[Shift]
+) -> Iterator[str]:
+    """
+    Yields the calendar, an event at a time. occurrences should have their people selected.
+    """
+
+    host = request.get_host()
+    base_url = request.build_absolute_uri("/")[:-1]
+    shift_url = base_url + shift_url_template()
+    occurrence_url = base_url + occurrence_url_template()
+    # Derived from the date, like the ETag, so that the same ETag always means the same calendar.
+    stamp = _timestamp(timezone.make_aware(datetime.datetime.combine(timezone.localdate(), datetime.time())))
+
+    header = (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//LRC Staff Database//Shifts//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(name)}",
+        f"REFRESH-INTERVAL;VALUE=DURATION:{REFRESH_INTERVAL}",
+        f"X-PUBLISHED-TTL:{REFRESH_INTERVAL}",
+    )
+    yield "".join(map(_fold, header))
+
+    rows = shifts.values_list(*EVENT_COLUMNS).iterator(chunk_size=500)
+    for shift_id, start, end, location, kind, username, first_name, last_name in rows:
+        person = LRCDatabaseUser.display_name(username, first_name, last_name)
+        summary = f"{kind} Session: {person}"
+        yield _event(f"shift-{shift_id}@{host}", stamp, start, end, summary, location, shift_url.format(shift_id))
+    for shift in occurrences:
+        date = shift.series_date.isoformat()
+        uid = f"series-{shift.series_id}-{date}@{host}"
+        url = occurrence_url.format(shift.series_id, date)
+        summary = f"{shift.kind} Session: {shift.associated_person}"
+        yield _event(uid, stamp, shift.start, shift.end, summary, shift.location, url)
+
+    yield _fold("END:VCALENDAR")
+
+
+def calendar_response(
+    request: HttpRequest, name: str, shifts: QuerySet[Shift], occurrences: Iterable[Shift] = ()
+) -> StreamingHttpResponse:
+    return StreamingHttpResponse(
+        calendar_events(request, name, shifts, occurrences), content_type="text/calendar; charset=utf-8"
+    )
@@ -0,0 +1,159 @@
+"""
+Keeps shifts from double-booking a person or a location.
+
+Nobody can work two shifts at once, and no room can hold two at once, except for the SHARED_LOCATIONS, like the LRC,
+where tutors work side by side. Every view and job that creates or moves shifts passes them to check() before it writes
+them, in the same transaction, so nothing else can be booked in between.
+
+A single shift is checked with one query that searches shift_person_start_idx and shift_location_start_idx. A batch,
+like a day of shifts being moved, is checked with one query for the shifts around the batch's times, which are compared
+with the batch in memory, so that rescheduling doesn't run a query per shift. Either way, one more query expands the
+occurrences of the shift series of the same people and locations around those times.
+"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from django.db.models import Q
+
+from .models import MAX_SHIFT_DURATION, Shift, ShiftSeries
+
+# Locations where any number of shifts can happen at once.
+SHARED_LOCATIONS = frozenset({"LRC"})
+
+# The most double bookings that an error message lists.
+REPORTED_DOUBLE_BOOKINGS = 3
+
+
+@dataclass(frozen=True)
+class DoubleBooking:
+    shift: Shift
+    # A shift that is, or would be, at the same time, with the same person or in the same location.
+    other: Shift
+
+    def __str__(self) -> str:
+        if self.shift.associated_person_id == self.other.associated_person_id:
+            return f"{self.shift} overlaps another shift of theirs: {self.other}."
+        return f"{self.shift} overlaps another shift in {self.shift.location}: {self.other}."
+
+
+class DoubleBookingError(Exception):
+    def __init__(self, double_bookings: Sequence[DoubleBooking]) -> None:
+        self.double_bookings = list(double_bookings)
+        message = " ".join(map(str, self.double_bookings[:REPORTED_DOUBLE_BOOKINGS]))
+        if len(self.double_bookings) > REPORTED_DOUBLE_BOOKINGS:
+            message += f" And {len(self.double_bookings) - REPORTED_DOUBLE_BOOKINGS} more."
+        super().__init__(message)
+
+
+def _end(shift: Shift) -> datetime.datetime:
+    # Not shift.end, which isn't set until the shift is saved.
+    return shift.start + shift.duration
+
+
+def _overlapping(start: datetime.datetime, end: datetime.datetime) -> Dict[str, datetime.datetime]:
+    # Like ShiftQuerySet.overlapping(), as keyword arguments that can go on each side of an OR.
+    return {"start__gt": start - MAX_SHIFT_DURATION, "start__lt": end, "end__gt": start}
+
+
+def _keys(shift: Shift) -> List[Hashable]:
+    keys: List[Hashable] = [("person", shift.associated_person_id)]
+    if shift.location not in SHARED_LOCATIONS:
+        keys.append(("location", shift.location))
+    return keys
+
+
+def _series_of(person_ids: Iterable[int], locations: Iterable[str]) -> Q:
+    locations = set(locations) - SHARED_LOCATIONS
+    return Q(associated_person_id__in=set(person_ids)) | Q(location__in=locations)
+
+
+def _find_one(shift: Shift) -> List[DoubleBooking]:
+    overlapping = _overlapping(shift.start, _end(shift))
+    clashes = Q(associated_person_id=shift.associated_person_id, **overlapping)
+    if shift.location not in SHARED_LOCATIONS:
+        clashes |= Q(location=shift.location, **overlapping)
+    others = Shift.objects.filter(clashes).select_related("associated_person").order_by("start")
+    if shift.pk is not None:
+        others = others.exclude(pk=shift.pk)
+    others = list(others[:REPORTED_DOUBLE_BOOKINGS])
+    series = ShiftSeries.objects.filter(_series_of((shift.associated_person_id,), (shift.location,)))
+    others += series.select_related("associated_person").occurrences(shift.start, _end(shift))
+    return [DoubleBooking(shift, other) for other in others]
+
+
+def _spans(shifts: Sequence[Shift]) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+    # The times that the shifts cover, merged, so that a day of shifts is one range.
+    spans: List[Tuple[datetime.datetime, datetime.datetime]] = []
+    for shift in sorted(shifts, key=lambda shift: shift.start):
+        if spans and shift.start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], _end(shift)))
+        else:
+            spans.append((shift.start, _end(shift)))
+    return spans
+
+
+def _find_many(shifts: Sequence[Shift], with_each_other: bool) -> List[DoubleBooking]:
+    around = Q()
+    for start, end in _spans(shifts):
+        around |= Q(**_overlapping(start, end))
+    person_ids = {shift.associated_person_id for shift in shifts}
+    locations = {shift.location for shift in shifts} - SHARED_LOCATIONS
+    others = list(
+        Shift.objects.filter(around)
+        .filter(Q(associated_person_id__in=person_ids) | Q(location__in=locations))
+        .exclude(pk__in=[shift.pk for shift in shifts if shift.pk is not None])
+        .only("id", "associated_person_id", "start", "duration", "location", "kind")
+    )
+    others += ShiftSeries.objects.filter(_series_of(person_ids, locations)).occurrences(
+        min(shift.start for shift in shifts), max(_end(shift) for shift in shifts)
+    )
+
+    # Walks each person's and each location's shifts in order of start time. A shift overlaps an earlier one if and
+    # only if it starts before the latest end so far. The latest shifts of the batch and of the rest are tracked
+    # apart, so that overlaps among shifts already booked aren't reported.
+    by_key: Dict[Hashable, List[Tuple[Shift, bool]]] = {}
+    for shift, is_new in [*((shift, True) for shift in shifts), *((other, False) for other in others)]:
+        for key in _keys(shift):
+            by_key.setdefault(key, []).append((shift, is_new))
+    double_bookings: Dict[Tuple[int, int], DoubleBooking] = {}
+    for booked in by_key.values():
+        latest: Dict[bool, Shift] = {}
+        for shift, is_new in sorted(booked, key=lambda booking: booking[0].start):
+            candidates = (
+                [latest.get(False), latest.get(True) if with_each_other else None] if is_new else [latest.get(True)]
+            )
+            for other in candidates:
+                if other is not None and shift.start < _end(other):
+                    # A person's shift in the same location is found twice.
+                    double_booking = DoubleBooking(shift, other) if is_new else DoubleBooking(other, shift)
+                    double_bookings.setdefault((id(double_booking.shift), id(double_booking.other)), double_booking)
+                    break
+            if is_new not in latest or _end(shift) > _end(latest[is_new]):
+                latest[is_new] = shift
+    return list(double_bookings.values())
+
+
+def find(shifts: Sequence[Shift], with_each_other: bool = True) -> List[DoubleBooking]:
+    """
+    Returns the double bookings that saving the given shifts would make, with other shifts, and with each other unless
+    with_each_other is False. Saved shifts are compared with the rest as if they'd been moved to their current start and
+    duration.
+    """
+
+    if not shifts:
+        return []
+    if len(shifts) == 1:
+        return _find_one(shifts[0])
+    return _find_many(shifts, with_each_other)
+
+
+def check(shifts: Sequence[Shift], with_each_other: bool = True) -> None:
+    """
+    Raises DoubleBookingError if saving the given shifts would double-book anyone or anywhere.
+    """
+
+    double_bookings = find(shifts, with_each_other)
+    if double_bookings:
+        raise DoubleBookingError(double_bookings)
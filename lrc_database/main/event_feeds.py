@@ -0,0 +1,193 @@
+"""
+Serializes shifts into FullCalendar events.
+
+Only the columns an event needs are fetched, together with the person's name, in one query. Titles and URLs are built
+with string formatting instead of str(shift) and reverse(), which would cost a query and a URL resolution per shift.
+Occurrences of shift series are expanded by the views for the requested range and passed in alongside the shifts.
+calendar_feeds.py serializes the same shifts into iCalendar feeds.
+
+Feeds are also versioned so that they can be served conditionally: every user and course feed has a version token that
+signals.py bumps when one of its shifts changes, plus there's a version shared by all feeds for changes whose reach
+isn't worth working out (bulk edits, renamed users, reassigned courses). A feed's ETag is derived from those tokens and
+the requested range, so checking it never touches the Shift table. Versions are bumped when the transaction that
+changed the shifts commits, since a feed read before then would be served under the new ETag with the old shifts.
+
+ETags are only served when the cache is shared by every process. Otherwise a change made in one process (or in the job
+worker) wouldn't bump the versions that the others see, and they'd answer "304 Not Modified" for feeds that changed.
+"""
+
+import hashlib
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.http import HttpRequest, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Course, LRCDatabaseUser, Shift
+from .versions import bump_versions, get_versions, versions_are_shared
+
+EVENT_COLUMNS = (
+    "id",
+    "start",
+    "end",
+    "location",
+    "kind",
+    "associated_person__username",
+    "associated_person__first_name",
+    "associated_person__last_name",
+)
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+_URL_PLACEHOLDER = 2**31 - 1
+
+_DATE_PLACEHOLDER = "0001-01-01"
+
+
+@lru_cache(maxsize=None)
+def shift_url_template() -> str:
+    # A format string for the path to a shift, taking its ID.
+    return reverse("view_shift", args=(_URL_PLACEHOLDER,)).replace(str(_URL_PLACEHOLDER), "{}")
+
+
+@lru_cache(maxsize=None)
+def occurrence_url_template() -> str:
+    url = reverse("view_occurrence", args=(_URL_PLACEHOLDER, _DATE_PLACEHOLDER))
+    return url.replace(str(_URL_PLACEHOLDER), "{0}").replace(_DATE_PLACEHOLDER, "{1}")
+
+
+def shift_events(shifts: QuerySet[Shift]) -> Iterator[Dict[str, Any]]:
+    url_template = shift_url_template()
+    rows = shifts.values_list(*EVENT_COLUMNS).iterator(chunk_size=500)
+    for shift_id, start, end, location, kind, username, first_name, last_name in rows:
+        person = LRCDatabaseUser.display_name(username, first_name, last_name)
+        yield {
+            "id": str(shift_id),
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "title": f"{person} in {location} at {timezone.localtime(start)} for {kind} Session",
+            "allDay": False,
+            "url": url_template.format(shift_id),
+        }
+
+
+def occurrence_events(occurrences: Iterable[Shift]) -> Iterator[Dict[str, Any]]:
+    """
+    Like shift_events(), for the unsaved shifts of ShiftSeriesQuerySet.occurrences(), which should have their people
+    selected.
+    """
+
+    url_template = occurrence_url_template()
+    for shift in occurrences:
+        date = shift.series_date.isoformat()
+        yield {
+            "id": f"{shift.series_id}:{date}",
+            "start": shift.start.isoformat(),
+            "end": shift.end.isoformat(),
+            "title": f"{shift.associated_person} in {shift.location} at {timezone.localtime(shift.start)} for "
+            f"{shift.kind} Session",
+            "allDay": False,
+            "url": url_template.format(shift.series_id, date),
+        }
+
+
+def shift_events_json(shifts: QuerySet[Shift], occurrences: Iterable[Shift] = ()) -> Iterator[str]:
+    """
+    Yields the events as a JSON array, a piece at a time.
+    """
+
+    yield "["
+    for i, event in enumerate(chain(shift_events(shifts), occurrence_events(occurrences))):
+        yield ("," if i else "") + _encoder.encode(event)
+    yield "]"
+
+
+def event_feed_response(shifts: QuerySet[Shift], occurrences: Iterable[Shift] = ()) -> StreamingHttpResponse:
+    return StreamingHttpResponse(shift_events_json(shifts, occurrences), content_type="application/json")
+
+
+ALL_FEEDS = "feed:all"
+
+
+def _user_feed(user_id: int) -> str:
+    return f"feed:user:{user_id}"
+
+
+def _course_feed(course_id: int) -> str:
+    return f"feed:course:{course_id}"
+
+
+def _feed_etag(feed: str, *variant: str) -> Optional[str]:
+    # variant is whatever else the response depends on, like the requested range.
+    if not versions_are_shared():
+        return None
+    versions = get_versions((ALL_FEEDS, feed))
+    validator = "|".join((feed, versions[ALL_FEEDS], versions[feed], *variant))
+    return hashlib.sha256(validator.encode()).hexdigest()[:32]
+
+
+def user_feed_etag(request: HttpRequest, user_id: int) -> Optional[str]:
+    return _feed_etag(_user_feed(user_id), request.GET.urlencode())
+
+
+def course_feed_etag(request: HttpRequest, course_id: int) -> Optional[str]:
+    return _feed_etag(_course_feed(course_id), request.GET.urlencode())
+
+
+def user_calendar_etag(request: HttpRequest, user_id: int) -> Optional[str]:
+    # Calendar feeds cover a window that moves every day.
+    return _feed_etag(_user_feed(user_id), "ics", timezone.localdate().isoformat())
+
+
+def course_calendar_etag(request: HttpRequest, course_id: int) -> Optional[str]:
+    return _feed_etag(_course_feed(course_id), "ics", timezone.localdate().isoformat())
+
+
+# The people whose feeds to invalidate when the innermost feeds_invalidated_together() block exits.
+_pending_people: ContextVar[Optional[Set[int]]] = ContextVar("pending_people", default=None)
+
+
+@contextmanager
+def feeds_invalidated_together() -> Iterator[None]:
+    """
+    Collects the invalidate_feeds_of_people() calls made inside the block into one, so that deleting many shifts
+    doesn't look up the courses of each one's person separately.
+    """
+
+    person_ids: Set[int] = set()
+    token = _pending_people.set(person_ids)
+    try:
+        yield
+    finally:
+        _pending_people.reset(token)
+    invalidate_feeds_of_people(person_ids)
+
+
+def invalidate_feeds_of_people(person_ids: Iterable[int]) -> None:
+    """
+    Invalidates the feeds that shifts belonging to these people appear in: their own, and their courses'.
+    """
+
+    pending = _pending_people.get()
+    if pending is not None:
+        pending.update(person_ids)
+        return
+    person_ids = set(person_ids)
+    if not person_ids:
+        return
+    course_ids = Course.objects.filter(
+        Q(lrc_database_user_si_course__in=person_ids) | Q(lrcdatabaseuser__in=person_ids)
+    ).values_list("id", flat=True)
+    feeds = [*map(_user_feed, person_ids), *map(_course_feed, set(course_ids))]
+    transaction.on_commit(lambda: bump_versions(feeds))
+
+
+def invalidate_all_feeds() -> None:
+    transaction.on_commit(lambda: bump_versions((ALL_FEEDS,)))
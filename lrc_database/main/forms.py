@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.models import Group
 
+from .autocomplete import AutocompleteSelect, AutocompleteSelectMultiple
 from .models import Course, Hardware, Loan, LRCDatabaseUser, Shift, ShiftChangeRequest
 
 
@@ -14,10 +15,23 @@ class CreateUserForm(forms.ModelForm):
     class Meta:
         model = LRCDatabaseUser
         fields = ("username", "email", "first_name", "last_name", "password", "courses_tutored", "si_course")
+        widgets = {"courses_tutored": AutocompleteSelectMultiple("courses"), "si_course": AutocompleteSelect("courses")}
 
     groups = forms.ModelMultipleChoiceField(queryset=Group.objects.all(), widget=forms.CheckboxSelectMultiple)
 
 
+class UserDirectoryFilterForm(forms.Form):
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.order_by("name"), to_field_name="name", required=False, empty_label="All groups"
+    )
+    course = forms.ModelChoiceField(
+        queryset=Course.objects.all(),
+        required=False,
+        widget=AutocompleteSelect("courses"),
+        help_text="Tutors and SI leaders of this course.",
+    )
+
+
 class CreateUsersInBulkForm(forms.Form):
     user_data = forms.CharField(widget=forms.Textarea)
 
@@ -32,6 +46,7 @@ class ApproveChangeRequestForm(forms.ModelForm):
     class Meta:
         model = Shift
         fields = ("associated_person", "start", "duration", "location", "kind")
+        widgets = {"associated_person": AutocompleteSelect("users")}
 
 
 class NewChangeRequestForm(forms.ModelForm):
@@ -53,7 +68,7 @@ class NewDropRequestForm(forms.ModelForm):
 class AddHardwareForm(forms.ModelForm):
     class Meta:
         model = Hardware
-        fields = ("name", "is_available")
+        fields = ("name",)
         widgets = {"name": forms.TextInput(attrs={"class": "form-control"})}
 
 
@@ -61,6 +76,7 @@ class NewShiftForm(forms.ModelForm):
     class Meta:
         model = Shift
         exclude = ()
+        widgets = {"associated_person": AutocompleteSelect("users")}
 
 
 class NewShiftForTutorForm(forms.ModelForm):
@@ -81,9 +97,36 @@ class NewLoanForm(forms.ModelForm):
         required=False,
         help_text="DD/MM/YYYY HH:MM",
     )
-    target = forms.Select(attrs={"class": "form-control"})
-    hardware_user = forms.Select(attrs={"class": "form-control"})
 
     class Meta:
         model = Loan
         fields = ("target", "hardware_user", "start_time", "return_time")
+        widgets = {
+            "target": AutocompleteSelect("hardware", attrs={"class": "form-control"}),
+            "hardware_user": AutocompleteSelect("users", attrs={"class": "form-control"}),
+        }
+
+
+class HardwareSearchForm(forms.Form):
+    name = forms.CharField(required=False, help_text='Items whose names start with this, like "Laptop".')
+    start = forms.DateTimeField(
+        input_formats=["%d/%m/%Y %H:%M"],
+        required=False,
+        label="Available from",
+        help_text="DD/MM/YYYY HH:MM",
+    )
+    end = forms.DateTimeField(
+        input_formats=["%d/%m/%Y %H:%M"],
+        required=False,
+        label="Until",
+        help_text="DD/MM/YYYY HH:MM. Leave this empty for items that aren't reserved at all after the start.",
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get("start"), cleaned_data.get("end")
+        if end is not None and start is None:
+            self.add_error("start", "Enter when the items are needed from.")
+        elif start is not None and end is not None and end <= start:
+            self.add_error("end", "This has to be after the start.")
+        return cleaned_data
@@ -0,0 +1,181 @@
+"""
+Runs long operations in the background instead of inside the request that asked for them.
+
+Views enqueue a Job with a kind and a JSON payload, then send the user to a page that polls the job's status. The
+runjobs management command claims queued jobs one at a time and runs the handler registered for their kind. Handlers
+can report progress as they go, and return a summary that's shown to the user when they finish.
+
+A job whose worker dies stays "Running". Workers fail such jobs once they've gone STALLED_JOB_TIMEOUT without
+reporting progress, and they can be requeued from the admin.
+"""
+
+import datetime
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional
+
+from django.utils import timezone
+
+from . import rescheduling
+from .models import Job, LRCDatabaseUser
+from .user_import import import_prepared
+
+logger = logging.getLogger(__name__)
+
+# Called by handlers with how much work is done, and optionally how much there is in total.
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+JobHandler = Callable[[dict, ProgressCallback], str]
+
+# Running jobs that haven't started or reported progress for this long are assumed to have lost their worker.
+STALLED_JOB_TIMEOUT = datetime.timedelta(hours=1)
+
+
+@dataclass(frozen=True)
+class _RegisteredHandler:
+    run: JobHandler
+    keep_payload: bool
+
+
+_handlers: Dict[str, _RegisteredHandler] = {}
+
+
+def job_handler(kind: str, keep_payload: bool = True) -> Callable[[JobHandler], JobHandler]:
+    """
+    Registers a function as the handler for jobs of the given kind. If keep_payload is False, the job's payload is
+    erased once it finishes, for payloads that shouldn't be kept around (like passwords).
+    """
+
+    def decorator(handler: JobHandler) -> JobHandler:
+        _handlers[kind] = _RegisteredHandler(handler, keep_payload)
+        return handler
+
+    return decorator
+
+
+def enqueue(kind: str, payload: dict, created_by: Optional[LRCDatabaseUser] = None) -> Job:
+    if kind not in _handlers:
+        raise ValueError(f"No handler is registered for {kind} jobs.")
+    return Job.objects.create(kind=kind, payload=payload, created_by=created_by)
+
+
+def claim_next_job() -> Optional[Job]:
+    """
+    Marks the oldest queued job as running and returns it, or returns None if there are no queued jobs. If several
+    workers race for the same job, only one of them gets it.
+    """
+
+    while True:
+        job = Job.objects.filter(state="Queued").order_by("id").first()
+        if job is None:
+            return None
+        now = timezone.now()
+        if Job.objects.filter(pk=job.pk, state="Queued").update(state="Running", started_at=now, heartbeat_at=now):
+            job.state = "Running"
+            job.started_at = now
+            job.heartbeat_at = now
+            return job
+
+
+def fail_stalled_jobs() -> int:
+    """
+    Fails the running jobs that have gone STALLED_JOB_TIMEOUT without a sign of life, since their workers must have
+    died, and returns how many there were. Their transactions were rolled back with the worker, so they changed
+    nothing.
+    """
+
+    now = timezone.now()
+    stalled = Job.objects.filter(state="Running", heartbeat_at__lt=now - STALLED_JOB_TIMEOUT)
+    failed = 0
+    for job in stalled:
+        fields = {
+            "state": "Failed",
+            "finished_at": now,
+            "result": "Failed: the worker stopped before the job finished.",
+        }
+        handler = _handlers.get(job.kind)
+        if handler is None or not handler.keep_payload:
+            fields["payload"] = {}
+        # Unless the job has just finished, or shown a sign of life, after all.
+        failed += Job.objects.filter(pk=job.pk, state="Running", heartbeat_at=job.heartbeat_at).update(**fields)
+    return failed
+
+
+def requeue(jobs: Iterable[Job]) -> int:
+    """
+    Queues the given failed or stalled jobs to run again from the start, and returns how many were queued. Jobs whose
+    payloads were erased can't be run again.
+    """
+
+    retryable = [job.pk for job in jobs if job.state in ("Running", "Failed") and job.payload]
+    return Job.objects.filter(pk__in=retryable).update(
+        state="Queued", progress=0, total=None, result="", started_at=None, heartbeat_at=None, finished_at=None
+    )
+
+
+def run_job(job: Job) -> None:
+    handler = _handlers[job.kind]
+
+    def report_progress(progress: int, total: Optional[int] = None) -> None:
+        fields = {"progress": progress, "heartbeat_at": timezone.now()}
+        if total is not None:
+            fields["total"] = total
+        Job.objects.filter(pk=job.pk).update(**fields)
+
+    try:
+        job.result = handler.run(job.payload, report_progress)
+        job.state = "Succeeded"
+    except Exception as e:
+        logger.exception("%s failed", job)
+        job.result = f"Failed: {e}"
+        job.state = "Failed"
+    job.finished_at = timezone.now()
+    if not handler.keep_payload:
+        job.payload = {}
+    job.save(update_fields=["result", "state", "finished_at", "payload"])
+
+
+def run_pending_jobs() -> int:
+    """
+    Runs queued jobs until there are none left, and returns how many were run.
+    """
+
+    count = 0
+    while (job := claim_next_job()) is not None:
+        run_job(job)
+        count += 1
+    return count
+
+
+@job_handler("drop_shifts")
+def drop_shifts(payload: dict, report_progress: ProgressCallback) -> str:
+    shift_ids = payload["shift_ids"]
+    series_ids = payload.get("series_ids", [])
+    date = datetime.date.fromisoformat(payload["date"]) if "date" in payload else None
+    report_progress(0, len(shift_ids) + len(series_ids))
+    result = rescheduling.drop_shifts(shift_ids, series_ids, date)
+    report_progress(len(shift_ids) + len(series_ids))
+    return f"Deleted {result.dropped} shifts."
+
+
+@job_handler("move_shifts")
+def move_shifts(payload: dict, report_progress: ProgressCallback) -> str:
+    from_date = datetime.date.fromisoformat(payload["from_date"])
+    to_date = datetime.date.fromisoformat(payload["to_date"])
+    result = rescheduling.move_shifts(from_date, to_date)
+    report_progress(result.moved, result.moved)
+    return f"Moved {result.moved} shifts from {from_date} to {to_date}."
+
+
+@job_handler("swap_shift_dates")
+def swap_shift_dates(payload: dict, report_progress: ProgressCallback) -> str:
+    first_date = datetime.date.fromisoformat(payload["first_date"])
+    second_date = datetime.date.fromisoformat(payload["second_date"])
+    result = rescheduling.swap_shift_dates(first_date, second_date)
+    report_progress(result.moved, result.moved)
+    return f"Swapped dates for {result.moved} shifts."
+
+
+@job_handler("create_users", keep_payload=False)
+def create_users(payload: dict, report_progress: ProgressCallback) -> str:
+    return import_prepared(payload, report_progress).summary()
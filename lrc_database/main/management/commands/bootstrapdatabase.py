@@ -3,13 +3,12 @@ import random
 from collections import defaultdict
 from typing import DefaultDict
 
-import pytz
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from faker import Faker
-from main.models import Course, Hardware, LRCDatabaseUser, Shift, ShiftChangeRequest
+from main.models import LOCAL_TIME_ZONE, Course, Hardware, LRCDatabaseUser, Shift, ShiftChangeRequest
 
 User = get_user_model()
 
@@ -68,7 +67,7 @@ def init_sis(path: str) -> None:
         """
         shift = Shift.objects.create(
             associated_person=user,
-            start=timezone.datetime(2022, 11, 18, 17, 30, tzinfo=pytz.timezone("America/New_York")),
+            start=timezone.datetime(2022, 11, 18, 17, 30, tzinfo=LOCAL_TIME_ZONE),
             duration=timezone.timedelta(hours=1, minutes=15),
             location="GSMN 64",
             kind="SI"
@@ -109,7 +108,7 @@ def init_shifts(path: str) -> None:
     for shift in shifts:
         associated_person = User.objects.filter(email=shift["email"]).first()
         start = timezone.datetime.strptime(f'{shift["date"]} {shift["start_time"]}', "%Y-%m-%d %H:%M:%S")
-        start = pytz.timezone("America/New_York").localize(start)
+        start = start.replace(tzinfo=LOCAL_TIME_ZONE)
         start_time = timezone.datetime.strptime(shift["start_time"], "%H:%M:%S")
         end_time = timezone.datetime.strptime(shift["end_time"], "%H:%M:%S")
         duration = end_time - start_time
@@ -128,7 +127,7 @@ def init_shift_change_requests(path: str) -> None:
         start = timezone.datetime.strptime(
             f'{shift_change_request["date"]} {shift_change_request["start_time"]}', "%Y-%m-%d %H:%M:%S"
         )
-        start = pytz.timezone("America/New_York").localize(start)
+        start = start.replace(tzinfo=LOCAL_TIME_ZONE)
         start_time = timezone.datetime.strptime(shift_change_request["start_time"], "%H:%M:%S")
         end_time = timezone.datetime.strptime(shift_change_request["end_time"], "%H:%M:%S")
         duration = end_time - start_time
@@ -179,9 +178,7 @@ def create_groups():
 
 
 def all_of_day_in_month(year: int, month: int, weekday: int, hour: int):
-    d = timezone.datetime(year, month, 1, hour, 0, 0, tzinfo=pytz.timezone("America/New_York")) + timezone.timedelta(
-        days=6 - weekday
-    )
+    d = timezone.datetime(year, month, 1, hour, 0, 0, tzinfo=LOCAL_TIME_ZONE) + timezone.timedelta(days=6 - weekday)
     ret = []
     while d.month == month:
         ret.append(d)
@@ -200,11 +197,10 @@ def create_hardware(hardware_count: int):
     hardware_counts: DefaultDict[str, int] = defaultdict(int)
     for _ in range(hardware_count):
         hw_type = random.choice(HARDWARE_TYPES)
-        is_available = random.random() < 0.5
         hardware_counts[hw_type] += 1
         number = hardware_counts[hw_type]
         name = f"{hw_type} #{number}"
-        Hardware.objects.create(name=name, is_available=is_available)
+        Hardware.objects.create(name=name)
 
 
 """
@@ -0,0 +1,267 @@
+import datetime
+import random
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple, TypeVar
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from faker import Faker
+from main.models import Course, Hardware, Loan, LRCDatabaseUser, Shift, ShiftChangeRequest, ShiftSeries
+
+T = TypeVar("T")
+
+GROUP_WEIGHTS = {"Tutors": 0.6, "SIs": 0.25, "Office staff": 0.1, "Supervisors": 0.05}
+
+DEPARTMENTS = ("COMPSCI", "MATH", "STATS", "PHYSICS", "CHEM", "BIOLOGY", "ECON", "PSYCH", "ACCOUNTG", "MIE")
+
+LOCATIONS = ("LRC", "GSMN 64", "LGRT 123", "ILC S131", "ISB 135", "Hasbrouck 20", "Morrill 222", "Thompson 104")
+
+HARDWARE_TYPES = ("Projector", "Calculator", "Laptop", "Power adapter")
+
+REASONS = ("Exam review session", "Schedule conflict", "Sick", "Final exam review", "Moving to a bigger room")
+
+# Sessions start on the quarter hour between 9 AM and 7:45 PM.
+SESSION_TIMES = [datetime.time(hour, minute) for hour in range(9, 20) for minute in (0, 15, 30, 45)]
+
+SESSION_DURATIONS = (datetime.timedelta(minutes=50), datetime.timedelta(hours=1), datetime.timedelta(minutes=75))
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def semester_days(first_day: datetime.date, weeks: int, weekday: int) -> List[datetime.date]:
+    """
+    Like all_of_day_in_month in bootstrapdatabase, but for every occurrence of a weekday (0 is Monday) in a semester.
+    """
+
+    day = first_day + datetime.timedelta(days=(weekday - first_day.weekday()) % 7)
+    return [day + datetime.timedelta(weeks=week) for week in range(weeks)]
+
+
+class Command(BaseCommand):
+    """
+    Fills the database with a large, realistic, randomly generated data set for load testing: users in every group,
+    courses, a semester of weekly recurring shifts, change requests in every state, and hardware loans. The same seed
+    always generates the same data.
+    Example:
+        manage.py generatedata --seed 1 --users 5000 --weeks 15
+    """
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--seed", default=0, type=int)
+        parser.add_argument("--users", default=2000, type=int)
+        parser.add_argument("--courses", default=300, type=int)
+        parser.add_argument("--semester-start", default="2023-01-30", type=datetime.date.fromisoformat)
+        parser.add_argument("--weeks", default=15, type=int)
+        parser.add_argument("--sessions-per-week", default=3, type=int, help="Weekly sessions per SI leader or tutor.")
+        parser.add_argument(
+            "--series-ratio", default=0.0, type=float, help="Share of weekly sessions stored as shift series."
+        )
+        parser.add_argument("--change-request-ratio", default=0.05, type=float, help="Change requests per shift.")
+        parser.add_argument("--hardware", default=200, type=int)
+        parser.add_argument("--loans-per-hardware", default=10, type=int)
+        parser.add_argument("--chunk-size", default=5000, type=int)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.faker = Faker()
+        self.faker.seed_instance(options["seed"])
+        self.chunk_size = options["chunk_size"]
+
+        started = time.monotonic()
+        courses = self.create_courses(options["courses"])
+        people = self.create_users(options["users"], courses)
+        self.create_shifts(
+            people, options["semester_start"], options["weeks"], options["sessions_per_week"], options["series_ratio"]
+        )
+        self.create_change_requests(options["change_request_ratio"])
+        self.create_hardware_and_loans(
+            options["hardware"], options["loans_per_hardware"], [user_id for user_id, _, _ in people]
+        )
+        self.stdout.write(f"Done in {time.monotonic() - started:.1f} seconds.")
+
+    def bulk_create(self, model, objs: Iterable, label: str) -> int:
+        count = 0
+        for chunk in chunked(objs, self.chunk_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk)
+            count += len(chunk)
+            self.stdout.write(f"\r{label}: {count}", ending="")
+        self.stdout.write("")
+        return count
+
+    def create_courses(self, count: int) -> List[int]:
+        numbers = self.rng.sample([(dept, number) for dept in DEPARTMENTS for number in range(100, 1000)], count)
+        self.bulk_create(
+            Course,
+            (
+                Course(department=dept, number=str(number), name=self.faker.catch_phrase()[:64])
+                for dept, number in numbers
+            ),
+            "Courses",
+        )
+        return list(Course.objects.values_list("id", flat=True))
+
+    def create_users(self, count: int, courses: List[int]) -> List[Tuple[int, str, int]]:
+        """
+        Returns (user ID, group name, SI course ID or 0) for every SI leader and tutor.
+        """
+
+        groups = {name: Group.objects.get_or_create(name=name)[0] for name in GROUP_WEIGHTS}
+        # Hashing is slow on purpose, and every generated user gets the same password anyway.
+        password = make_password("password")
+        first_user = LRCDatabaseUser.objects.aggregate(Max("id"))["id__max"] or 0
+
+        assignments: Dict[str, str] = {}
+        users = []
+        for i in range(count):
+            first_name, last_name = self.faker.first_name(), self.faker.last_name()
+            username = f"{first_name}.{last_name}.{first_user + i}".lower()
+            group = self.rng.choices(list(GROUP_WEIGHTS), weights=list(GROUP_WEIGHTS.values()))[0]
+            assignments[username] = group
+            users.append(
+                LRCDatabaseUser(
+                    username=username,
+                    email=f"{username}@example.edu",
+                    first_name=first_name,
+                    last_name=last_name,
+                    password=password,
+                    si_course_id=self.rng.choice(courses) if group == "SIs" else None,
+                )
+            )
+        self.bulk_create(LRCDatabaseUser, users, "Users")
+
+        created = LRCDatabaseUser.objects.filter(username__in=assignments).values_list("id", "username", "si_course_id")
+        people = []
+        memberships = []
+        courses_tutored = []
+        for user_id, username, si_course_id in created:
+            group = assignments[username]
+            memberships.append(LRCDatabaseUser.groups.through(lrcdatabaseuser_id=user_id, group_id=groups[group].id))
+            if group == "Tutors":
+                for course_id in self.rng.sample(courses, self.rng.randint(1, 3)):
+                    courses_tutored.append(
+                        LRCDatabaseUser.courses_tutored.through(lrcdatabaseuser_id=user_id, course_id=course_id)
+                    )
+            if group in ("Tutors", "SIs"):
+                people.append((user_id, group, si_course_id or 0))
+        self.bulk_create(LRCDatabaseUser.groups.through, memberships, "Group memberships")
+        self.bulk_create(LRCDatabaseUser.courses_tutored.through, courses_tutored, "Tutored courses")
+        return people
+
+    def create_shifts(
+        self,
+        people: List[Tuple[int, str, int]],
+        first_day: datetime.date,
+        weeks: int,
+        sessions_per_week: int,
+        series_ratio: float,
+    ) -> None:
+        series: List[ShiftSeries] = []
+        starts: Dict[Tuple[datetime.date, datetime.time], datetime.datetime] = {}
+
+        def start_at(day: datetime.date, at: datetime.time) -> datetime.datetime:
+            if (day, at) not in starts:
+                starts[day, at] = timezone.make_aware(datetime.datetime.combine(day, at))
+            return starts[day, at]
+
+        def shifts() -> Iterator[Shift]:
+            for user_id, group, _ in people:
+                kind = "SI" if group == "SIs" else "Tutoring"
+                for weekday in self.rng.sample(range(5), min(sessions_per_week, 5)):
+                    at = self.rng.choice(SESSION_TIMES)
+                    duration = self.rng.choice(SESSION_DURATIONS)
+                    location = "LRC" if kind == "Tutoring" else self.rng.choice(LOCATIONS)
+                    days = semester_days(first_day, weeks, weekday)
+                    # Only draws when series are asked for, so that the same seed generates the same shifts as before.
+                    if series_ratio and self.rng.random() < series_ratio:
+                        series.append(
+                            ShiftSeries(
+                                associated_person_id=user_id,
+                                start_time=at,
+                                duration=duration,
+                                location=location,
+                                kind=kind,
+                                first_date=days[0],
+                                last_date=days[-1],
+                            )
+                        )
+                        continue
+                    for day in days:
+                        yield Shift(
+                            associated_person_id=user_id,
+                            start=start_at(day, at),
+                            duration=duration,
+                            location=location,
+                            kind=kind,
+                        )
+
+        self.bulk_create(Shift, shifts(), "Shifts")
+        self.bulk_create(ShiftSeries, series, "Shift series")
+
+    def create_change_requests(self, ratio: float) -> None:
+        bounds = Shift.objects.aggregate(Min("id"), Max("id"))
+        if bounds["id__min"] is None:
+            return
+        shift_ids = range(bounds["id__min"], bounds["id__max"] + 1)
+        sample = self.rng.sample(shift_ids, min(len(shift_ids), int(len(shift_ids) * ratio)))
+
+        def change_requests() -> Iterator[ShiftChangeRequest]:
+            for chunk in chunked(sample, self.chunk_size):
+                for shift in Shift.objects.filter(id__in=chunk).only(
+                    "id", "associated_person_id", "start", "duration", "location", "kind"
+                ):
+                    is_drop_request = self.rng.random() < 0.3
+                    moved_by = datetime.timedelta(days=self.rng.randint(-3, 3), minutes=15 * self.rng.randint(-8, 8))
+                    yield ShiftChangeRequest(
+                        shift_to_update=shift,
+                        reason=self.rng.choice(REASONS),
+                        state=self.rng.choice(("New", "Pending", "Approved", "Not Approved")),
+                        is_drop_request=is_drop_request,
+                        new_associated_person_id=shift.associated_person_id,
+                        new_start=shift.start if is_drop_request else shift.start + moved_by,
+                        new_duration=None if is_drop_request else shift.duration,
+                        new_location=None if is_drop_request else shift.location,
+                        new_kind=shift.kind,
+                    )
+
+        self.bulk_create(ShiftChangeRequest, change_requests(), "Shift change requests")
+
+    def create_hardware_and_loans(self, count: int, loans_per_hardware: int, user_ids: List[int]) -> None:
+        now = timezone.now()
+        numbers: Dict[str, int] = {}
+        hardware = []
+        for _ in range(count):
+            hw_type = self.rng.choice(HARDWARE_TYPES)
+            numbers[hw_type] = numbers.get(hw_type, 0) + 1
+            hardware.append(Hardware(name=f"{hw_type} #{numbers[hw_type]}"))
+        self.bulk_create(Hardware, hardware, "Hardware")
+        if not user_ids:
+            return
+
+        def loans() -> Iterator[Loan]:
+            for hardware_id in Hardware.objects.filter(name__in=[h.name for h in hardware]).values_list(
+                "id", flat=True
+            ):
+                # Consecutive loans going back from now; the most recent one is sometimes still out.
+                returned_at = now - datetime.timedelta(hours=self.rng.randint(1, 72))
+                for i in range(loans_per_hardware):
+                    start_time = returned_at - datetime.timedelta(days=self.rng.randint(1, 14))
+                    still_out = i == 0 and self.rng.random() < 0.3
+                    yield Loan(
+                        target_id=hardware_id,
+                        hardware_user_id=self.rng.choice(user_ids),
+                        start_time=start_time if not still_out else now - datetime.timedelta(days=1),
+                        return_time=None if still_out else returned_at,
+                    )
+                    returned_at = start_time - datetime.timedelta(hours=self.rng.randint(1, 72))
+
+        self.bulk_create(Loan, loans(), "Loans")
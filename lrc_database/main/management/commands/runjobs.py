@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from main import metrics
+from main.jobs import claim_next_job, fail_stalled_jobs, run_job, run_pending_jobs
+
+
+class Command(BaseCommand):
+    """
+    Runs queued background jobs (see main/jobs.py). By default this keeps running and polls for new jobs; run as many
+    of these as you like, since each job is only claimed by one of them. Whenever there's no work, it fails the jobs
+    left running by workers that died.
+    Example:
+        manage.py runjobs
+        manage.py runjobs --once
+    """
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--once", action="store_true", help="Run the jobs that are queued now, then exit.")
+        parser.add_argument("--poll-interval", default=1.0, type=float, help="Seconds to wait when there's no work.")
+
+    def handle(self, *args, **options):
+        self.fail_stalled_jobs()
+        if options["once"]:
+            count = run_pending_jobs()
+            self.stdout.write(f"Ran {count} jobs.")
+            return
+
+        self.stdout.write("Waiting for jobs...")
+        while True:
+            close_old_connections()
+            job = claim_next_job()
+            if job is None:
+                self.fail_stalled_jobs()
+                time.sleep(options["poll_interval"])
+                continue
+            self.stdout.write(f"Running {job}")
+            run_job(job)
+            # Metrics are otherwise only written when the process exits, and this one runs until it's stopped.
+            metrics.flush()
+
+    def fail_stalled_jobs(self) -> None:
+        if failed := fail_stalled_jobs():
+            self.stdout.write(f"Failed {failed} stalled jobs.")
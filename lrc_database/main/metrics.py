@@ -0,0 +1,286 @@
+"""
+Request and SQL metrics per view, in the Prometheus text format.
+
+MetricsMiddleware records, for every request, how long it took and how many SQL queries it ran (and how long they
+took), labeled with the name of the URL pattern that handled it. Each process keeps running totals in memory. When
+settings.METRICS_DIR is set, every process also writes its totals to its own file in that directory every few seconds,
+so that the metrics page can add up the totals of all of the gunicorn workers and not just the one that serves it.
+
+Write transactions also report how long they waited for SQLite's write lock, and how often they had to be retried
+because they couldn't get it. Those that run outside of a request, like background jobs, are labeled "<background>".
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+
+# Upper bounds of the latency histogram's buckets, in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Requests that didn't match any URL pattern.
+UNMATCHED = "<unmatched>"
+
+# Database work done outside of any request.
+BACKGROUND = "<background>"
+
+
+@dataclass
+class ViewMetrics:
+    requests: int = 0
+    seconds: float = 0.0
+    # Number of requests in each latency bucket, plus one more for requests slower than the last bucket.
+    latency_buckets: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    queries: int = 0
+    query_seconds: float = 0.0
+    write_transactions: int = 0
+    lock_wait_seconds: float = 0.0
+    lock_retries: int = 0
+    # Write transactions that gave up because the database stayed locked.
+    lock_failures: int = 0
+
+    def record(self, seconds: float, database: "DatabaseUsage") -> None:
+        self.requests += 1
+        self.seconds += seconds
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.add_database_usage(database)
+
+    def add_database_usage(self, database: "DatabaseUsage") -> None:
+        self.queries += database.queries
+        self.query_seconds += database.query_seconds
+        self.write_transactions += database.write_transactions
+        self.lock_wait_seconds += database.lock_wait_seconds
+        self.lock_retries += database.lock_retries
+        self.lock_failures += database.lock_failures
+
+    def add(self, other: "ViewMetrics") -> None:
+        self.requests += other.requests
+        self.seconds += other.seconds
+        self.latency_buckets = [a + b for a, b in zip(self.latency_buckets, other.latency_buckets)]
+        self.add_database_usage(other)
+
+
+class DatabaseUsage:
+    """
+    The database work done during one request. It's also a database execute wrapper that counts queries and adds up
+    the time they take.
+    """
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.write_transactions = 0
+        self.lock_wait_seconds = 0.0
+        self.lock_retries = 0
+        self.lock_failures = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - started
+
+    def wrap_connections(self) -> ExitStack:
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        return stack
+
+
+_lock = threading.Lock()
+_metrics: Dict[str, ViewMetrics] = {}
+_last_flush = 0.0
+_current_request: ContextVar[Optional[DatabaseUsage]] = ContextVar("current_request", default=None)
+
+
+def _metrics_file() -> Optional[Path]:
+    if not settings.METRICS_DIR:
+        return None
+    return Path(settings.METRICS_DIR) / f"metrics-{os.getpid()}.json"
+
+
+def record(view: str, seconds: float, database: DatabaseUsage) -> None:
+    global _last_flush
+    with _lock:
+        _metrics.setdefault(view, ViewMetrics()).record(seconds, database)
+        now = time.monotonic()
+        if now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+        _last_flush = now
+    flush()
+
+
+def _database_usage() -> DatabaseUsage:
+    """
+    Returns the usage of the request being handled, or a new one that _record_background has to be called with.
+    """
+
+    return _current_request.get() or DatabaseUsage()
+
+
+def _record_background(database: DatabaseUsage) -> None:
+    if _current_request.get() is None:
+        with _lock:
+            _metrics.setdefault(BACKGROUND, ViewMetrics()).add_database_usage(database)
+
+
+def record_lock_wait(seconds: float) -> None:
+    """
+    Called when a write transaction has started, with how long it took to get the write lock.
+    """
+
+    database = _database_usage()
+    database.write_transactions += 1
+    database.lock_wait_seconds += seconds
+    _record_background(database)
+
+
+def record_lock_retry(gave_up: bool) -> None:
+    database = _database_usage()
+    if gave_up:
+        database.lock_failures += 1
+    else:
+        database.lock_retries += 1
+    _record_background(database)
+
+
+def flush() -> None:
+    """
+    Writes this process's totals to its file in settings.METRICS_DIR, if it's set.
+    """
+
+    path = _metrics_file()
+    if path is None:
+        return
+    with _lock:
+        snapshot = {view: asdict(metrics) for view, metrics in _metrics.items()}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file and rename it, so that readers never see a half-written file.
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(snapshot))
+    os.replace(temporary, path)
+
+
+atexit.register(flush)
+
+
+def collect() -> Dict[str, ViewMetrics]:
+    """
+    Returns the totals of every process that has written to settings.METRICS_DIR, or of just this process if it isn't
+    set.
+    """
+
+    flush()
+    if not settings.METRICS_DIR:
+        with _lock:
+            return {view: ViewMetrics(**asdict(metrics)) for view, metrics in _metrics.items()}
+
+    files = Path(settings.METRICS_DIR).glob("metrics-*.json")
+    totals: Dict[str, ViewMetrics] = {}
+    for path in files:
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            # The file was removed, or a worker died while writing it.
+            continue
+        for view, metrics in snapshot.items():
+            totals.setdefault(view, ViewMetrics()).add(ViewMetrics(**metrics))
+    return totals
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_metrics(totals: Dict[str, ViewMetrics]) -> str:
+    lines = [
+        "# HELP lrc_http_requests_total Requests handled, by URL name.",
+        "# TYPE lrc_http_requests_total counter",
+    ]
+    views = sorted(totals)
+    labels = {view: f'view="{_escape_label(view)}"' for view in views}
+    lines.extend(f"lrc_http_requests_total{{{labels[view]}}} {totals[view].requests}" for view in views)
+
+    lines.append("# HELP lrc_http_request_duration_seconds Time spent handling requests, by URL name.")
+    lines.append("# TYPE lrc_http_request_duration_seconds histogram")
+    for view in views:
+        metrics = totals[view]
+        cumulative = 0
+        for bound, count in zip((*map(str, LATENCY_BUCKETS), "+Inf"), metrics.latency_buckets):
+            cumulative += count
+            lines.append(f'lrc_http_request_duration_seconds_bucket{{{labels[view]},le="{bound}"}} {cumulative}')
+        lines.append(f"lrc_http_request_duration_seconds_sum{{{labels[view]}}} {metrics.seconds}")
+        lines.append(f"lrc_http_request_duration_seconds_count{{{labels[view]}}} {metrics.requests}")
+
+    lines.append("# HELP lrc_sql_queries_total SQL queries run while handling requests, by URL name.")
+    lines.append("# TYPE lrc_sql_queries_total counter")
+    lines.extend(f"lrc_sql_queries_total{{{labels[view]}}} {totals[view].queries}" for view in views)
+
+    lines.append("# HELP lrc_sql_duration_seconds_total Time spent running SQL queries, by URL name.")
+    lines.append("# TYPE lrc_sql_duration_seconds_total counter")
+    lines.extend(f"lrc_sql_duration_seconds_total{{{labels[view]}}} {totals[view].query_seconds}" for view in views)
+
+    lines.append("# HELP lrc_db_write_transactions_total Write transactions started, by URL name.")
+    lines.append("# TYPE lrc_db_write_transactions_total counter")
+    lines.extend(
+        f"lrc_db_write_transactions_total{{{labels[view]}}} {totals[view].write_transactions}" for view in views
+    )
+
+    lines.append("# HELP lrc_db_lock_wait_seconds_total Time spent waiting for the database's write lock, by URL name.")
+    lines.append("# TYPE lrc_db_lock_wait_seconds_total counter")
+    lines.extend(f"lrc_db_lock_wait_seconds_total{{{labels[view]}}} {totals[view].lock_wait_seconds}" for view in views)
+
+    lines.append("# HELP lrc_db_lock_retries_total Write transactions retried because the database was locked.")
+    lines.append("# TYPE lrc_db_lock_retries_total counter")
+    lines.extend(f"lrc_db_lock_retries_total{{{labels[view]}}} {totals[view].lock_retries}" for view in views)
+
+    lines.append("# HELP lrc_db_lock_failures_total Write transactions abandoned because the database stayed locked.")
+    lines.append("# TYPE lrc_db_lock_failures_total counter")
+    lines.extend(f"lrc_db_lock_failures_total{{{labels[view]}}} {totals[view].lock_failures}" for view in views)
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        started = time.perf_counter()
+        database = DatabaseUsage()
+        token = _current_request.set(database)
+        try:
+            with database.wrap_connections():
+                response = self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+        match = request.resolver_match
+        view = match.view_name if match is not None else UNMATCHED
+
+        if isinstance(response, StreamingHttpResponse):
+            # Streamed responses run their queries while they're being sent, after this returns.
+            response.streaming_content = self._measure_stream(response.streaming_content, view, started, database)
+        else:
+            record(view, time.perf_counter() - started, database)
+        return response
+
+    @staticmethod
+    def _measure_stream(content: Iterator[bytes], view: str, started: float, database: DatabaseUsage):
+        try:
+            with database.wrap_connections():
+                yield from content
+        finally:
+            record(view, time.perf_counter() - started, database)
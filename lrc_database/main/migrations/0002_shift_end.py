@@ -0,0 +1,57 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:29
+
+import datetime
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F
+
+
+def fill_shift_end(apps, schema_editor):
+    Shift = apps.get_model("main", "Shift")
+    Shift.objects.update(end=ExpressionWrapper(F("start") + F("duration"), output_field=models.DateTimeField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="course",
+            options={"ordering": ["department", "number"]},
+        ),
+        migrations.AlterModelOptions(
+            name="shift",
+            options={"ordering": ["start"]},
+        ),
+        migrations.AlterModelOptions(
+            name="shiftchangerequest",
+            options={"ordering": ["new_start"]},
+        ),
+        migrations.AddField(
+            model_name="shift",
+            name="end",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_shift_end, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="shift",
+            name="end",
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name="shift",
+            name="duration",
+            field=models.DurationField(
+                help_text="How long the shift will last, in HH:MM:SS format.",
+                validators=[django.core.validators.MaxValueValidator(datetime.timedelta(days=1))],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(fields=["start", "end"], name="shift_start_end_idx"),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0002_shift_end"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(help_text="Which handler in jobs.py runs this job.", max_length=32)),
+                ("payload", models.JSONField(blank=True, default=dict, help_text="Arguments for the job's handler.")),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[
+                            ("Queued", "Queued"),
+                            ("Running", "Running"),
+                            ("Succeeded", "Succeeded"),
+                            ("Failed", "Failed"),
+                        ],
+                        default="Queued",
+                        max_length=16,
+                    ),
+                ),
+                ("progress", models.PositiveIntegerField(default=0, help_text="How many units of work are done.")),
+                (
+                    "total",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        default=None,
+                        help_text="How many units of work there are in total, if known.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "result",
+                    models.TextField(
+                        blank=True, default="", help_text="A summary of what the job did, or why it failed."
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, default=None, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, default=None, null=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        default=None,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["state", "id"], name="job_state_idx"),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.1.13 on 2026-10-18 21:05
+
+from zoneinfo import ZoneInfo
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def fill_shift_local_date(apps, schema_editor):
+    Shift = apps.get_model("main", "Shift")
+    Shift.objects.update(local_date=TruncDate("start", tzinfo=ZoneInfo("America/New_York")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0003_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shift",
+            name="local_date",
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_shift_local_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="shift",
+            name="local_date",
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(fields=["local_date", "start"], name="shift_local_date_idx"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0004_shift_local_date"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="hardware",
+            index=models.Index(fields=["name"], name="hardware_name_idx"),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:54
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0005_hardware_name_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(
+                django.db.models.functions.text.Lower("department"), models.F("number"), name="course_department_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(django.db.models.functions.text.Lower("name"), name="course_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="hardware",
+            index=models.Index(django.db.models.functions.text.Lower("name"), name="hardware_name_lower_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="lrcdatabaseuser",
+            index=models.Index(django.db.models.functions.text.Lower("username"), name="user_username_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="lrcdatabaseuser",
+            index=models.Index(django.db.models.functions.text.Lower("first_name"), name="user_first_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="lrcdatabaseuser",
+            index=models.Index(django.db.models.functions.text.Lower("last_name"), name="user_last_name_idx"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0006_autocomplete_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(fields=["associated_person", "start", "end"], name="shift_person_start_idx"),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0007_shift_person_start_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="shiftchangerequest",
+            index=models.Index(fields=["state", "new_start", "id"], name="scr_state_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shiftchangerequest",
+            index=models.Index(
+                condition=models.Q(("is_drop_request", False)),
+                fields=["state", "new_start", "id"],
+                name="scr_change_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shiftchangerequest",
+            index=models.Index(
+                condition=models.Q(("is_drop_request", True)), fields=["state", "new_start", "id"], name="scr_drop_idx"
+            ),
+        ),
+    ]
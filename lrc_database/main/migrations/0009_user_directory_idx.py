@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0008_change_request_queue_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="lrcdatabaseuser",
+            index=models.Index(fields=["last_name", "id"], name="user_directory_idx"),
+        ),
+    ]
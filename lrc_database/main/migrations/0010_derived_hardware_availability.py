@@ -0,0 +1,25 @@
+# Generated by Django 4.1.13 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0009_user_directory_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="hardware",
+            name="is_available",
+        ),
+        migrations.AddIndex(
+            model_name="loan",
+            index=models.Index(fields=["target", "return_time"], name="loan_target_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="loan",
+            index=models.Index(fields=["return_time", "id"], name="loan_return_time_idx"),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0010_derived_hardware_availability"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="loan",
+            name="loan_target_idx",
+        ),
+        migrations.AddIndex(
+            model_name="loan",
+            index=models.Index(fields=["target", "return_time", "start_time"], name="loan_target_idx"),
+        ),
+    ]
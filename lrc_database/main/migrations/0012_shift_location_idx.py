@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-18 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0011_loan_overlap_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(fields=["location", "start", "end"], name="shift_location_start_idx"),
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 4.1.13 on 2026-10-18 18:12
+
+import datetime
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0012_shift_location_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShiftSeries",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("start_time", models.TimeField(help_text="The local time that each shift starts.")),
+                (
+                    "duration",
+                    models.DurationField(
+                        help_text="How long each shift lasts, in HH:MM:SS format.",
+                        validators=[django.core.validators.MaxValueValidator(datetime.timedelta(days=1))],
+                    ),
+                ),
+                (
+                    "location",
+                    models.CharField(help_text="The location where the shifts occur, e.g. GSMN 64.", max_length=32),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("SI", "SI"), ("Tutoring", "Tutoring")],
+                        help_text="The kind of shifts these are: tutoring or SI.",
+                        max_length=8,
+                    ),
+                ),
+                (
+                    "first_date",
+                    models.DateField(help_text="The date of the first shift. The series repeats on its weekday."),
+                ),
+                ("last_date", models.DateField(help_text="The last date that the series can have a shift on.")),
+                (
+                    "every_weeks",
+                    models.PositiveSmallIntegerField(
+                        default=1,
+                        help_text="How many weeks apart the shifts are.",
+                        validators=[django.core.validators.MinValueValidator(1)],
+                    ),
+                ),
+                (
+                    "exception_dates",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="Dates, as YYYY-MM-DD, that the series skips: holidays, and shifts that were dropped or changed.",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "shift series",
+            },
+        ),
+        migrations.AddField(
+            model_name="shift",
+            name="series_date",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="shiftseries",
+            name="associated_person",
+            field=models.ForeignKey(
+                help_text="The person who works these shifts.",
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="shift",
+            name="series",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="materialized_shifts",
+                to="main.shiftseries",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="shift",
+            constraint=models.UniqueConstraint(fields=("series", "series_date"), name="shift_series_date_unique"),
+        ),
+        migrations.AddIndex(
+            model_name="shiftseries",
+            index=models.Index(fields=["last_date", "first_date"], name="series_dates_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shiftseries",
+            index=models.Index(fields=["associated_person", "last_date"], name="series_person_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shiftseries",
+            index=models.Index(fields=["location", "last_date"], name="series_location_idx"),
+        ),
+    ]
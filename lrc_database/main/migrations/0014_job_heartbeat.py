@@ -0,0 +1,20 @@
+# Generated by Django 4.1.13 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0013_shift_series"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="heartbeat_at",
+            field=models.DateTimeField(
+                blank=True, default=None, help_text="When the job last started or reported progress.", null=True
+            ),
+        ),
+    ]
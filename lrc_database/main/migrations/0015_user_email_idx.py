@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-18 18:36
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0014_job_heartbeat"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="lrcdatabaseuser",
+            index=models.Index(django.db.models.functions.text.Lower("email"), name="user_email_idx"),
+        ),
+    ]
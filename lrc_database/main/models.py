@@ -1,13 +1,21 @@
 import datetime
+from typing import Iterable, Iterator, List, Optional
+from zoneinfo import ZoneInfo
 
-import pytz
 from django import forms
 from django.contrib.auth.models import AbstractUser
 from django.core import validators
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Exists, ExpressionWrapper, F, OuterRef, Q, Value
+from django.db.models.functions import Lower, TruncDate
 from django.db.models.query import QuerySet
+from django.dispatch import Signal
+from django.utils import timezone
 
 from .custom_validators import validate_course_number
+from .roles import PRIVILEGED_GROUPS, is_in_groups
 
 
 class Course(models.Model):
@@ -25,8 +33,14 @@ class Course(models.Model):
         max_length=64,
         help_text='The human-legible name of the course, like "Programming with Data Structures."',
     )
+
     class Meta:
         ordering = ['department','number']
+        # For main.autocomplete.
+        indexes = [
+            models.Index(Lower("department"), F("number"), name="course_department_idx"),
+            models.Index(Lower("name"), name="course_name_idx"),
+        ]
 
     def short_name(self):
         return f"{self.department} {self.number}"
@@ -47,14 +61,98 @@ class LRCDatabaseUser(AbstractUser):
         verbose_name="SI course",
     )
 
+    class Meta(AbstractUser.Meta):
+        # For main.autocomplete.
+        indexes = [
+            models.Index(Lower("username"), name="user_username_idx"),
+            models.Index(Lower("first_name"), name="user_first_name_idx"),
+            models.Index(Lower("last_name"), name="user_last_name_idx"),
+            models.Index(Lower("email"), name="user_email_idx"),
+            # For the user directory, which is paginated on (last_name, id).
+            models.Index(fields=["last_name", "id"], name="user_directory_idx"),
+        ]
+
     def is_privileged(self) -> bool:
-        return self.groups.filter(name__in=("Office staff", "Supervisors")).exists()
+        return is_in_groups(self, *PRIVILEGED_GROUPS)
 
-    def __str__(self) -> str:
-        if not (self.first_name and self.last_name):
-            return self.username
+    @staticmethod
+    def display_name(username: str, first_name: str, last_name: str) -> str:
+        """
+        The same as str(user), for when only those columns have been fetched.
+        """
+
+        if not (first_name and last_name):
+            return username
         else:
-            return f"{self.first_name} {self.last_name}"
+            return f"{first_name} {last_name}"
+
+    def __str__(self) -> str:
+        return LRCDatabaseUser.display_name(self.username, self.first_name, self.last_name)
+
+
+# Shifts can't be longer than this, which lets range queries bound the start time on both sides.
+MAX_SHIFT_DURATION = datetime.timedelta(days=1)
+
+# The time zone that the LRC's days are in, for Shift.local_date.
+LOCAL_TIME_ZONE = ZoneInfo("America/New_York")
+
+
+# Sent by ShiftQuerySet and ShiftSeriesQuerySet after bulk operations, which don't send post_save. Receivers get the
+# queryset that was operated on rather than the affected rows, since those aren't always known.
+shifts_bulk_changed = Signal()
+
+SHIFT_KINDS = (("SI", "SI"), ("Tutoring", "Tutoring"))
+
+
+class ShiftQuerySet(models.QuerySet):
+    """
+    Range queries over shifts. The bulk operations are overridden to keep Shift.end and Shift.local_date in sync with
+    start and duration, since they bypass Shift.save(), and to send shifts_bulk_changed.
+    """
+
+    def overlapping(self, range_start: datetime.datetime, range_end: datetime.datetime) -> "ShiftQuerySet":
+        """
+        Shifts that are at least partly within [range_start, range_end).
+        """
+
+        return self.filter(
+            start__gt=range_start - MAX_SHIFT_DURATION,
+            start__lt=range_end,
+            end__gt=range_start,
+        )
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for shift in objs:
+            shift.set_derived_fields()
+        created = super().bulk_create(objs, *args, **kwargs)
+        shifts_bulk_changed.send(sender=self.model, queryset=self)
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        fields = list(fields)
+        if "start" in fields or "duration" in fields:
+            fields.extend(field for field in Shift.DERIVED_FIELDS if field not in fields)
+        objs = list(objs)
+        for shift in objs:
+            shift.set_derived_fields()
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        shifts_bulk_changed.send(sender=self.model, queryset=self)
+        return updated
+
+    def update(self, **kwargs):
+        if "start" in kwargs or "duration" in kwargs:
+            start = kwargs.get("start", F("start"))
+            duration = kwargs.get("duration", F("duration"))
+            if not hasattr(start, "resolve_expression"):
+                start = Value(start, output_field=models.DateTimeField())
+            if not hasattr(duration, "resolve_expression"):
+                duration = Value(duration, output_field=models.DurationField())
+            kwargs["end"] = ExpressionWrapper(start + duration, output_field=models.DateTimeField())
+            kwargs["local_date"] = TruncDate(start, tzinfo=LOCAL_TIME_ZONE)
+        updated = super().update(**kwargs)
+        shifts_bulk_changed.send(sender=self.model, queryset=self)
+        return updated
 
 
 class Shift(models.Model):
@@ -66,7 +164,16 @@ class Shift(models.Model):
 
     start = models.DateTimeField(help_text="The time that the shift starts.")
 
-    duration = models.DurationField(help_text="How long the shift will last, in HH:MM:SS format.")
+    duration = models.DurationField(
+        validators=[MaxValueValidator(MAX_SHIFT_DURATION)],
+        help_text="How long the shift will last, in HH:MM:SS format.",
+    )
+
+    # Always start + duration; stored so that range queries can use an index.
+    end = models.DateTimeField(editable=False)
+
+    # Always the date of start in LOCAL_TIME_ZONE; stored so that finding the shifts on a day is an indexed lookup.
+    local_date = models.DateField(editable=False)
 
     location = models.CharField(
         max_length=32,
@@ -75,27 +182,298 @@ class Shift(models.Model):
 
     kind = models.CharField(
         max_length=8,
-        choices=(("SI", "SI"), ("Tutoring", "Tutoring")),
+        choices=SHIFT_KINDS,
         help_text="The kind of shift this is: tutoring or SI.",
     )
 
+    # Set on shifts that were materialized from an occurrence of a series, and the date of that occurrence.
+    series = models.ForeignKey(
+        to="ShiftSeries",
+        null=True,
+        blank=True,
+        editable=False,
+        on_delete=models.SET_NULL,
+        related_name="materialized_shifts",
+    )
+    series_date = models.DateField(null=True, blank=True, editable=False)
+
+    objects = ShiftQuerySet.as_manager()
+
     class Meta:
         ordering = ['start']
+        indexes = [
+            models.Index(fields=["start", "end"], name="shift_start_end_idx"),
+            models.Index(fields=["local_date", "start"], name="shift_local_date_idx"),
+            models.Index(fields=["associated_person", "start", "end"], name="shift_person_start_idx"),
+            # For main.double_booking.
+            models.Index(fields=["location", "start", "end"], name="shift_location_start_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["series", "series_date"], name="shift_series_date_unique"),
+        ]
+
+    # Fields computed from start and duration.
+    DERIVED_FIELDS = ("end", "local_date")
 
     @staticmethod
     def all_on_date(date: datetime.date) -> QuerySet["Shift"]:
-        tz_adjusted_range_start = datetime.datetime(
-            date.year, date.month, date.day, tzinfo=pytz.timezone("America/New_York")
+        """
+        Shifts that start on the given date, in LOCAL_TIME_ZONE.
+        """
+
+        return Shift.objects.filter(local_date=date)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so that signal receivers can tell whose schedule a shift was moved off of.
+        instance._loaded_associated_person_id = instance.__dict__.get("associated_person_id")
+        return instance
+
+    def set_derived_fields(self) -> None:
+        self.end = self.start + self.duration
+        self.local_date = self.start.astimezone(LOCAL_TIME_ZONE).date()
+
+    def save(self, *args, **kwargs):
+        self.set_derived_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and ("start" in update_fields or "duration" in update_fields):
+            kwargs["update_fields"] = {*update_fields, *Shift.DERIVED_FIELDS}
+        super().save(*args, **kwargs)
+
+    def clean(self) -> None:
+        # Forms that leave out the person or the location check for double bookings themselves, once they're set.
+        if None in (self.associated_person_id, self.start, self.duration) or not self.location:
+            return
+        # Imported here since double_booking imports this module.
+        from .double_booking import DoubleBookingError, find
+
+        double_bookings = find([self])
+        if double_bookings:
+            raise ValidationError(str(DoubleBookingError(double_bookings)))
+
+    def __str__(self):
+        start = self.start.astimezone(LOCAL_TIME_ZONE)
+        return f"{self.associated_person} in {self.location} at {start} for {self.kind} Session"
+
+
+class ShiftSeriesQuerySet(models.QuerySet):
+    def active_between(self, first_date: datetime.date, last_date: datetime.date) -> "ShiftSeriesQuerySet":
+        """
+        Series that can have occurrences on the dates from first_date to last_date.
+        """
+
+        return self.filter(last_date__gte=first_date, first_date__lte=last_date)
+
+    def occurrences(self, range_start: datetime.datetime, range_end: datetime.datetime) -> List[Shift]:
+        """
+        The occurrences of the series that are at least partly within [range_start, range_end), as unsaved shifts in
+        order of start time. The series are fetched in one query; select_related("associated_person") to have the
+        shifts' people too.
+        """
+
+        return sorted(self.each_occurrence(range_start, range_end), key=lambda shift: shift.start)
+
+    def each_occurrence(self, range_start: datetime.datetime, range_end: datetime.datetime) -> Iterator[Shift]:
+        """
+        Like occurrences(), but lazily, a series at a time and out of order, so that they needn't all be in memory.
+        """
+
+        first_date = (range_start - MAX_SHIFT_DURATION).astimezone(LOCAL_TIME_ZONE).date()
+        last_date = range_end.astimezone(LOCAL_TIME_ZONE).date()
+        for series in self.active_between(first_date, last_date).iterator():
+            yield from series.occurrences(range_start, range_end)
+
+    def occurring_on(self, date: datetime.date) -> List["ShiftSeries"]:
+        return [series for series in self.active_between(date, date) if series.occurs_on(date)]
+
+    def skip(self, series: Iterable["ShiftSeries"], date: datetime.date) -> None:
+        """
+        Makes the given series skip date, in one statement.
+        """
+
+        series = list(series)
+        for one in series:
+            one.exception_dates = sorted({*one.exception_dates, date.isoformat()})
+        self.bulk_update(series, ["exception_dates"])
+
+    def materialize_on(self, date: datetime.date) -> List[Shift]:
+        """
+        Materializes the occurrences of the series on date, in bulk, and returns the new shifts.
+        """
+
+        series = self.occurring_on(date)
+        shifts = [one.occurrence(date) for one in series]
+        Shift.objects.bulk_create(shifts)
+        self.skip(series, date)
+        return shifts
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        shifts_bulk_changed.send(sender=self.model, queryset=self)
+        return updated
+
+
+class ShiftSeries(models.Model):
+    """
+    A shift that repeats every week, or every few weeks, from first_date to last_date.
+
+    Occurrences aren't stored. They're expanded from the series for the times being looked at, except on the
+    exception dates. An occurrence that's edited, dropped or requested for change is materialized into a Shift first,
+    and its date becomes an exception, so that it isn't expanded too.
+    """
+
+    associated_person = models.ForeignKey(
+        to=LRCDatabaseUser,
+        on_delete=models.CASCADE,
+        help_text="The person who works these shifts.",
+    )
+
+    start_time = models.TimeField(help_text="The local time that each shift starts.")
+
+    duration = models.DurationField(
+        validators=[MaxValueValidator(MAX_SHIFT_DURATION)],
+        help_text="How long each shift lasts, in HH:MM:SS format.",
+    )
+
+    location = models.CharField(
+        max_length=32,
+        help_text="The location where the shifts occur, e.g. GSMN 64.",
+    )
+
+    kind = models.CharField(
+        max_length=8,
+        choices=SHIFT_KINDS,
+        help_text="The kind of shifts these are: tutoring or SI.",
+    )
+
+    first_date = models.DateField(help_text="The date of the first shift. The series repeats on its weekday.")
+
+    last_date = models.DateField(help_text="The last date that the series can have a shift on.")
+
+    every_weeks = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[MinValueValidator(1)],
+        help_text="How many weeks apart the shifts are.",
+    )
+
+    exception_dates = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Dates, as YYYY-MM-DD, that the series skips: holidays, and shifts that were dropped or changed.",
+    )
+
+    objects = ShiftSeriesQuerySet.as_manager()
+
+    class Meta:
+        verbose_name_plural = "shift series"
+        indexes = [
+            models.Index(fields=["last_date", "first_date"], name="series_dates_idx"),
+            models.Index(fields=["associated_person", "last_date"], name="series_person_idx"),
+            # For main.double_booking.
+            models.Index(fields=["location", "last_date"], name="series_location_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Like Shift.from_db().
+        instance._loaded_associated_person_id = instance.__dict__.get("associated_person_id")
+        return instance
+
+    def clean(self) -> None:
+        if self.first_date and self.last_date and self.last_date < self.first_date:
+            raise ValidationError({"last_date": "The series can't end before it starts."})
+        fields = (self.associated_person_id, self.start_time, self.duration, self.location, self.first_date)
+        if None in fields or not self.last_date or not self.every_weeks:
+            return
+        # Imported here since double_booking imports this module.
+        from .double_booking import DoubleBookingError, find
+
+        start = timezone.make_aware(datetime.datetime.combine(self.first_date, datetime.time()), LOCAL_TIME_ZONE)
+        # The series' own occurrences, as they were before this change, don't count.
+        double_bookings = [
+            double_booking
+            for double_booking in find(list(self.occurrences(start)), with_each_other=False)
+            if self.pk is None or double_booking.other.pk is not None or double_booking.other.series_id != self.pk
+        ]
+        if double_bookings:
+            raise ValidationError(str(DoubleBookingError(double_bookings)))
+
+    def occurs_on(self, date: datetime.date) -> bool:
+        return (
+            self.first_date <= date <= self.last_date
+            and (date - self.first_date).days % (7 * self.every_weeks) == 0
+            and date.isoformat() not in self.exception_dates
         )
-        tz_adjusted_range_end = tz_adjusted_range_start + datetime.timedelta(days=1)
-        return Shift.objects.filter(
-            start__gte=tz_adjusted_range_start,
-            start__lte=tz_adjusted_range_end,
+
+    def occurrence(self, date: datetime.date) -> Shift:
+        """
+        The unsaved shift for the occurrence on date, which keeps its local wall-clock time across DST changes.
+        """
+
+        if ShiftSeries.associated_person.is_cached(self):
+            person = {"associated_person": self.associated_person}
+        else:
+            person = {"associated_person_id": self.associated_person_id}
+        shift = Shift(
+            start=timezone.make_aware(datetime.datetime.combine(date, self.start_time), LOCAL_TIME_ZONE),
+            duration=self.duration,
+            location=self.location,
+            kind=self.kind,
+            series=self,
+            series_date=date,
+            **person,
         )
+        shift.set_derived_fields()
+        return shift
+
+    def occurrences(
+        self, range_start: datetime.datetime, range_end: Optional[datetime.datetime] = None
+    ) -> Iterator[Shift]:
+        """
+        Yields the occurrences that are at least partly within [range_start, range_end), or that end after range_start
+        if there's no range_end, in order.
+        """
+
+        step = datetime.timedelta(weeks=self.every_weeks)
+        first_date = max(self.first_date, (range_start - MAX_SHIFT_DURATION).astimezone(LOCAL_TIME_ZONE).date())
+        last_date = self.last_date
+        if range_end is not None:
+            last_date = min(last_date, range_end.astimezone(LOCAL_TIME_ZONE).date())
+        # The first occurrence on or after first_date.
+        date = self.first_date + step * -((self.first_date - first_date) // step)
+        skipped = set(self.exception_dates)
+        while date <= last_date:
+            if date.isoformat() not in skipped:
+                shift = self.occurrence(date)
+                if (range_end is None or shift.start < range_end) and shift.end > range_start:
+                    yield shift
+            date += step
+
+    def materialize(self, date: datetime.date) -> Shift:
+        """
+        Returns the saved shift for the occurrence on date, materializing it first if it hasn't been. Raises ValueError
+        if the series has no occurrence on that date.
+        """
+
+        shift = self.materialized_shifts.filter(series_date=date).first()
+        if shift is not None:
+            return shift
+        if not self.occurs_on(date):
+            raise ValueError(f"{self} has no shift on {date}.")
+        shift = self.occurrence(date)
+        shift.save()
+        self.exception_dates = sorted({*self.exception_dates, date.isoformat()})
+        self.save(update_fields=["exception_dates"])
+        return shift
 
     def __str__(self):
-        tz = pytz.timezone("America/New_York")
-        return f"{self.associated_person} in {self.location} at {self.start.astimezone(tz)} for {self.kind} Session"
+        every = "week" if self.every_weeks == 1 else f"{self.every_weeks} weeks"
+        return (
+            f"{self.associated_person} in {self.location} every {every} on {self.first_date:%A}s at "
+            f"{self.start_time:%H:%M} from {self.first_date} to {self.last_date} for {self.kind} Sessions"
+        )
 
 
 class ShiftChangeRequest(models.Model):
@@ -164,20 +542,97 @@ class ShiftChangeRequest(models.Model):
 
     class Meta:
         ordering = ['new_start']
+        # For the change request queues, which are paginated on (new_start, id). SQLite can't search an index for a
+        # boolean, so the queues of drop requests and of other requests get partial indexes of their own.
+        indexes = [
+            models.Index(fields=["state", "new_start", "id"], name="scr_state_idx"),
+            models.Index(
+                fields=["state", "new_start", "id"], condition=models.Q(is_drop_request=False), name="scr_change_idx"
+            ),
+            models.Index(
+                fields=["state", "new_start", "id"], condition=models.Q(is_drop_request=True), name="scr_drop_idx"
+            ),
+        ]
+
+
+class HardwareQuerySet(models.QuerySet):
+    def with_availability(self, at: Optional[datetime.datetime] = None) -> "HardwareQuerySet":
+        """
+        Annotates each item with is_available: whether it isn't out on a loan at the given time (by default, now).
+        """
+
+        return self.annotate(is_available=~Exists(Loan.objects.out(at, target=OuterRef("pk"))))
+
+    def available_between(
+        self, start: datetime.datetime, end: Optional[datetime.datetime] = None
+    ) -> "HardwareQuerySet":
+        """
+        The items that aren't on loan at any time from start to end (or on and on, without end).
+        """
+
+        return self.filter(~Exists(Loan.objects.overlapping(start, end, target=OuterRef("pk"))))
 
 
 class Hardware(models.Model):
     class Meta:
         verbose_name_plural = "hardware"
+        indexes = [
+            models.Index(fields=["name"], name="hardware_name_idx"),
+            # For main.autocomplete.
+            models.Index(Lower("name"), name="hardware_name_lower_idx"),
+        ]
+
+    objects = HardwareQuerySet.as_manager()
 
     name = models.CharField(max_length=200)
-    is_available = models.BooleanField(default=True)
 
     def __str__(self):
         return self.name
 
 
+class LoanQuerySet(models.QuerySet):
+    def unreturned(self, at: Optional[datetime.datetime] = None, target: Optional[object] = None) -> "LoanQuerySet":
+        """
+        Loans that haven't been returned at the given time (by default, now), including ones that haven't started.
+
+        Loans of a single item should be found by passing it (or an OuterRef to it) as target rather than by filtering
+        afterwards: it's repeated on both sides of the OR, so that each side can search loan_target_idx.
+        """
+
+        within = {} if target is None else {"target": target}
+        return self.filter(Q(return_time__isnull=True, **within) | Q(return_time__gt=at or timezone.now(), **within))
+
+    def out(self, at: Optional[datetime.datetime] = None, target: Optional[object] = None) -> "LoanQuerySet":
+        """
+        Loans that have started but haven't been returned at the given time (by default, now).
+        """
+
+        at = at or timezone.now()
+        return self.unreturned(at, target).filter(start_time__lte=at)
+
+    def overlapping(
+        self, start: datetime.datetime, end: Optional[datetime.datetime] = None, target: Optional[object] = None
+    ) -> "LoanQuerySet":
+        """
+        Loans that overlap the time from start to end (or on and on, without end): the ones that haven't been returned
+        by start, and that start before end. A loan without a return time goes on and on.
+        """
+
+        loans = self.unreturned(start, target)
+        return loans if end is None else loans.filter(start_time__lt=end)
+
+
 class Loan(models.Model):
+    class Meta:
+        indexes = [
+            # Finds the loans of an item that haven't been returned by some time, and checks when they start without
+            # reading the table.
+            models.Index(fields=["target", "return_time", "start_time"], name="loan_target_idx"),
+            models.Index(fields=["return_time", "id"], name="loan_return_time_idx"),
+        ]
+
+    objects = LoanQuerySet.as_manager()
+
     target = models.ForeignKey(
         to=Hardware,
         related_name="intended_hardware_to_borrow",
@@ -201,3 +656,80 @@ class Loan(models.Model):
         default=None,
         help_text="DD/MM/YYYY HH:MM",
     )
+
+    def clean(self) -> None:
+        # An item can only be on one loan at a time. ModelForms (including the admin's) call this when they're
+        # validated.
+        if self.start_time is None:
+            return
+        if self.return_time is not None and self.return_time <= self.start_time:
+            raise ValidationError({"return_time": "A loan has to be returned after it starts."})
+        if self.target_id is None:
+            return
+        conflicts = Loan.objects.overlapping(self.start_time, self.return_time, target=self.target_id)
+        if self.pk is not None:
+            conflicts = conflicts.exclude(pk=self.pk)
+        conflict = conflicts.order_by("start_time").first()
+        if conflict is not None:
+            until = (
+                f"until {timezone.localtime(conflict.return_time):%d/%m/%Y %H:%M}"
+                if conflict.return_time is not None
+                else "until it's returned"
+            )
+            start = timezone.localtime(conflict.start_time)
+            raise ValidationError(f"{self.target} is already on loan from {start:%d/%m/%Y %H:%M} {until}.")
+
+
+class Job(models.Model):
+    """
+    A long-running operation (e.g. a bulk shift edit) queued to be run by the runjobs management command instead of
+    inside the request that asked for it.
+    """
+
+    kind = models.CharField(max_length=32, help_text="Which handler in jobs.py runs this job.")
+
+    payload = models.JSONField(default=dict, blank=True, help_text="Arguments for the job's handler.")
+
+    state = models.CharField(
+        max_length=16,
+        choices=(("Queued", "Queued"), ("Running", "Running"), ("Succeeded", "Succeeded"), ("Failed", "Failed")),
+        default="Queued",
+    )
+
+    progress = models.PositiveIntegerField(default=0, help_text="How many units of work are done.")
+
+    total = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        default=None,
+        help_text="How many units of work there are in total, if known.",
+    )
+
+    result = models.TextField(blank=True, default="", help_text="A summary of what the job did, or why it failed.")
+
+    created_by = models.ForeignKey(
+        to=LRCDatabaseUser,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        default=None,
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    started_at = models.DateTimeField(blank=True, null=True, default=None)
+
+    heartbeat_at = models.DateTimeField(
+        blank=True, null=True, default=None, help_text="When the job last started or reported progress."
+    )
+
+    finished_at = models.DateTimeField(blank=True, null=True, default=None)
+
+    class Meta:
+        indexes = [models.Index(fields=["state", "id"], name="job_state_idx")]
+
+    def is_finished(self) -> bool:
+        return self.state in ("Succeeded", "Failed")
+
+    def __str__(self):
+        return f"{self.kind} job #{self.id} ({self.state})"
@@ -0,0 +1,99 @@
+"""
+Keyset pagination for lists that grow without bound.
+
+Rather than counting rows and skipping to an OFFSET, which reads every row before the page, a page starts right after
+the last row of the previous one: the next page's cursor holds that row's values of the ordering fields. With an index
+on those fields (after any equality filters), fetching a page reads only that page's rows, however deep it is.
+
+The last ordering field has to be unique, like "id", so that the rows have a total order. Nulls sort first in
+ascending order and last in descending order, which is how SQLite sorts them anyway.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+from dataclasses import dataclass
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
+
+from django.core.exceptions import BadRequest, ValidationError
+from django.db.models import F, Model, OrderBy, Q, QuerySet
+
+T = TypeVar("T", bound=Model)
+
+PAGE_SIZE = 50
+
+
+@dataclass
+class KeysetPage(Generic[T]):
+    items: List[T]
+    # For the query string of the next page, or None if this is the last page.
+    next_cursor: Optional[str]
+    is_first: bool
+
+
+def _encode_value(value: Any) -> Any:
+    # Not DjangoJSONEncoder, which rounds times to milliseconds.
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Can't put {value!r} in a page cursor.")
+
+
+def _encode_cursor(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, default=_encode_value).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(model: type, fields: Sequence[str], cursor: str) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        return [model._meta.get_field(field.lstrip("-")).to_python(value) for field, value in zip(fields, values)]
+    except (binascii.Error, TypeError, ValueError, ValidationError):
+        raise BadRequest("Invalid page cursor.")
+
+
+def _after(model: type, fields: Sequence[str], values: Sequence[Any]) -> Q:
+    """
+    Matches the rows that sort after values. The first field is bounded on its own, so that an index on the fields can
+    start there rather than at the beginning.
+    """
+
+    name, value = fields[0].lstrip("-"), values[0]
+    descending = fields[0].startswith("-")
+    after = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+    if len(fields) == 1:
+        return after
+    tied = _after(model, fields[1:], values[1:])
+    nullable = model._meta.get_field(name).null
+    if value is None:
+        tied &= Q(**{f"{name}__isnull": True})
+        return tied if descending else Q(**{f"{name}__isnull": False}) | tied
+    bounded = Q(**{f"{name}__{'lte' if descending else 'gte'}": value}) & (after | tied)
+    return (bounded | Q(**{f"{name}__isnull": True})) if descending and nullable else bounded
+
+
+def _order_by(field: str) -> OrderBy:
+    if field.startswith("-"):
+        return F(field[1:]).desc(nulls_last=True)
+    return F(field).asc(nulls_first=True)
+
+
+def keyset_paginate(
+    queryset: QuerySet[T], fields: Sequence[str], cursor: Optional[str], page_size: int = PAGE_SIZE
+) -> KeysetPage[T]:
+    """
+    Returns the page of queryset, ordered by fields, that starts after cursor, or the first page if cursor is empty.
+    Like in order_by(), a field that starts with "-" is in descending order.
+    """
+
+    model = queryset.model
+    queryset = queryset.order_by(*map(_order_by, fields))
+    if cursor:
+        queryset = queryset.filter(_after(model, fields, _decode_cursor(model, fields, cursor)))
+    items = list(queryset[: page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        del items[page_size:]
+        next_cursor = _encode_cursor([getattr(items[-1], field.lstrip("-")) for field in fields])
+    return KeysetPage(items, next_cursor, is_first=not cursor)
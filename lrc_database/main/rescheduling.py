@@ -0,0 +1,95 @@
+"""
+Moves, swaps and drops all of the shifts on a day at once.
+
+New start times are computed in local time, so a shift keeps its wall-clock time when it's moved across a DST change,
+and each operation is applied in one transaction with bulk statements rather than one save() per shift. Moves and swaps
+that would double-book anyone or anywhere raise main.double_booking.DoubleBookingError before they write anything.
+
+Occurrences of shift series on the days being moved are materialized first, so that they move with the rest, and ones
+being dropped are skipped by their series.
+"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import double_booking
+from .event_feeds import feeds_invalidated_together
+from .models import Shift, ShiftSeries
+
+
+@dataclass(frozen=True)
+class RescheduleResult:
+    moved: int = 0
+    dropped: int = 0
+
+
+def moved_to_date(start: datetime.datetime, date: datetime.date) -> datetime.datetime:
+    """
+    Returns the time on the given date with the same local wall-clock time as start.
+    """
+
+    return timezone.make_aware(datetime.datetime.combine(date, timezone.localtime(start).time()))
+
+
+def _plan_move(shifts: Iterable[Shift], to_date: datetime.date) -> List[Shift]:
+    planned = []
+    for shift in shifts:
+        shift.start = moved_to_date(shift.start, to_date)
+        planned.append(shift)
+    return planned
+
+
+def shifts_on(date: datetime.date) -> List[Shift]:
+    """
+    The shifts on the given date with their people, followed by the occurrences of shift series on it, unsaved.
+    """
+
+    shifts = list(Shift.all_on_date(date).select_related("associated_person"))
+    series = ShiftSeries.objects.select_related("associated_person").occurring_on(date)
+    return shifts + [one.occurrence(date) for one in series]
+
+
+def _shifts_on(date: datetime.date) -> List[Shift]:
+    ShiftSeries.objects.materialize_on(date)
+    return list(Shift.all_on_date(date).only("id", "associated_person_id", "start", "duration", "location", "kind"))
+
+
+def move_shifts(from_date: datetime.date, to_date: datetime.date) -> RescheduleResult:
+    with transaction.atomic():
+        planned = _plan_move(_shifts_on(from_date), to_date)
+        # A day's shifts keep their times relative to each other, so only the rest of the schedule is checked.
+        double_booking.check(planned, with_each_other=False)
+        Shift.objects.bulk_update(planned, ["start"])
+    return RescheduleResult(moved=len(planned))
+
+
+def swap_shift_dates(first_date: datetime.date, second_date: datetime.date) -> RescheduleResult:
+    with transaction.atomic():
+        # Both days are read before either is written, so shifts moved onto a day aren't moved back.
+        first_date_shifts = _shifts_on(first_date)
+        second_date_shifts = _shifts_on(second_date)
+        planned = _plan_move(first_date_shifts, second_date) + _plan_move(second_date_shifts, first_date)
+        double_booking.check(planned, with_each_other=False)
+        Shift.objects.bulk_update(planned, ["start"])
+    return RescheduleResult(moved=len(planned))
+
+
+def drop_shifts(
+    shift_ids: Iterable[int], series_ids: Iterable[int] = (), date: Optional[datetime.date] = None
+) -> RescheduleResult:
+    """
+    Deletes the given shifts, and makes the given series skip date.
+    """
+
+    with transaction.atomic():
+        with feeds_invalidated_together():
+            _, deleted_per_model = Shift.objects.filter(id__in=list(shift_ids)).delete()
+        skipped = []
+        if date is not None:
+            skipped = [one for one in ShiftSeries.objects.filter(id__in=list(series_ids)) if one.occurs_on(date)]
+            ShiftSeries.objects.skip(skipped, date)
+    return RescheduleResult(dropped=deleted_per_model.get(Shift._meta.label, 0) + len(skipped))
@@ -0,0 +1,48 @@
+"""
+Resolution of the groups ("roles") that a user belongs to.
+
+Group membership is checked many times per page (view decorators, the navbar, alert counts, ...), so rather than asking
+the database every time, a user's group names are loaded once and then remembered: on the user object for the rest of
+the request, and in the cache across requests. The cached entry is dropped by the receivers in signals.py whenever the
+user's groups change.
+"""
+
+from typing import FrozenSet, Iterable
+
+from django.core.cache import cache
+
+PRIVILEGED_GROUPS = ("Office staff", "Supervisors")
+
+# Entries are invalidated by signals, so this only bounds how stale another worker's cache can get if it doesn't share
+# the cache with the worker that made the change.
+ROLE_CACHE_TIMEOUT = 5 * 60
+
+
+def _cache_key(user_id: int) -> str:
+    return f"roles:user:{user_id}"
+
+
+def group_names(user) -> FrozenSet[str]:
+    """
+    Returns the names of all groups the user is in. Anonymous users are in no groups.
+    """
+
+    if not user.is_authenticated:
+        return frozenset()
+    names = getattr(user, "_group_names", None)
+    if names is None:
+        key = _cache_key(user.pk)
+        names = cache.get(key)
+        if names is None:
+            names = frozenset(user.groups.values_list("name", flat=True))
+            cache.set(key, names, ROLE_CACHE_TIMEOUT)
+        user._group_names = names
+    return names
+
+
+def is_in_groups(user, *groups: str) -> bool:
+    return not group_names(user).isdisjoint(groups)
+
+
+def forget_group_names(user_ids: Iterable[int]) -> None:
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
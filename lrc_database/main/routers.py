@@ -0,0 +1,71 @@
+"""
+Sends the queries of views that only read to a separate, read-only database connection.
+
+SQLite in WAL mode lets any number of readers work alongside a writer, but only on separate connections. Views
+decorated with @read_only_database run their reads on the "read_only" alias (when it's configured), so that pages like
+the schedule and the event feeds don't wait on, or hold up, the connection that's writing.
+"""
+
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, StreamingHttpResponse
+
+READ_ONLY = "read_only"
+
+T = TypeVar("T")
+
+_reading_only: ContextVar[bool] = ContextVar("reading_only", default=False)
+
+
+def _stream_read_only(content: Iterable[T]) -> Iterator[T]:
+    # Streamed responses run their queries while they're being sent, after the view has returned.
+    iterator = iter(content)
+    while True:
+        token = _reading_only.set(True)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _reading_only.reset(token)
+        yield chunk
+
+
+def read_only_database(view: Callable[..., HttpResponse]) -> Callable[..., HttpResponse]:
+    @wraps(view)
+    def _wrapped_view(*args, **kwargs) -> HttpResponse:
+        token = _reading_only.set(True)
+        try:
+            response = view(*args, **kwargs)
+        finally:
+            _reading_only.reset(token)
+        if isinstance(response, StreamingHttpResponse):
+            response.streaming_content = _stream_read_only(response.streaming_content)
+        return response
+
+    return _wrapped_view
+
+
+class ReadOnlyRouter:
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        if not _reading_only.get() or READ_ONLY not in settings.DATABASES:
+            return None
+        # Inside a transaction, reads have to see the transaction's own writes. (In tests, everything is inside a
+        # transaction.)
+        if connections["default"].in_atomic_block:
+            return None
+        return READ_ONLY
+
+    def db_for_write(self, model, **hints) -> Optional[str]:
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        # Both aliases are the same database.
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, model_name: Optional[str] = None, **hints) -> Optional[bool]:
+        return db != READ_ONLY
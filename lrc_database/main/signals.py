@@ -0,0 +1,159 @@
+"""
+Signal receivers that keep cached data in sync with the database. They're connected in MainConfig.ready().
+"""
+
+from typing import Union
+
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .alerts import adjust_alert_counts, alert_buckets, invalidate_alert_counts
+from .event_feeds import invalidate_all_feeds, invalidate_feeds_of_people
+from .models import Course, LRCDatabaseUser, Shift, ShiftChangeRequest, ShiftSeries, shifts_bulk_changed
+from .roles import forget_group_names
+from .weekly_schedule import invalidate_weekly_schedules
+
+
+@receiver(m2m_changed, sender=LRCDatabaseUser.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs) -> None:
+    if not reverse:
+        # instance is a user.
+        if action in ("post_add", "post_remove", "post_clear"):
+            forget_group_names((instance.pk,))
+            instance.__dict__.pop("_group_names", None)
+    else:
+        # instance is a group, and pk_set contains user IDs. When a group is cleared pk_set isn't provided, so the
+        # members have to be looked up before they're removed.
+        if action in ("post_add", "post_remove"):
+            forget_group_names(pk_set)
+        elif action == "pre_clear":
+            forget_group_names(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance: Group, **kwargs) -> None:
+    forget_group_names(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=LRCDatabaseUser)
+@receiver(post_delete, sender=LRCDatabaseUser)
+def user_created_or_deleted(sender, instance: LRCDatabaseUser, **kwargs) -> None:
+    # IDs can be reused after a delete (or a rolled-back transaction), so make sure a new user never inherits cached
+    # roles.
+    if kwargs.get("created", True):
+        forget_group_names((instance.pk,))
+
+
+def _current_alert_buckets(change_request: ShiftChangeRequest):
+    shift_kind = change_request.shift_to_update.kind if change_request.shift_to_update_id else None
+    return alert_buckets(change_request.state, change_request.is_drop_request, change_request.new_kind, shift_kind)
+
+
+@receiver(pre_save, sender=ShiftChangeRequest)
+def change_request_before_save(sender, instance: ShiftChangeRequest, **kwargs) -> None:
+    previous = None
+    if instance.pk is not None:
+        previous = (
+            ShiftChangeRequest.objects.filter(pk=instance.pk)
+            .values("state", "is_drop_request", "new_kind", "shift_to_update__kind")
+            .first()
+        )
+    if previous is None:
+        instance._alert_buckets_before = frozenset()
+    else:
+        instance._alert_buckets_before = alert_buckets(
+            previous["state"], previous["is_drop_request"], previous["new_kind"], previous["shift_to_update__kind"]
+        )
+
+
+@receiver(post_save, sender=ShiftChangeRequest)
+def change_request_saved(sender, instance: ShiftChangeRequest, **kwargs) -> None:
+    adjust_alert_counts(instance.__dict__.pop("_alert_buckets_before", frozenset()), _current_alert_buckets(instance))
+
+
+@receiver(pre_delete, sender=ShiftChangeRequest)
+def change_request_before_delete(sender, instance: ShiftChangeRequest, **kwargs) -> None:
+    # When a shift is deleted its change requests are deleted with it, so the shift has to be looked at while it still
+    # exists. Only new requests are counted, though, and loading the shift of every one of them would cost a query per
+    # request when many shifts are deleted at once; then the counts are simply recomputed.
+    if instance.state != "New":
+        instance._alert_buckets_before = frozenset()
+    elif instance.shift_to_update_id is None or ShiftChangeRequest.shift_to_update.is_cached(instance):
+        instance._alert_buckets_before = _current_alert_buckets(instance)
+    else:
+        instance._alert_buckets_before = None
+
+
+@receiver(post_delete, sender=ShiftChangeRequest)
+def change_request_deleted(sender, instance: ShiftChangeRequest, **kwargs) -> None:
+    before = instance.__dict__.pop("_alert_buckets_before", frozenset())
+    if before is None:
+        invalidate_alert_counts()
+    else:
+        adjust_alert_counts(before, frozenset())
+
+
+@receiver(post_save, sender=Shift)
+def shift_saved_alerts(sender, instance: Shift, created: bool, **kwargs) -> None:
+    # A new request counts towards the kind of the shift it changes, so changing a shift's kind can move its requests
+    # between buckets.
+    if not created and instance.shift_change_request_target.filter(state="New").exists():
+        invalidate_alert_counts()
+
+
+@receiver(post_save, sender=Shift)
+@receiver(post_delete, sender=Shift)
+@receiver(shifts_bulk_changed, sender=Shift)
+@receiver(post_save, sender=ShiftSeries)
+@receiver(post_delete, sender=ShiftSeries)
+@receiver(shifts_bulk_changed, sender=ShiftSeries)
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def schedule_data_changed(sender, **kwargs) -> None:
+    invalidate_weekly_schedules()
+
+
+@receiver(post_save, sender=LRCDatabaseUser)
+def user_saved_schedule(sender, instance: LRCDatabaseUser, update_fields, **kwargs) -> None:
+    # Logging in saves last_login, which isn't on the schedule.
+    if update_fields is None or set(update_fields) != {"last_login"}:
+        invalidate_weekly_schedules()
+
+
+@receiver(m2m_changed, sender=LRCDatabaseUser.courses_tutored.through)
+def courses_tutored_changed(sender, action, **kwargs) -> None:
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_weekly_schedules()
+
+
+@receiver(post_save, sender=Shift)
+@receiver(post_delete, sender=Shift)
+@receiver(post_save, sender=ShiftSeries)
+@receiver(post_delete, sender=ShiftSeries)
+def shift_changed_feeds(sender, instance: Union[Shift, ShiftSeries], **kwargs) -> None:
+    person_ids = {instance.associated_person_id, getattr(instance, "_loaded_associated_person_id", None)}
+    person_ids.discard(None)
+    instance._loaded_associated_person_id = instance.associated_person_id
+    invalidate_feeds_of_people(person_ids)
+
+
+@receiver(shifts_bulk_changed, sender=Shift)
+@receiver(shifts_bulk_changed, sender=ShiftSeries)
+@receiver(post_delete, sender=Course)
+def many_feeds_changed(sender, **kwargs) -> None:
+    invalidate_all_feeds()
+
+
+@receiver(post_save, sender=LRCDatabaseUser)
+def user_saved_feeds(sender, instance: LRCDatabaseUser, update_fields, **kwargs) -> None:
+    # Event titles include people's names, and course feeds depend on people's SI courses.
+    if update_fields is None or set(update_fields) != {"last_login"}:
+        invalidate_all_feeds()
+
+
+@receiver(m2m_changed, sender=LRCDatabaseUser.courses_tutored.through)
+def courses_tutored_changed_feeds(sender, action, **kwargs) -> None:
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_all_feeds()
@@ -0,0 +1,46 @@
+// Adds a search box above every <select data-autocomplete-url> (see main/autocomplete.py). The select starts out with
+// only its selected options; typing in the box replaces the others with the matches that the URL returns.
+document.addEventListener('DOMContentLoaded', function () {
+  document.querySelectorAll('select[data-autocomplete-url]').forEach(function (select) {
+    let search = document.createElement('input');
+    search.type = 'search';
+    search.className = 'form-control mb-1';
+    search.placeholder = 'Type to search';
+    search.setAttribute('aria-label', 'Search');
+    select.parentNode.insertBefore(search, select);
+
+    let timer = null;
+    search.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        load(search.value.trim());
+      }, 250);
+    });
+
+    function load(term) {
+      if (!term) {
+        return;
+      }
+      fetch(select.dataset.autocompleteUrl + '?q=' + encodeURIComponent(term))
+        .then((response) => response.json())
+        .then(function (data) {
+          if (search.value.trim() !== term) {
+            // Another search has started since.
+            return;
+          }
+          // Keep the selected options and the empty one, and replace the rest.
+          Array.from(select.options).forEach(function (option) {
+            if (!option.selected && option.value !== '') {
+              option.remove();
+            }
+          });
+          let present = new Set(Array.from(select.options).map((option) => option.value));
+          data.results.forEach(function (result) {
+            if (!present.has(String(result.id))) {
+              select.add(new Option(result.text, result.id));
+            }
+          });
+        });
+    }
+  });
+});
@@ -2,13 +2,14 @@ from typing import Any
 
 from django import template
 
+from .. import roles
 from ..models import LRCDatabaseUser
 
 register = template.Library()
 
 
 def is_in_groups(user: LRCDatabaseUser, *groups: str) -> bool:
-    return user.is_authenticated and user.groups.filter(name__in=groups).exists()
+    return roles.is_in_groups(user, *groups)
 
 
 @register.filter
@@ -41,7 +42,7 @@ def is_privileged(user: LRCDatabaseUser) -> bool:
     This should probably be renamed at some point.
     """
 
-    return is_in_groups(user, "Office staff", "Supervisors")
+    return is_in_groups(user, *roles.PRIVILEGED_GROUPS)
 
 
 # TODO: Move from this file
@@ -0,0 +1,17 @@
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+from django.test import override_settings
+
+
+@contextmanager
+def shared_cache() -> Iterator[None]:
+    """
+    Replaces the default LocMemCache with a file-based cache, like the one processes share in production.
+    """
+
+    with tempfile.TemporaryDirectory() as cache_dir, override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": cache_dir}}
+    ):
+        yield
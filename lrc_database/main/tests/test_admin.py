@@ -0,0 +1,27 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import LRCDatabaseUser
+
+
+class UserAdminSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.admin = LRCDatabaseUser.objects.create_superuser(username="admin", email="admin@example.edu")
+        LRCDatabaseUser.objects.create_user(
+            username="jdoe", first_name="Jane", last_name="Doe", email="Jane@Example.edu"
+        )
+        LRCDatabaseUser.objects.create_user(username="jsmith", first_name="John", last_name="Smith")
+
+    def search(self, term: str) -> list:
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("admin:main_lrcdatabaseuser_changelist"), {"q": term})
+        return sorted(user.username for user in response.context["cl"].result_list)
+
+    def test_searches_names_and_emails_ignoring_case(self) -> None:
+        self.assertEqual(self.search("JD"), ["jdoe"])
+        self.assertEqual(self.search("jane"), ["jdoe"])
+        self.assertEqual(self.search("smi"), ["jsmith"])
+        self.assertEqual(self.search("jane@example"), ["jdoe"])
+        self.assertEqual(self.search("j"), ["jdoe", "jsmith"])
+        self.assertEqual(self.search("doe jane"), [])
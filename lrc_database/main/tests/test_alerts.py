@@ -0,0 +1,56 @@
+import datetime
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..alerts import compute_alert_counts, get_alert_counts
+from ..models import LRCDatabaseUser, Shift, ShiftChangeRequest
+
+
+class AlertCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.jane = LRCDatabaseUser.objects.create_user(username="jane")
+        cls.shifts = Shift.objects.bulk_create(
+            Shift(
+                associated_person=cls.jane,
+                start=timezone.now() + datetime.timedelta(days=day),
+                duration=datetime.timedelta(hours=1),
+                location="GSMN 64",
+                kind="SI",
+            )
+            for day in range(1, 4)
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def drop_request(self, shift: Shift) -> ShiftChangeRequest:
+        return ShiftChangeRequest.objects.create(
+            shift_to_update=shift, reason="Sick", state="New", is_drop_request=True
+        )
+
+    def test_counts_change_when_requests_commit(self) -> None:
+        self.assertEqual(get_alert_counts()["pending_si_drop_count"], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            request = self.drop_request(self.shifts[0])
+            self.assertEqual(get_alert_counts()["pending_si_drop_count"], 0)
+        self.assertEqual(get_alert_counts()["pending_si_drop_count"], 1)
+
+        request.state = "Approved"
+        with self.captureOnCommitCallbacks(execute=True):
+            request.save()
+        self.assertEqual(get_alert_counts(), compute_alert_counts())
+
+    def test_deleting_shifts_doesnt_load_each_requests_shift(self) -> None:
+        for shift in self.shifts:
+            self.drop_request(shift)
+        get_alert_counts()
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            Shift.objects.filter(pk__in=[shift.pk for shift in self.shifts]).delete()
+        shift_lookups = [query for query in queries if query["sql"].startswith('SELECT "main_shift"')]
+        self.assertEqual(len(shift_lookups), 1)
+        self.assertEqual(get_alert_counts()["pending_si_drop_count"], 0)
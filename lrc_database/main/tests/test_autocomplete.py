@@ -0,0 +1,59 @@
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from ..autocomplete import search, search_courses, search_hardware, search_users
+from ..forms import NewLoanForm, NewShiftForm
+from ..models import Course, Hardware, LRCDatabaseUser
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.jane = LRCDatabaseUser.objects.create_user(username="jdoe", first_name="Jane", last_name="Doe")
+        cls.john = LRCDatabaseUser.objects.create_user(username="jsmith", first_name="John", last_name="Smith")
+        cls.compsci = Course.objects.create(department="COMPSCI", number="189C", name="Data Structures")
+        cls.math = Course.objects.create(department="MATH", number="131", name="Calculus I")
+        cls.laptop = Hardware.objects.create(name="Laptop 1")
+        cls.supervisor = LRCDatabaseUser.objects.create_user(username="supervisor")
+        cls.supervisor.groups.add(Group.objects.create(name="Supervisors"))
+
+    def texts(self, kind: str, term: str):
+        return [result["text"] for result in search(kind, term)]
+
+    def test_matches_prefixes_ignoring_case(self) -> None:
+        self.assertEqual(self.texts("users", "JS"), ["John Smith"])
+        self.assertEqual(self.texts("users", "do"), ["Jane Doe"])
+        self.assertEqual(self.texts("users", "jane d"), ["Jane Doe"])
+        self.assertEqual(self.texts("users", "oe"), [])
+        self.assertEqual(self.texts("courses", "compsci 18"), [str(self.compsci)])
+        self.assertEqual(self.texts("courses", "calc"), [str(self.math)])
+        self.assertEqual(self.texts("courses", "ma"), [str(self.math)])
+        self.assertEqual(self.texts("hardware", "lap"), ["Laptop 1"])
+        self.assertEqual(search("users", "  "), [])
+
+    def test_searches_use_indexes(self) -> None:
+        for queryset in (search_users("j"), search_courses("compsci 1"), search_courses("c"), search_hardware("l")):
+            with connection.cursor() as cursor:
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = " ".join(row[-1] for row in cursor.fetchall())
+            self.assertNotIn("SCAN", plan.replace("SCAN CONSTANT ROW", ""), plan)
+
+    def test_widgets_render_only_selected_choices(self) -> None:
+        html = str(NewShiftForm(initial={"associated_person": self.jane.id})["associated_person"])
+        self.assertIn("Jane Doe", html)
+        self.assertNotIn("John Smith", html)
+        self.assertIn(reverse("autocomplete", args=("users",)), html)
+        self.assertNotIn("Laptop 1", str(NewLoanForm()["target"]))
+
+    def test_view(self) -> None:
+        url = reverse("autocomplete", args=("users",))
+        self.client.force_login(self.jane)
+        self.assertEqual(self.client.get(url, {"q": "j"}).status_code, 403)
+        self.client.force_login(self.supervisor)
+        self.assertEqual(
+            self.client.get(url, {"q": "jane"}).json(), {"results": [{"id": self.jane.id, "text": "Jane Doe"}]}
+        )
+        self.assertEqual(self.client.get(reverse("autocomplete", args=("shifts",))).status_code, 404)
@@ -0,0 +1,229 @@
+"""
+Benchmarks for the views that get slow as the database grows.
+
+Each benchmark loads a synthetic semester (see the generatedata command), requests a view through the test client with
+an empty cache, and records how long it took and how many SQL queries it ran. A benchmark fails when either goes over
+the view's budget, so a change that adds an N+1 query shows up as a failing test. Timings depend on the machine, so
+they're only checked when LRC_DATABASE_BENCHMARK_TIMES is set (as `make benchmark` does), to catch unindexed scans.
+
+The budgets are calibrated for the default data set. Set LRC_DATABASE_BENCHMARK_USERS to benchmark against more data,
+and LRC_DATABASE_BENCHMARK_REPORT to a file path to write every measurement there as JSON.
+"""
+
+import datetime
+import io
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..calendar_feeds import feed_token
+from ..jobs import run_pending_jobs
+from ..models import Course, LRCDatabaseUser, Shift
+from . import shared_cache
+
+BENCHMARK_USERS = int(os.environ.get("LRC_DATABASE_BENCHMARK_USERS", "300"))
+
+BENCHMARK_REPORT = os.environ.get("LRC_DATABASE_BENCHMARK_REPORT")
+
+CHECK_TIMES = bool(os.environ.get("LRC_DATABASE_BENCHMARK_TIMES"))
+
+BENCHMARK_SEED = 1
+
+
+@dataclass(frozen=True)
+class Budget:
+    queries: int
+    milliseconds: int
+
+
+@dataclass(frozen=True)
+class Measurement:
+    view: str
+    queries: int
+    milliseconds: float
+    budget: Budget
+
+
+# Query counts are exact for the default data set, so any extra query fails. Lower a budget whenever a view gets
+# cheaper, so that it can't quietly get expensive again. Times are several times what they take on one slow CPU.
+BUDGETS: Dict[str, Budget] = {
+    "view_schedule": Budget(queries=9, milliseconds=2000),
+    "user_event_feed": Budget(queries=7, milliseconds=250),
+    "course_event_feed": Budget(queries=6, milliseconds=250),
+    "user_calendar_feed": Budget(queries=5, milliseconds=500),
+    # Calendar apps poll their subscriptions, so an unchanged feed is answered after only looking up the subscriber.
+    "user_calendar_feed_unchanged": Budget(queries=2, milliseconds=50),
+    "course_calendar_feed": Budget(queries=5, milliseconds=500),
+    "user_profile": Budget(queries=11, milliseconds=100),
+    "view_shift_change_requests": Budget(queries=6, milliseconds=250),
+    "list_users": Budget(queries=9, milliseconds=250),
+    "show_hardware": Budget(queries=6, milliseconds=250),
+    "show_loans": Budget(queries=7, milliseconds=250),
+    "find_available_hardware": Budget(queries=6, milliseconds=250),
+    # Dropped shifts' feeds are invalidated together, with one query for their people's courses.
+    "drop_shifts_on_date": Budget(queries=22, milliseconds=2000),
+    # Moves and swaps materialize each day's shift series occurrences with three queries, and check for double
+    # bookings with one query for shifts and one for series.
+    "move_shifts_from_date": Budget(queries=18, milliseconds=1000),
+    "swap_shift_dates": Budget(queries=23, milliseconds=1000),
+    # Forms that pick users, courses or hardware render only the selected ones.
+    "new_shift": Budget(queries=5, milliseconds=250),
+    "create_user": Budget(queries=6, milliseconds=250),
+    "add_loans": Budget(queries=5, milliseconds=250),
+    "autocomplete": Budget(queries=5, milliseconds=100),
+}
+
+
+class ViewBenchmarks(TestCase):
+    measurements: List[Measurement] = []
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        today = timezone.localdate()
+        # Put today in the middle of the semester, so that this week's schedule is full.
+        semester_start = today - datetime.timedelta(weeks=7, days=today.weekday())
+        call_command(
+            "generatedata",
+            seed=BENCHMARK_SEED,
+            users=BENCHMARK_USERS,
+            courses=max(BENCHMARK_USERS // 10, 10),
+            semester_start=semester_start,
+            series_ratio=0.1,
+            hardware=max(BENCHMARK_USERS // 10, 10),
+            stdout=io.StringIO(),
+        )
+        cls.supervisor = LRCDatabaseUser.objects.create_user(username="benchmark-supervisor", password="password")
+        cls.supervisor.groups.add(Group.objects.get(name="Supervisors"))
+        cls.tutor = LRCDatabaseUser.objects.filter(groups__name="Tutors", shift__isnull=False).first()
+        cls.course = Course.objects.filter(lrcdatabaseuser__isnull=False).first()
+        # A Wednesday, since every weekday has a different set of recurring shifts.
+        cls.busy_day = semester_start + datetime.timedelta(weeks=7, days=2)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        if BENCHMARK_REPORT:
+            with open(BENCHMARK_REPORT, "w") as f:
+                json.dump([asdict(measurement) for measurement in cls.measurements], f, indent=2)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.force_login(self.supervisor)
+        # The login itself caches roles; start every benchmark from nothing.
+        cache.clear()
+
+    def measure(self, view: str, method: str, url: str, data: Optional[dict] = None) -> HttpResponse:
+        budget = BUDGETS[view]
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(self.client, method)(url, data)
+            if isinstance(response, StreamingHttpResponse):
+                b"".join(response.streaming_content)
+            # Background jobs are part of the cost of the request that queued them.
+            run_pending_jobs()
+            milliseconds = (time.perf_counter() - started) * 1000
+        self.measurements.append(Measurement(view, len(queries), milliseconds, budget))
+
+        self.assertLess(response.status_code, 400, f"{view} failed")
+        self.assertLessEqual(len(queries), budget.queries, f"{view} ran too many queries")
+        if CHECK_TIMES:
+            self.assertLessEqual(milliseconds, budget.milliseconds, f"{view} was too slow")
+        return response
+
+    def feed_range(self) -> dict:
+        today = timezone.localdate()
+        week_start = timezone.make_aware(datetime.datetime.combine(today, datetime.time()))
+        week_start -= datetime.timedelta(days=today.weekday())
+        return {
+            "start": week_start.isoformat(),
+            "end": (week_start + datetime.timedelta(weeks=1)).isoformat(),
+        }
+
+    def test_view_schedule(self) -> None:
+        self.measure("view_schedule", "get", reverse("view_schedule", args=("Tutoring", "0")))
+
+    def test_user_event_feed(self) -> None:
+        self.measure("user_event_feed", "get", reverse("user_event_feed", args=(self.tutor.id,)), self.feed_range())
+
+    def test_course_event_feed(self) -> None:
+        self.measure(
+            "course_event_feed", "get", reverse("course_event_feed", args=(self.course.id,)), self.feed_range()
+        )
+
+    def test_user_calendar_feed(self) -> None:
+        url = reverse("user_calendar_feed", args=(self.tutor.id, feed_token(self.tutor, "user", self.tutor.id)))
+        with shared_cache():
+            etag = self.measure("user_calendar_feed", "get", url)["ETag"]
+            self.client.defaults["HTTP_IF_NONE_MATCH"] = etag
+            self.measure("user_calendar_feed_unchanged", "get", url)
+
+    def test_course_calendar_feed(self) -> None:
+        url = reverse(
+            "course_calendar_feed", args=(self.course.id, feed_token(self.supervisor, "course", self.course.id))
+        )
+        self.measure("course_calendar_feed", "get", url)
+
+    def test_user_profile(self) -> None:
+        self.measure("user_profile", "get", reverse("user_profile", args=(self.tutor.id,)))
+
+    def test_view_shift_change_requests(self) -> None:
+        self.measure("view_shift_change_requests", "get", reverse("view_shift_change_requests", args=("All", "New")))
+
+    def test_list_users(self) -> None:
+        self.measure("list_users", "get", reverse("list_users"))
+
+    def test_show_hardware(self) -> None:
+        self.measure("show_hardware", "get", reverse("showHardware"))
+
+    def test_find_available_hardware(self) -> None:
+        start = timezone.localtime() + datetime.timedelta(days=1)
+        window = {
+            "name": "laptop",
+            "start": start.strftime("%d/%m/%Y %H:%M"),
+            "end": (start + datetime.timedelta(hours=2)).strftime("%d/%m/%Y %H:%M"),
+        }
+        self.measure("find_available_hardware", "get", reverse("showHardware"), window)
+
+    def test_show_loans(self) -> None:
+        self.measure("show_loans", "get", reverse("showLoans"))
+
+    def test_drop_shifts_on_date(self) -> None:
+        url = reverse("drop_shifts_on_date_confirmation")
+        self.client.post(url, {"date": self.busy_day.strftime("%m/%d/%Y")})
+        self.measure("drop_shifts_on_date", "get", url)
+        self.assertFalse(Shift.all_on_date(self.busy_day).exists())
+
+    def test_move_shifts_from_date(self) -> None:
+        to_date = self.busy_day + datetime.timedelta(weeks=20)
+        data = {"from": self.busy_day.isoformat(), "to": to_date.isoformat()}
+        self.measure("move_shifts_from_date", "get", reverse("move_shifts_from_date_confirmation"), data)
+        self.assertFalse(Shift.all_on_date(self.busy_day).exists())
+
+    def test_swap_shift_dates(self) -> None:
+        data = {"first": self.busy_day.isoformat(), "second": (self.busy_day + datetime.timedelta(days=1)).isoformat()}
+        self.measure("swap_shift_dates", "get", reverse("swap_shift_dates_confirmation"), data)
+
+    def test_new_shift(self) -> None:
+        self.measure("new_shift", "get", reverse("new_shift"))
+
+    def test_create_user(self) -> None:
+        self.measure("create_user", "get", reverse("create_user"))
+
+    def test_add_loans(self) -> None:
+        self.measure("add_loans", "get", reverse("add_loans"))
+
+    def test_autocomplete(self) -> None:
+        response = self.measure("autocomplete", "get", reverse("autocomplete", args=("users",)), {"q": "a"})
+        self.assertTrue(response.json()["results"])
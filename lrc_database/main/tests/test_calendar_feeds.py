@@ -0,0 +1,102 @@
+import datetime
+
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..calendar_feeds import feed_token
+from ..models import Course, LRCDatabaseUser, Shift, ShiftSeries
+from . import shared_cache
+
+
+class CalendarFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.course = Course.objects.create(department="MATH", number="131", name="Calculus I")
+        cls.jane = LRCDatabaseUser.objects.create_user(
+            username="jane", first_name="Jane", last_name="Doe, Jr.", si_course=cls.course
+        )
+        cls.john = LRCDatabaseUser.objects.create_user(username="john")
+        cls.supervisor = LRCDatabaseUser.objects.create_user(username="supervisor")
+        cls.supervisor.groups.add(Group.objects.create(name="Supervisors"))
+        tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+        cls.shift = Shift.objects.create(
+            associated_person=cls.jane,
+            start=timezone.make_aware(datetime.datetime.combine(tomorrow, datetime.time(10))),
+            duration=datetime.timedelta(hours=1),
+            location="GSMN 64",
+            kind="SI",
+        )
+        cls.series = ShiftSeries.objects.create(
+            associated_person=cls.jane,
+            start_time=datetime.time(14),
+            duration=datetime.timedelta(hours=1),
+            location="LGRT 123",
+            kind="SI",
+            first_date=tomorrow,
+            last_date=tomorrow + datetime.timedelta(weeks=2),
+        )
+
+    def user_feed(self, subscriber: LRCDatabaseUser, **headers):
+        token = feed_token(subscriber, "user", self.jane.id)
+        return self.client.get(reverse("user_calendar_feed", args=(self.jane.id, token)), **headers)
+
+    @staticmethod
+    def body(response) -> str:
+        return b"".join(response.streaming_content).decode()
+
+    def test_feeds_list_shifts_and_occurrences(self) -> None:
+        response = self.user_feed(self.jane)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        body = self.body(response)
+        self.assertTrue(body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n"))
+        self.assertEqual(body.count("BEGIN:VEVENT"), 4)
+        self.assertIn(f"UID:shift-{self.shift.id}@testserver\r\n", body)
+        self.assertIn(f"DTSTART:{self.shift.start.astimezone(datetime.timezone.utc):%Y%m%dT%H%M%SZ}\r\n", body)
+        self.assertIn("SUMMARY:SI Session: Jane Doe\\, Jr.\r\n", body)
+        self.assertIn(f"URL:http://testserver{reverse('view_shift', args=(self.shift.id,))}\r\n", body)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split("\r\n")))
+
+        course_feed = reverse(
+            "course_calendar_feed", args=(self.course.id, feed_token(self.john, "course", self.course.id))
+        )
+        self.assertEqual(self.body(self.client.get(course_feed)).count("BEGIN:VEVENT"), 4)
+
+    def test_course_feeds_list_each_shift_once(self) -> None:
+        for number in ("132", "233"):
+            self.jane.courses_tutored.add(Course.objects.create(department="MATH", number=number, name="Calculus"))
+        self.jane.courses_tutored.add(self.course)
+        url = reverse("course_calendar_feed", args=(self.course.id, feed_token(self.john, "course", self.course.id)))
+        self.assertEqual(self.body(self.client.get(url)).count("BEGIN:VEVENT"), 4)
+
+    def test_tokens_open_only_their_feed(self) -> None:
+        self.assertEqual(self.user_feed(self.supervisor).status_code, 200)
+        self.assertEqual(self.user_feed(self.john).status_code, 404)
+        # A supervisor's link to a course's feed doesn't open anyone's own feed.
+        course_token = feed_token(self.supervisor, "course", self.course.id)
+        self.assertEqual(
+            self.client.get(reverse("user_calendar_feed", args=(self.jane.id, course_token))).status_code, 404
+        )
+        token = feed_token(self.jane, "user", self.jane.id)
+        self.jane.set_password("new password")
+        self.jane.save()
+        self.assertEqual(self.client.get(reverse("user_calendar_feed", args=(self.jane.id, token))).status_code, 404)
+        self.assertEqual(self.client.get(reverse("user_calendar_feed", args=(self.jane.id, "1-x"))).status_code, 404)
+
+    def test_unchanged_feeds_are_not_rebuilt(self) -> None:
+        with shared_cache():
+            etag = self.user_feed(self.jane)["ETag"]
+            with self.assertNumQueries(1):
+                self.assertEqual(self.user_feed(self.jane, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.shift.location = "ILC S131"
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                self.shift.save()
+                # Until the change commits, the feed isn't rebuilt under a new ETag.
+                self.assertEqual(self.user_feed(self.jane, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertTrue(callbacks)
+            self.assertEqual(self.user_feed(self.jane, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_feeds_have_no_etags_unless_the_cache_is_shared(self) -> None:
+        # Other processes wouldn't see the versions bumped in this one's LocMemCache.
+        self.assertNotIn("ETag", self.user_feed(self.jane))
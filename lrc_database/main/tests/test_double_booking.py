@@ -0,0 +1,130 @@
+import datetime
+
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import double_booking, rescheduling
+from ..models import LRCDatabaseUser, Shift
+
+
+class DoubleBookingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.day = timezone.localdate() + datetime.timedelta(days=7)
+        cls.ten = timezone.make_aware(datetime.datetime.combine(cls.day, datetime.time(10)))
+        cls.jane = LRCDatabaseUser.objects.create_user(username="jane")
+        cls.john = LRCDatabaseUser.objects.create_user(username="john")
+        cls.janes_shift = cls.shift(cls.jane, cls.ten, "GSMN 64")
+        cls.johns_shift = cls.shift(cls.john, cls.ten, "LRC")
+        cls.supervisor = LRCDatabaseUser.objects.create_user(username="supervisor")
+        cls.supervisor.groups.add(Group.objects.create(name="Supervisors"))
+
+    @staticmethod
+    def shift(person: LRCDatabaseUser, start: datetime.datetime, location: str, save: bool = True) -> Shift:
+        shift = Shift(
+            associated_person=person, start=start, duration=datetime.timedelta(hours=1), location=location, kind="SI"
+        )
+        if save:
+            shift.save()
+        return shift
+
+    def others(self, *shifts: Shift):
+        return [booking.other for booking in double_booking.find(shifts)]
+
+    def test_finds_shifts_of_the_same_person_or_location(self) -> None:
+        half_past = self.ten + datetime.timedelta(minutes=30)
+        self.assertEqual(self.others(self.shift(self.jane, half_past, "LGRT 123", save=False)), [self.janes_shift])
+        self.assertEqual(self.others(self.shift(self.supervisor, half_past, "GSMN 64", save=False)), [self.janes_shift])
+        self.assertEqual(self.others(self.shift(self.jane, half_past, "LRC", save=False)), [self.janes_shift])
+
+    def test_allows_shared_locations_and_back_to_back_shifts(self) -> None:
+        self.assertEqual(self.others(self.shift(self.jane, self.ten, "LRC", save=False)), [self.janes_shift])
+        self.assertEqual(self.others(self.shift(self.supervisor, self.ten, "LRC", save=False)), [])
+        eleven = self.ten + datetime.timedelta(hours=1)
+        self.assertEqual(self.others(self.shift(self.jane, eleven, "GSMN 64", save=False)), [])
+        self.assertEqual(self.others(self.janes_shift), [])
+
+    def test_single_shifts_are_checked_from_the_indexes(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            double_booking.find([self.shift(self.jane, self.ten, "GSMN 64", save=False)])
+        shift_plan, series_plan = map(self.plan, queries)
+        self.assertIn("shift_person_start_idx (associated_person_id=? AND start>? AND start<?)", shift_plan)
+        self.assertIn("shift_location_start_idx (location=? AND start>? AND start<?)", shift_plan)
+        self.assertIn("series_person_idx (associated_person_id=? AND last_date>?)", series_plan)
+        self.assertIn("series_location_idx (location=? AND last_date>?)", series_plan)
+
+    @staticmethod
+    def plan(query: dict) -> str:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+            return " ".join(row[-1] for row in cursor.fetchall())
+
+    def test_batches_are_checked_with_one_query_per_table(self) -> None:
+        tomorrow = self.ten + datetime.timedelta(days=1)
+        batch = [
+            self.shift(self.jane, tomorrow, "LGRT 123", save=False),
+            self.shift(self.jane, tomorrow + datetime.timedelta(minutes=30), "LGRT 123", save=False),
+            self.shift(self.john, self.ten + datetime.timedelta(minutes=45), "GSMN 64", save=False),
+            self.shift(self.supervisor, self.ten, "LRC", save=False),
+        ]
+        with self.assertNumQueries(2):
+            bookings = double_booking.find(batch)
+        # Shifts that haven't been saved can't be hashed, so the batch's are identified by their positions.
+        self.assertEqual(
+            {(batch.index(booking.shift), booking.other.pk or -batch.index(booking.other)) for booking in bookings},
+            {(1, 0), (2, self.janes_shift.pk), (2, self.johns_shift.pk)},
+        )
+        self.assertEqual(
+            {booking.other for booking in double_booking.find(batch, with_each_other=False)},
+            {self.janes_shift, self.johns_shift},
+        )
+
+    def test_rejects_moves_that_double_book(self) -> None:
+        day_after = self.day + datetime.timedelta(days=1)
+        self.shift(self.jane, self.ten + datetime.timedelta(days=1, minutes=30), "LGRT 123")
+        with self.assertRaises(double_booking.DoubleBookingError):
+            rescheduling.move_shifts(self.day, day_after)
+        self.assertEqual(Shift.all_on_date(self.day).count(), 2)
+        # Both days' shifts move, so they don't clash with each other.
+        self.assertEqual(rescheduling.swap_shift_dates(self.day, day_after).moved, 3)
+
+    def test_new_shift_rejects_double_bookings(self) -> None:
+        self.client.force_login(self.supervisor)
+        form = {
+            "associated_person": self.jane.id,
+            "start": timezone.localtime(self.ten).strftime("%Y-%m-%d %H:%M"),
+            "duration": "01:00:00",
+            "location": "LRC",
+            "kind": "SI",
+        }
+        response = self.client.post(reverse("new_shift"), form)
+        self.assertRedirects(response, reverse("new_shift"), fetch_redirect_response=False)
+        self.assertEqual(Shift.objects.filter(associated_person=self.jane).count(), 1)
+
+    def test_the_admin_rejects_double_bookings(self) -> None:
+        admin = LRCDatabaseUser.objects.create_superuser(username="admin")
+        self.client.force_login(admin)
+        start = timezone.localtime(self.ten + datetime.timedelta(minutes=30))
+
+        def add(person: LRCDatabaseUser, location: str):
+            return self.client.post(
+                reverse("admin:main_shift_add"),
+                {
+                    "associated_person": person.id,
+                    "start_0": start.strftime("%Y-%m-%d"),
+                    "start_1": start.strftime("%H:%M:%S"),
+                    "duration": "01:00:00",
+                    "location": location,
+                    "kind": "SI",
+                },
+            )
+
+        self.assertContains(add(self.supervisor, "GSMN 64"), "overlaps another shift in GSMN 64")
+        self.assertContains(add(self.jane, "LGRT 123"), "overlaps another shift of theirs")
+        self.assertEqual(Shift.objects.count(), 2)
+        self.assertEqual(add(self.supervisor, "LGRT 123").status_code, 302)
+        self.assertEqual(Shift.objects.count(), 3)
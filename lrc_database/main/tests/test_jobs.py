@@ -0,0 +1,118 @@
+import datetime
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.signing import BadSignature
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import jobs, user_import
+from ..models import LOCAL_TIME_ZONE, Course, Job, LRCDatabaseUser, Shift
+from ..weekly_schedule import get_weekly_schedule
+
+
+class JobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.supervisor = LRCDatabaseUser.objects.create_user(username="supervisor")
+        cls.supervisor.groups.add(Group.objects.create(name="Supervisors"))
+        Group.objects.create(name="Tutors")
+
+    def test_bulk_user_creation_never_stores_passwords(self) -> None:
+        self.client.force_login(self.supervisor)
+        user_data = "jane,jane@example.edu,Jane,Doe,Tutors,correct horse\nsupervisor,s@example.edu,S,V,Tutors,battery"
+        self.client.post(reverse("create_users_in_bulk"), {"user_data": user_data})
+        job = Job.objects.get()
+        self.assertNotIn("correct horse", str(job.payload))
+        self.assertNotIn("battery", str(job.payload))
+
+        jobs.run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.payload), ("Succeeded", {}))
+        self.assertIn('Line 2: The username "supervisor" is taken.', job.result)
+        self.assertTrue(LRCDatabaseUser.objects.get(username="jane").check_password("correct horse"))
+
+    def test_passwords_are_hashed_in_the_job_in_parallel(self) -> None:
+        self.client.force_login(self.supervisor)
+        count = user_import.PARALLEL_HASHING_THRESHOLD + 1
+        user_data = "\n".join(f"user{i},user{i}@example.edu,User,{i},Tutors,password {i}" for i in range(count))
+        with mock.patch.object(user_import, "hash_passwords", wraps=user_import.hash_passwords) as hash_passwords:
+            self.client.post(reverse("create_users_in_bulk"), {"user_data": user_data})
+            hash_passwords.assert_not_called()
+            self.assertNotIn("password 0", str(Job.objects.get().payload))
+            jobs.run_pending_jobs()
+            hash_passwords.assert_called_once()
+
+        job = Job.objects.get()
+        self.assertEqual((job.state, job.progress, job.total), ("Succeeded", count, count))
+        users = LRCDatabaseUser.objects.filter(username__startswith="user").order_by("last_name")
+        self.assertEqual(len(users), count)
+        self.assertTrue(all(user.check_password(f"password {user.last_name}") for user in users))
+
+    def test_sealed_passwords_cant_be_altered(self) -> None:
+        sealed = user_import.seal_password("correct horse")
+        self.assertNotIn("correct horse", sealed)
+        self.assertEqual(user_import.unseal_password(sealed), "correct horse")
+        self.assertNotEqual(user_import.seal_password("correct horse"), sealed)
+        with self.assertRaises(BadSignature):
+            user_import.unseal_password(sealed[:-1] + ("A" if sealed[-1] != "A" else "B"))
+
+    def test_stalled_jobs_are_failed_and_can_be_requeued(self) -> None:
+        jobs.enqueue("move_shifts", {"from_date": "2030-01-07", "to_date": "2030-01-08"})
+        job = jobs.claim_next_job()
+        self.assertEqual(jobs.fail_stalled_jobs(), 0)
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - jobs.STALLED_JOB_TIMEOUT * 2)
+        self.assertEqual(jobs.fail_stalled_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.state, "Failed")
+
+        self.assertEqual(jobs.requeue([job]), 1)
+        self.assertEqual(jobs.run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.state, "Succeeded")
+        self.assertGreater(job.heartbeat_at, timezone.now() - datetime.timedelta(minutes=1))
+
+
+class WorkerCacheTests(TransactionTestCase):
+    def test_the_web_process_sees_what_a_worker_invalidated(self) -> None:
+        course = Course.objects.create(department="MATH", number="131", name="Calculus I")
+        jane = LRCDatabaseUser.objects.create_user(username="jane", si_course=course)
+        monday = datetime.date(2030, 1, 7)
+        Shift.objects.create(
+            associated_person=jane,
+            start=timezone.make_aware(datetime.datetime.combine(monday, datetime.time(10)), LOCAL_TIME_ZONE),
+            duration=datetime.timedelta(hours=1),
+            location="GSMN 64",
+            kind="SI",
+        )
+
+        with tempfile.TemporaryDirectory() as cache_dir, override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": cache_dir}
+            }
+        ):
+            days = get_weekly_schedule("SI", monday)["MATH 131"][1]
+            self.assertEqual((len(days[0]), len(days[1])), (1, 0))
+            jobs.enqueue("move_shifts", {"from_date": "2030-01-07", "to_date": "2030-01-08"})
+            # Run the job in a process of its own, the way the runjobs worker does.
+            env = os.environ | {
+                "LRC_DATABASE_PATH": connection.settings_dict["NAME"],
+                "LRC_DATABASE_CACHE_DIR": cache_dir,
+            }
+            subprocess.run(
+                [sys.executable, "manage.py", "runjobs", "--once"],
+                cwd=settings.BASE_DIR,
+                env=env,
+                check=True,
+                capture_output=True,
+            )
+            self.assertEqual(Job.objects.get().state, "Succeeded")
+            days = get_weekly_schedule("SI", monday)["MATH 131"][1]
+            self.assertEqual((len(days[0]), len(days[1])), (0, 1))
@@ -0,0 +1,139 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..autocomplete import search_hardware
+from ..forms import NewLoanForm
+from ..models import Hardware, Loan, LRCDatabaseUser
+
+
+class AvailabilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.now = timezone.now()
+        hour = datetime.timedelta(hours=1)
+        borrower = LRCDatabaseUser.objects.create_user(username="borrower")
+
+        def item(name: str, start_time: datetime.datetime, return_time) -> Hardware:
+            hardware = Hardware.objects.create(name=name)
+            Loan.objects.create(target=hardware, hardware_user=borrower, start_time=start_time, return_time=return_time)
+            return hardware
+
+        cls.unreturned = item("Unreturned", cls.now - hour, None)
+        cls.due_back = item("Due back", cls.now - hour, cls.now + hour)
+        cls.returned = item("Returned", cls.now - 2 * hour, cls.now - hour)
+        cls.reserved = item("Reserved", cls.now + hour, cls.now + 2 * hour)
+        cls.never_loaned = Hardware.objects.create(name="Never loaned")
+
+    def availability(self, at=None):
+        return {hardware.name: hardware.is_available for hardware in Hardware.objects.with_availability(at)}
+
+    def test_items_on_started_unreturned_loans_are_unavailable(self) -> None:
+        self.assertEqual(
+            self.availability(self.now),
+            {"Unreturned": False, "Due back": False, "Returned": True, "Reserved": True, "Never loaned": True},
+        )
+
+    def test_availability_at_another_time(self) -> None:
+        later = self.now + datetime.timedelta(minutes=90)
+        self.assertEqual(
+            self.availability(later),
+            {"Unreturned": False, "Due back": True, "Returned": True, "Reserved": False, "Never loaned": True},
+        )
+
+    def test_unreturned_includes_loans_that_havent_started(self) -> None:
+        self.assertEqual(
+            set(Loan.objects.unreturned(self.now).values_list("target__name", flat=True)),
+            {"Unreturned", "Due back", "Reserved"},
+        )
+        self.assertEqual(
+            set(Loan.objects.out(self.now).values_list("target__name", flat=True)), {"Unreturned", "Due back"}
+        )
+
+
+class ConflictTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.start = timezone.localtime().replace(second=0, microsecond=0) + datetime.timedelta(days=1)
+        cls.borrower = LRCDatabaseUser.objects.create_user(username="borrower")
+        cls.laptop = Hardware.objects.create(name="Laptop 1")
+        cls.spare = Hardware.objects.create(name="Laptop 2")
+        cls.calculator = Hardware.objects.create(name="Calculator")
+        cls.loan = Loan.objects.create(
+            target=cls.laptop,
+            hardware_user=cls.borrower,
+            start_time=cls.start,
+            return_time=cls.start + datetime.timedelta(hours=2),
+        )
+
+    def form(self, start_hours: float, return_hours=None, target=None, instance=None) -> NewLoanForm:
+        def at(hours: float) -> str:
+            return (self.start + datetime.timedelta(hours=hours)).strftime("%d/%m/%Y %H:%M")
+
+        data = {
+            "target": (target or self.laptop).id,
+            "hardware_user": self.borrower.id,
+            "start_time": at(start_hours),
+            "return_time": "" if return_hours is None else at(return_hours),
+        }
+        return NewLoanForm(data, instance=instance)
+
+    def test_rejects_overlapping_loans(self) -> None:
+        for start_hours, return_hours in ((1, 3), (-1, 1), (-1, 3), (0.5, 1), (-1, None), (1, None)):
+            with self.subTest(start_hours=start_hours, return_hours=return_hours):
+                form = self.form(start_hours, return_hours)
+                self.assertFalse(form.is_valid())
+                self.assertIn("Laptop 1 is already on loan", str(form.non_field_errors()))
+
+    def test_accepts_adjacent_loans_and_other_items(self) -> None:
+        self.assertTrue(self.form(2, 3).is_valid())
+        self.assertTrue(self.form(-1, 0).is_valid())
+        self.assertTrue(self.form(1, 3, target=self.spare).is_valid())
+
+    def test_a_loan_doesnt_conflict_with_itself(self) -> None:
+        self.assertTrue(self.form(0, 3, instance=self.loan).is_valid())
+
+    def test_return_time_must_be_after_start_time(self) -> None:
+        self.assertIn("return_time", self.form(3, 2, target=self.spare).errors)
+
+    def test_available_between(self) -> None:
+        def available(start_hours: float, end_hours=None):
+            end = None if end_hours is None else self.start + datetime.timedelta(hours=end_hours)
+            hardware = Hardware.objects.available_between(self.start + datetime.timedelta(hours=start_hours), end)
+            return set(hardware.values_list("name", flat=True))
+
+        self.assertEqual(available(1, 3), {"Laptop 2", "Calculator"})
+        self.assertEqual(available(2, 3), {"Laptop 1", "Laptop 2", "Calculator"})
+        self.assertEqual(available(-2, None), {"Laptop 2", "Calculator"})
+        self.assertEqual(
+            set(search_hardware("lap").available_between(self.start).values_list("name", flat=True)), {"Laptop 2"}
+        )
+
+    def test_conflicts_are_found_from_the_index(self) -> None:
+        queryset = Hardware.objects.available_between(self.start, self.start + datetime.timedelta(hours=1))
+        with connection.cursor() as cursor:
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("USING COVERING INDEX loan_target_idx (target_id=? AND return_time>?)", plan)
+        self.assertIn("USING COVERING INDEX loan_target_idx (target_id=? AND return_time=?", plan)
+
+    def test_the_admin_rejects_overlapping_loans(self) -> None:
+        admin = LRCDatabaseUser.objects.create_superuser(username="admin")
+        self.client.force_login(admin)
+        start = timezone.localtime(self.start + datetime.timedelta(hours=1))
+        response = self.client.post(
+            reverse("admin:main_loan_add"),
+            {
+                "target": self.laptop.id,
+                "hardware_user": self.borrower.id,
+                "start_time_0": start.strftime("%Y-%m-%d"),
+                "start_time_1": start.strftime("%H:%M:%S"),
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Laptop 1 is already on loan")
+        self.assertEqual(Loan.objects.count(), 1)
@@ -0,0 +1,73 @@
+import datetime
+
+from django.contrib.auth.models import Group
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Course, LRCDatabaseUser, ShiftChangeRequest
+from ..pagination import keyset_paginate
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = LRCDatabaseUser.objects.create_superuser(username="supervisor", password="password")
+        start = timezone.now().replace(microsecond=123456)
+        # Nulls, ties and distinct times, created out of order.
+        new_starts = [None, start, start + datetime.timedelta(hours=1), None, start] * 5
+        ShiftChangeRequest.objects.bulk_create(
+            ShiftChangeRequest(reason="x", state="New", new_start=new_start, new_associated_person=cls.user)
+            for new_start in new_starts
+        )
+
+    def test_pages_cover_every_row_once_in_order(self) -> None:
+        for fields, ordering in (
+            (("new_start", "id"), (F("new_start").asc(nulls_first=True), "id")),
+            (("-new_start", "-id"), (F("new_start").desc(nulls_last=True), "-id")),
+            (("-new_start", "id"), (F("new_start").desc(nulls_last=True), "id")),
+        ):
+            with self.subTest(fields=fields):
+                expected = list(ShiftChangeRequest.objects.order_by(*ordering).values_list("id", flat=True))
+                seen = []
+                cursor = None
+                while True:
+                    with self.assertNumQueries(1):
+                        page = keyset_paginate(ShiftChangeRequest.objects.all(), fields, cursor, page_size=4)
+                    self.assertEqual(page.is_first, cursor is None)
+                    seen.extend(change_request.id for change_request in page.items)
+                    cursor = page.next_cursor
+                    if cursor is None:
+                        break
+                self.assertEqual(seen, expected)
+
+    def test_queue_view(self) -> None:
+        self.client.force_login(self.user)
+        url = reverse("view_shift_change_requests", args=("All", "New"))
+        response = self.client.get(url)
+        self.assertEqual(len(response.context["change_requests"]), 25)
+        self.assertIsNone(response.context["page"].next_cursor)
+        self.assertEqual(self.client.get(url, {"after": "not a cursor"}).status_code, 400)
+
+    def test_user_directory(self) -> None:
+        tutors = Group.objects.create(name="Tutors")
+        Group.objects.create(name="SIs")
+        course = Course.objects.create(department="MATH", number="131", name="Calculus I")
+        tutor = LRCDatabaseUser.objects.create_user(username="tutor", last_name="Tutor")
+        tutor.groups.add(tutors)
+        tutor.courses_tutored.add(course)
+        LRCDatabaseUser.objects.create_user(username="si", last_name="Leader", si_course=course)
+        self.client.force_login(self.user)
+
+        def last_names(url: str, **filters) -> list:
+            response = self.client.get(url, filters)
+            self.assertEqual(response.status_code, 200)
+            return [user.last_name for user in response.context["users"]]
+
+        self.assertEqual(last_names(reverse("list_users")), ["", "Leader", "Tutor"])
+        self.assertEqual(last_names(reverse("list_users", args=("Tutors",))), ["Tutor"])
+        self.assertEqual(last_names(reverse("list_users", args=("SIs",))), [])
+        self.assertEqual(last_names(reverse("list_users"), course=course.id), ["Leader", "Tutor"])
+        self.assertEqual(last_names(reverse("list_users"), group="Tutors", course=course.id), ["Tutor"])
+        self.assertEqual(self.client.get(reverse("list_users", args=("Nobody",))).status_code, 400)
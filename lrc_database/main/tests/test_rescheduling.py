@@ -0,0 +1,55 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import rescheduling
+from ..models import LOCAL_TIME_ZONE, LRCDatabaseUser, Shift
+
+# Clocks go forward on 2030-03-10, so the 8th is on standard time and the 11th on daylight saving time.
+BEFORE_DST = datetime.date(2030, 3, 8)
+AFTER_DST = datetime.date(2030, 3, 11)
+
+
+def at(date: datetime.date, hour: int) -> datetime.datetime:
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time(hour)), LOCAL_TIME_ZONE)
+
+
+class DaylightSavingTimeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        jane = LRCDatabaseUser.objects.create_user(username="jane")
+        cls.before = Shift.objects.create(
+            associated_person=jane,
+            start=at(BEFORE_DST, 10),
+            duration=datetime.timedelta(hours=1),
+            location="GSMN 64",
+            kind="SI",
+        )
+        cls.after = Shift.objects.create(
+            associated_person=jane,
+            start=at(AFTER_DST, 14),
+            duration=datetime.timedelta(hours=1),
+            location="GSMN 64",
+            kind="SI",
+        )
+
+    def local_start(self, shift: Shift) -> datetime.datetime:
+        shift.refresh_from_db()
+        return timezone.localtime(shift.start).replace(tzinfo=None)
+
+    def test_moved_to_date_keeps_the_wall_clock_time(self) -> None:
+        moved = rescheduling.moved_to_date(at(BEFORE_DST, 10), AFTER_DST)
+        self.assertEqual(moved, at(AFTER_DST, 10))
+        # Three days of elapsed time later would be 11:00 once the clocks have gone forward.
+        elapsed = moved.astimezone(datetime.timezone.utc) - at(BEFORE_DST, 10).astimezone(datetime.timezone.utc)
+        self.assertEqual(elapsed, datetime.timedelta(days=3, hours=-1))
+
+    def test_moved_shifts_keep_their_local_times(self) -> None:
+        self.assertEqual(rescheduling.move_shifts(BEFORE_DST, AFTER_DST).moved, 1)
+        self.assertEqual(self.local_start(self.before), datetime.datetime(2030, 3, 11, 10))
+
+    def test_swapped_shifts_keep_their_local_times(self) -> None:
+        self.assertEqual(rescheduling.swap_shift_dates(BEFORE_DST, AFTER_DST).moved, 2)
+        self.assertEqual(self.local_start(self.before), datetime.datetime(2030, 3, 11, 10))
+        self.assertEqual(self.local_start(self.after), datetime.datetime(2030, 3, 8, 14))
@@ -0,0 +1,181 @@
+import datetime
+import json
+
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import double_booking, rescheduling
+from ..models import LOCAL_TIME_ZONE, Course, LRCDatabaseUser, Shift, ShiftSeries
+from ..weekly_schedule import build_weekly_schedule, get_weekly_schedule
+
+
+def at(date: datetime.date, hour: int) -> datetime.datetime:
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time(hour)), LOCAL_TIME_ZONE)
+
+
+class ShiftSeriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.course = Course.objects.create(department="MATH", number="131", name="Calculus I")
+        cls.jane = LRCDatabaseUser.objects.create_user(username="jane", si_course=cls.course)
+        cls.john = LRCDatabaseUser.objects.create_user(username="john")
+        cls.supervisor = LRCDatabaseUser.objects.create_user(username="supervisor")
+        cls.supervisor.groups.add(Group.objects.create(name="Supervisors"))
+        # Mondays, from before DST starts on March 10, 2030 to after it.
+        cls.mondays = [datetime.date(2030, 2, 25) + datetime.timedelta(weeks=week) for week in range(5)]
+        cls.series = cls.weekly(cls.jane, cls.mondays[0], cls.mondays[-1])
+
+    @staticmethod
+    def weekly(person: LRCDatabaseUser, first_date: datetime.date, last_date: datetime.date, **kwargs) -> ShiftSeries:
+        return ShiftSeries.objects.create(
+            associated_person=person,
+            start_time=datetime.time(10),
+            duration=datetime.timedelta(hours=1),
+            location="GSMN 64",
+            kind="SI",
+            first_date=first_date,
+            last_date=last_date,
+            **kwargs,
+        )
+
+    def dates(self, series: ShiftSeries) -> list:
+        return [shift.series_date for shift in series.occurrences(at(self.mondays[0], 0), at(self.mondays[-1], 23))]
+
+    def test_expands_occurrences_at_the_same_local_time(self) -> None:
+        occurrences = list(self.series.occurrences(at(datetime.date(2030, 1, 1), 0)))
+        self.assertEqual([shift.series_date for shift in occurrences], self.mondays)
+        self.assertEqual({timezone.localtime(shift.start).time() for shift in occurrences}, {datetime.time(10)})
+        elapsed = occurrences[-1].start.astimezone(datetime.timezone.utc) - occurrences[0].start
+        self.assertEqual(elapsed, datetime.timedelta(weeks=4, hours=-1))
+        self.assertTrue(all(shift.pk is None and shift.series == self.series for shift in occurrences))
+
+    def test_expands_only_the_requested_range(self) -> None:
+        occurrences = self.series.occurrences(
+            at(self.mondays[1], 10) + datetime.timedelta(minutes=30), at(self.mondays[2], 10)
+        )
+        self.assertEqual([shift.series_date for shift in occurrences], [self.mondays[1]])
+
+    def test_skips_exception_dates_and_weeks_off(self) -> None:
+        self.series.exception_dates = [self.mondays[1].isoformat()]
+        self.assertEqual(self.dates(self.series), [self.mondays[0], *self.mondays[2:]])
+        every_other = self.weekly(self.john, self.mondays[0], self.mondays[-1], every_weeks=2)
+        self.assertEqual(self.dates(every_other), self.mondays[::2])
+        self.assertFalse(every_other.occurs_on(self.mondays[1]))
+
+    def test_expands_many_series_with_one_query(self) -> None:
+        self.weekly(self.john, self.mondays[0], self.mondays[-1])
+        with self.assertNumQueries(1):
+            occurrences = ShiftSeries.objects.select_related("associated_person").occurrences(
+                at(self.mondays[0], 0), at(self.mondays[1], 0)
+            )
+            self.assertEqual({str(shift.associated_person) for shift in occurrences}, {"jane", "john"})
+
+    def test_materializing_stops_expanding_the_occurrence(self) -> None:
+        shift = self.series.materialize(self.mondays[1])
+        self.assertEqual(
+            (shift.series, shift.series_date, shift.start), (self.series, self.mondays[1], at(self.mondays[1], 10))
+        )
+        self.assertEqual(self.series.materialize(self.mondays[1]), shift)
+        self.assertNotIn(self.mondays[1], self.dates(ShiftSeries.objects.get(pk=self.series.pk)))
+        with self.assertRaises(ValueError):
+            self.series.materialize(self.mondays[1] + datetime.timedelta(days=1))
+
+    def test_viewing_an_occurrence_and_materializing_it(self) -> None:
+        url = reverse("view_occurrence", args=(self.series.id, self.mondays[1].isoformat()))
+        self.client.force_login(self.john)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.post(url).status_code, 403)
+        self.client.force_login(self.jane)
+        response = self.client.post(url)
+        shift = Shift.objects.get(series=self.series)
+        self.assertRedirects(response, reverse("view_shift", args=(shift.id,)), fetch_redirect_response=False)
+        self.assertRedirects(
+            self.client.get(url), reverse("view_shift", args=(shift.id,)), fetch_redirect_response=False
+        )
+        bad_date = reverse("view_occurrence", args=(self.series.id, "2030-02-26"))
+        self.assertEqual(self.client.get(bad_date).status_code, 404)
+
+    def test_feeds_and_schedule_include_occurrences(self) -> None:
+        self.client.force_login(self.jane)
+        week = {"start": at(self.mondays[1], 0).isoformat(), "end": at(self.mondays[2], 0).isoformat()}
+        events = self.client.get(reverse("user_event_feed", args=(self.jane.id,)), week)
+        self.assertEqual([event["id"] for event in self.json(events)], [f"{self.series.id}:{self.mondays[1]}"])
+        self.client.force_login(self.supervisor)
+        events = self.client.get(reverse("course_event_feed", args=(self.course.id,)), week)
+        self.assertEqual(len(self.json(events)), 1)
+
+        schedule = build_weekly_schedule("SI", self.mondays[1])
+        entries = schedule["MATH 131"][1][0]
+        self.assertEqual([(entry.shift_id, entry.start) for entry in entries], [(None, at(self.mondays[1], 10))])
+
+    def test_schedules_are_invalidated_when_changes_commit(self) -> None:
+        self.assertEqual(len(get_weekly_schedule("SI", self.mondays[1])["MATH 131"][1][0]), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.weekly(self.jane, self.mondays[1], self.mondays[1])
+            self.assertEqual(len(get_weekly_schedule("SI", self.mondays[1])["MATH 131"][1][0]), 1)
+        self.assertEqual(len(get_weekly_schedule("SI", self.mondays[1])["MATH 131"][1][0]), 2)
+
+    def test_feeds_take_ranges_without_offsets_as_local_time(self) -> None:
+        self.client.force_login(self.supervisor)
+        # The occurrence on mondays[1] ends at 11:00 local time, so a range starting then leaves it out.
+        week = {"start": f"{self.mondays[1]}T11:00:00", "end": self.mondays[3].isoformat()}
+        events = self.client.get(reverse("user_event_feed", args=(self.jane.id,)), week)
+        self.assertEqual([event["id"] for event in self.json(events)], [f"{self.series.id}:{self.mondays[2]}"])
+        events = self.client.get(reverse("course_event_feed", args=(self.course.id,)), week)
+        self.assertEqual(len(self.json(events)), 1)
+
+    @staticmethod
+    def json(response) -> list:
+        return json.loads(b"".join(response.streaming_content))
+
+    def test_dropping_skips_occurrences(self) -> None:
+        result = rescheduling.drop_shifts([], [self.series.id], self.mondays[1])
+        self.assertEqual(result.dropped, 1)
+        self.series.refresh_from_db()
+        self.assertFalse(self.series.occurs_on(self.mondays[1]))
+        self.assertFalse(Shift.objects.exists())
+
+    def test_moving_materializes_occurrences(self) -> None:
+        tuesday = self.mondays[1] + datetime.timedelta(days=1)
+        self.assertEqual(rescheduling.move_shifts(self.mondays[1], tuesday).moved, 1)
+        shift = Shift.objects.get()
+        self.assertEqual((shift.series_date, shift.start), (self.mondays[1], at(tuesday, 10)))
+        self.assertEqual(self.dates(ShiftSeries.objects.get(pk=self.series.pk)), [self.mondays[0], *self.mondays[2:]])
+
+    def test_occurrences_can_be_double_booked(self) -> None:
+        def clash(person: LRCDatabaseUser, location: str) -> Shift:
+            start = at(self.mondays[1], 10) + datetime.timedelta(minutes=30)
+            return Shift(
+                associated_person=person,
+                start=start,
+                duration=datetime.timedelta(hours=1),
+                location=location,
+                kind="SI",
+            )
+
+        for batch in ([clash(self.john, "GSMN 64")], [clash(self.jane, "LRC"), clash(self.john, "LGRT 123")]):
+            [booking] = double_booking.find(batch)
+            self.assertEqual((booking.other.series, booking.other.series_date), (self.series, self.mondays[1]))
+
+    def test_series_are_checked_for_double_bookings(self) -> None:
+        self.series.start_time = datetime.time(10, 30)
+        self.series.full_clean()
+
+        later = self.mondays[-1] + datetime.timedelta(weeks=1)
+        every_other = ShiftSeries(
+            associated_person=self.john,
+            start_time=datetime.time(10, 30),
+            duration=datetime.timedelta(hours=1),
+            location="GSMN 64",
+            kind="SI",
+            first_date=self.mondays[1],
+            last_date=later,
+            every_weeks=2,
+        )
+        with self.assertRaisesMessage(ValidationError, "overlaps another shift in GSMN 64"):
+            every_other.full_clean()
+        every_other.first_date = later
+        every_other.full_clean()
@@ -0,0 +1,143 @@
+"""
+Checks that concurrent writes neither fail nor get lost when they contend for SQLite's write lock.
+"""
+
+import datetime
+import threading
+import time
+from typing import List
+
+from django.contrib import messages
+from django.contrib.auth.models import Group
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db import OperationalError, connections
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import rescheduling
+from ..models import LRCDatabaseUser, Shift, ShiftChangeRequest
+from ..views import write_transaction
+
+THREADS = 8
+
+SUBMISSIONS_PER_THREAD = 5
+
+
+class WriteContentionTests(TransactionTestCase):
+    def setUp(self) -> None:
+        tutors = Group.objects.create(name="Tutors")
+        sis = Group.objects.create(name="SIs")
+        self.day = timezone.localdate() + datetime.timedelta(days=7)
+        start = timezone.make_aware(datetime.datetime.combine(self.day, datetime.time(10)))
+        self.clients: List[Client] = []
+        self.shifts: List[Shift] = []
+        for i in range(THREADS):
+            user = LRCDatabaseUser.objects.create_user(username=f"user{i}", password="password")
+            user.groups.add(tutors if i % 2 else sis)
+            self.shifts.append(
+                Shift.objects.create(
+                    associated_person=user,
+                    start=start + datetime.timedelta(hours=i),
+                    duration=datetime.timedelta(hours=1),
+                    location="LRC",
+                    kind="Tutoring" if i % 2 else "SI",
+                )
+            )
+            client = Client()
+            client.force_login(user)
+            self.clients.append(client)
+
+    def submit_requests(self, i: int, statuses: List[int]) -> None:
+        client, shift = self.clients[i], self.shifts[i]
+        new_start = (shift.start + datetime.timedelta(days=1)).astimezone(timezone.get_current_timezone())
+        change = {
+            "reason": "Schedule conflict",
+            "new_start": new_start.strftime("%Y-%m-%d %I:%M %p"),
+            "new_duration": "01:00:00",
+            "new_location": "LRC",
+            "new_kind": shift.kind,
+        }
+        try:
+            for _ in range(SUBMISSIONS_PER_THREAD):
+                if i % 2:
+                    response = client.post(reverse("new_drop_request", args=(shift.id,)), {"reason": "Sick"})
+                else:
+                    response = client.post(reverse("new_shift_request"), change)
+                statuses.append(response.status_code)
+                response = client.post(reverse("new_shift_change_request", args=(shift.id,)), change)
+                statuses.append(response.status_code)
+        finally:
+            connections.close_all()
+
+    def edit_in_bulk(self, done: threading.Event) -> None:
+        # Staff moving shifts around at the same time.
+        try:
+            while not done.is_set():
+                rescheduling.swap_shift_dates(self.day, self.day + datetime.timedelta(days=1))
+                time.sleep(0.01)
+        finally:
+            connections.close_all()
+
+    def test_concurrent_submissions(self) -> None:
+        statuses: List[int] = []
+        done = threading.Event()
+        bulk_editor = threading.Thread(target=self.edit_in_bulk, args=(done,))
+        submitters = [threading.Thread(target=self.submit_requests, args=(i, statuses)) for i in range(THREADS)]
+        bulk_editor.start()
+        for thread in submitters:
+            thread.start()
+        for thread in submitters:
+            thread.join()
+        done.set()
+        bulk_editor.join()
+
+        self.assertEqual(len(statuses), THREADS * SUBMISSIONS_PER_THREAD * 2)
+        self.assertTrue(all(status == 302 for status in statuses), statuses)
+        self.assertEqual(ShiftChangeRequest.objects.count(), THREADS * SUBMISSIONS_PER_THREAD * 2)
+
+    def test_retries_when_locked(self) -> None:
+        attempts = []
+
+        @write_transaction("POST")
+        def view(request) -> HttpResponse:
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise OperationalError("database is locked")
+            return HttpResponse()
+
+        self.assertEqual(view(RequestFactory().post("/")).status_code, 200)
+        self.assertEqual(len(attempts), 3)
+
+    def test_retries_drop_messages_of_failed_attempts(self) -> None:
+        attempts = []
+
+        @write_transaction("POST")
+        def view(request) -> HttpResponse:
+            attempts.append(1)
+            messages.add_message(request, messages.INFO, f"Attempt {len(attempts)}")
+            if len(attempts) < 2:
+                raise OperationalError("database is locked")
+            return HttpResponse()
+
+        request = RequestFactory().post("/")
+        request._messages = CookieStorage(request)
+        messages.add_message(request, messages.INFO, "Before")
+        view(request)
+        self.assertEqual([str(message) for message in messages.get_messages(request)], ["Before", "Attempt 2"])
+
+    def test_gives_up_when_locked(self) -> None:
+        @write_transaction("POST")
+        def view(request) -> HttpResponse:
+            raise OperationalError("database is locked")
+
+        self.assertEqual(view(RequestFactory().post("/")).status_code, 503)
+
+    def test_other_errors_are_not_retried(self) -> None:
+        @write_transaction("POST")
+        def view(request) -> HttpResponse:
+            raise OperationalError("no such table: main_shift")
+
+        with self.assertRaises(OperationalError):
+            view(RequestFactory().post("/"))
@@ -4,6 +4,7 @@ from django.contrib.auth import views as auth_views
 from django.urls import URLPattern, URLResolver, include, path
 
 from .views import index
+from .views.autocomplete import autocomplete
 from .views.bulk_shift_editing_views import (
     drop_shifts_on_date,
     drop_shifts_on_date_confirmation,
@@ -12,8 +13,10 @@ from .views.bulk_shift_editing_views import (
     swap_shift_dates,
     swap_shift_dates_confirmation,
 )
-from .views.courses import add_course, course_event_feed, edit_course, list_courses, view_course
+from .views.courses import add_course, course_calendar_feed, course_event_feed, edit_course, list_courses, view_course
 from .views.hardware import add_hardware, add_loans, edit_hardware, edit_loans, show_hardware, show_loans
+from .views.jobs import job_status, view_job
+from .views.metrics import metrics
 from .views.shifts import (
     approve_pending_request,
     deny_request,
@@ -27,8 +30,17 @@ from .views.shifts import (
     view_shift_change_requests,
     view_shift_change_requests_by_user,
     view_drop_shift_requests,
+    view_occurrence,
+)
+from .views.users import (
+    create_user,
+    create_users_in_bulk,
+    edit_profile,
+    list_users,
+    user_calendar_feed,
+    user_event_feed,
+    user_profile,
 )
-from .views.users import create_user, create_users_in_bulk, edit_profile, list_users, user_event_feed, user_profile
 from .views.schedule import view_schedule
 
 URLs = List[Union[URLPattern, URLResolver]]
@@ -48,6 +60,11 @@ ACCOUNTS_URLS: URLs = [
 API_URLS: URLs = [
     path("api/course_event_feed/<int:course_id>", course_event_feed, name="course_event_feed"),
     path("api/user_event_feed/<int:user_id>", user_event_feed, name="user_event_feed"),
+    path("calendar/courses/<int:course_id>/<str:token>.ics", course_calendar_feed, name="course_calendar_feed"),
+    path("calendar/users/<int:user_id>/<str:token>.ics", user_calendar_feed, name="user_calendar_feed"),
+    path("api/jobs/<int:job_id>", job_status, name="job_status"),
+    path("api/metrics", metrics, name="metrics"),
+    path("api/autocomplete/<str:kind>", autocomplete, name="autocomplete"),
 ]
 
 COURSES_URLS: URLs = [
@@ -89,6 +106,7 @@ SHIFTS_URLS: URLs = [
     path("shifts/<int:shift_id>/request_change", new_shift_change_request, name="new_shift_change_request"),
     path("shifts/new", new_shift, name="new_shift"),
     path("shifts/new/tutoring", new_shift_tutors_only, name="new_shift_tutors_only"),
+    path("shifts/series/<int:series_id>/<str:day>", view_occurrence, name="view_occurrence"),
 ]
 
 USERS_URLS: URLs = [
@@ -105,10 +123,14 @@ USERS_URLS: URLs = [
     path("users/groups/<str:group>", list_users, name="list_users"),
 ]
 
+JOBS_URLS: URLs = [
+    path("jobs/<int:job_id>", view_job, name="view_job"),
+]
+
 SCHEDULE_URL: URLs = [
     path("schedule/<str:kind>/<str:offset>", view_schedule, name="view_schedule")
 ]
 
 urlpatterns: URLs = (
-    MISC_URLS + ACCOUNTS_URLS + API_URLS + COURSES_URLS + HARDWARE_URLS + SCHEDULING_URLS + SHIFTS_URLS + USERS_URLS + SCHEDULE_URL
+    MISC_URLS + ACCOUNTS_URLS + API_URLS + COURSES_URLS + HARDWARE_URLS + SCHEDULING_URLS + SHIFTS_URLS + USERS_URLS + SCHEDULE_URL + JOBS_URLS
 )
@@ -0,0 +1,245 @@
+"""
+Creates users in bulk from CSV lines of "username,email,first name,last name,primary group,password".
+
+Every row is parsed and validated before anything is written, and rows with problems are reported instead of
+aborting the import. Password hashing is by far the slowest step, so it's spread over a pool of processes. The valid
+users and their group memberships are then inserted with two bulk inserts in a single transaction.
+
+Imports are split in two. prepare_import() parses the rows in the request, which is quick, and import_prepared()
+hashes the passwords and inserts the users in a background job, so that slow hashing never holds up a web worker.
+The passwords travel in the job's payload sealed with a key derived from SECRET_KEY, so they're never stored in
+plaintext, and the payload is erased when the job finishes.
+"""
+
+import base64
+import csv
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.signing import Signer
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils.crypto import salted_hmac
+
+from .models import LRCDatabaseUser
+from .roles import forget_group_names
+
+FIELDS = ("username", "email", "first_name", "last_name", "primary_group", "password")
+
+# Below this many passwords, starting worker processes costs more than it saves.
+PARALLEL_HASHING_THRESHOLD = 8
+
+HASHING_CHUNK_SIZE = 16
+
+_SEAL_SALT = "main.user_import"
+
+_NONCE_SIZE = 16
+
+
+@dataclass(frozen=True)
+class ImportRow:
+    line_number: int
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    primary_group: str
+    # Plaintext while parsing, and sealed once prepared.
+    password: str
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    # (line number, problem) for every row that wasn't imported.
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+    def summary(self) -> str:
+        lines = [f"Created {self.created} users."]
+        if self.errors:
+            lines.append(f"Skipped {len(self.errors)} lines:")
+            lines.extend(f"Line {line_number}: {problem}" for line_number, problem in self.errors)
+        return "\n".join(lines)
+
+
+def parse_user_data(user_data: str, groups: Dict[str, Group]) -> Tuple[List[ImportRow], List[Tuple[int, str]]]:
+    """
+    Parses and validates every line. Returns the valid rows, and the problems with the invalid ones.
+    """
+
+    rows: List[ImportRow] = []
+    errors: List[Tuple[int, str]] = []
+    username_validator = UnicodeUsernameValidator()
+    seen_usernames = set()
+
+    for line_number, values in enumerate(csv.reader(user_data.splitlines()), start=1):
+        values = [value.strip() for value in values]
+        if not any(values):
+            continue
+        if len(values) != len(FIELDS):
+            errors.append((line_number, f"Expected {len(FIELDS)} values but found {len(values)}."))
+            continue
+        username, email, *rest = values
+        row = ImportRow(
+            line_number,
+            LRCDatabaseUser.normalize_username(username),
+            LRCDatabaseUser.objects.normalize_email(email),
+            *rest,
+        )
+        try:
+            username_validator(row.username)
+            validate_email(row.email)
+        except ValidationError as e:
+            errors.append((line_number, " ".join(e.messages)))
+            continue
+        if row.primary_group not in groups:
+            errors.append((line_number, f'There is no group called "{row.primary_group}".'))
+        elif not row.password:
+            errors.append((line_number, "The password is empty."))
+        elif row.username in seen_usernames:
+            errors.append((line_number, f'The username "{row.username}" appears more than once.'))
+        else:
+            seen_usernames.add(row.username)
+            rows.append(row)
+
+    rows, taken = _without_taken_usernames(rows)
+    return rows, sorted(errors + taken)
+
+
+def _without_taken_usernames(rows: List[ImportRow]) -> Tuple[List[ImportRow], List[Tuple[int, str]]]:
+    usernames = [row.username for row in rows]
+    taken = set(LRCDatabaseUser.objects.filter(username__in=usernames).values_list("username", flat=True))
+    errors = [(row.line_number, f'The username "{row.username}" is taken.') for row in rows if row.username in taken]
+    return [row for row in rows if row.username not in taken], errors
+
+
+def _init_hashing_process() -> None:
+    # Processes that are spawned rather than forked start without Django set up.
+    django.setup()
+
+
+def hash_passwords(passwords: List[str], report_progress: Optional[Callable[[int], None]] = None) -> List[str]:
+    if len(passwords) < PARALLEL_HASHING_THRESHOLD:
+        hashed = []
+        for password in passwords:
+            hashed.append(make_password(password))
+            if report_progress is not None:
+                report_progress(len(hashed))
+        return hashed
+
+    hashed = []
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_hashing_process) as executor:
+        for password_hash in executor.map(make_password, passwords, chunksize=HASHING_CHUNK_SIZE):
+            hashed.append(password_hash)
+            if report_progress is not None and len(hashed) % HASHING_CHUNK_SIZE == 0:
+                report_progress(len(hashed))
+    return hashed
+
+
+def _keystream(nonce: bytes, length: int) -> bytes:
+    # HMAC-SHA256 in counter mode.
+    blocks = (
+        salted_hmac(_SEAL_SALT, nonce + counter.to_bytes(8, "big"), algorithm="sha256").digest()
+        for counter in range((length + 31) // 32)
+    )
+    return b"".join(blocks)[:length]
+
+
+def seal_password(password: str) -> str:
+    """
+    Encrypts and signs a password, so that it can be stored for a job to read without being readable itself.
+    """
+
+    nonce = secrets.token_bytes(_NONCE_SIZE)
+    plaintext = password.encode()
+    ciphertext = bytes(a ^ b for a, b in zip(plaintext, _keystream(nonce, len(plaintext))))
+    return Signer(salt=_SEAL_SALT).sign(base64.urlsafe_b64encode(nonce + ciphertext).decode())
+
+
+def unseal_password(sealed: str) -> str:
+    """
+    Reverses seal_password(). Raises django.core.signing.BadSignature if sealed was tampered with.
+    """
+
+    data = base64.urlsafe_b64decode(Signer(salt=_SEAL_SALT).unsign(sealed))
+    nonce, ciphertext = data[:_NONCE_SIZE], data[_NONCE_SIZE:]
+    return bytes(a ^ b for a, b in zip(ciphertext, _keystream(nonce, len(ciphertext)))).decode()
+
+
+def prepare_import(user_data: str) -> dict:
+    """
+    Parses user_data. Returns a JSON-serializable payload for import_prepared(), with the valid rows' passwords sealed.
+    """
+
+    groups = {group.name: group for group in Group.objects.all()}
+    rows, errors = parse_user_data(user_data, groups)
+    return {
+        "users": [asdict(row) | {"password": seal_password(row.password)} for row in rows],
+        "errors": errors,
+    }
+
+
+def import_prepared(
+    prepared: dict, report_progress: Optional[Callable[[int, Optional[int]], None]] = None
+) -> ImportReport:
+    """
+    Hashes the passwords of a payload from prepare_import() and creates its users, except those whose usernames were
+    taken since.
+    """
+
+    groups = {group.name: group for group in Group.objects.all()}
+    rows = [ImportRow(**user) for user in prepared["users"]]
+    errors = [tuple(error) for error in prepared["errors"]]
+    # The groups can't be validated again, so rows whose group was deleted since are reported too.
+    errors.extend(
+        (row.line_number, f'There is no group called "{row.primary_group}".')
+        for row in rows
+        if row.primary_group not in groups
+    )
+    rows = [row for row in rows if row.primary_group in groups]
+    rows, taken = _without_taken_usernames(rows)
+    report = ImportReport(errors=sorted(errors + taken))
+    if not rows:
+        return report
+    if report_progress is not None:
+        report_progress(0, len(rows))
+
+    # Hashing is the slow part, so it's what progress is reported for.
+    password_hashes = hash_passwords(
+        [unseal_password(row.password) for row in rows],
+        None if report_progress is None else lambda hashed: report_progress(hashed, len(rows)),
+    )
+    users = [
+        LRCDatabaseUser(
+            username=row.username,
+            email=row.email,
+            first_name=row.first_name,
+            last_name=row.last_name,
+            password=password_hash,
+        )
+        for row, password_hash in zip(rows, password_hashes)
+    ]
+    with transaction.atomic():
+        LRCDatabaseUser.objects.bulk_create(users)
+        user_ids = dict(
+            LRCDatabaseUser.objects.filter(username__in=[row.username for row in rows]).values_list("username", "id")
+        )
+        Membership = LRCDatabaseUser.groups.through
+        Membership.objects.bulk_create(
+            Membership(lrcdatabaseuser_id=user_ids[row.username], group_id=groups[row.primary_group].id) for row in rows
+        )
+    # bulk_create doesn't send post_save, which would normally clear any roles cached under a reused ID.
+    forget_group_names(user_ids.values())
+
+    report.created = len(rows)
+    if report_progress is not None:
+        report_progress(len(rows), len(rows))
+    return report
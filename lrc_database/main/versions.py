@@ -0,0 +1,55 @@
+"""
+Version tokens for cached data.
+
+Anything cached under a key that includes a version token is invalidated by replacing the token: readers then compute
+a fresh entry under the new key, and the stale entries expire on their own. Tokens are random rather than counters so
+that a token that was evicted and recreated can never match an old entry.
+
+A token is only replaced in the cache of the process that bumped it, so versions are only reliable when every process
+shares the cache (see CACHES in settings.py). Tokens also expire after VERSION_TIMEOUT, which bounds how long data can
+stay stale when they don't.
+"""
+
+from typing import Dict, Iterable
+from uuid import uuid4
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+# Seconds.
+VERSION_TIMEOUT = 60 * 60
+
+
+def _cache_key(name: str) -> str:
+    return f"version:{name}"
+
+
+def _new_token() -> str:
+    return uuid4().hex
+
+
+def versions_are_shared() -> bool:
+    """
+    Whether bumps are seen by every process, which they aren't when each process has a cache of its own.
+    """
+
+    return not isinstance(caches["default"], LocMemCache)
+
+
+def get_version(name: str) -> str:
+    return cache.get_or_set(_cache_key(name), _new_token, VERSION_TIMEOUT)
+
+
+def get_versions(names: Iterable[str]) -> Dict[str, str]:
+    keys = {_cache_key(name): name for name in names}
+    cached = cache.get_many(keys.keys())
+    versions = {keys[key]: token for key, token in cached.items()}
+    missing = {name: _new_token() for name in keys.values() if name not in versions}
+    if missing:
+        cache.set_many({_cache_key(name): token for name, token in missing.items()}, VERSION_TIMEOUT)
+        versions.update(missing)
+    return versions
+
+
+def bump_versions(names: Iterable[str]) -> None:
+    cache.set_many({_cache_key(name): _new_token() for name in names}, VERSION_TIMEOUT)
@@ -1,20 +1,32 @@
+import random
+import time
 from typing import Callable, Concatenate, Optional, ParamSpec
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import redirect_to_login
 from django.core.exceptions import PermissionDenied
+from django.db import OperationalError, transaction
 from django.db.models import Model
 from django.forms import ModelForm
-from django.http import HttpRequest, HttpResponse, HttpResponseNotAllowed
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseNotAllowed
 from django.shortcuts import redirect, render
 from django.db.models import Q
 
+from ..calendar_feeds import subscriber
+from ..metrics import record_lock_retry
 from ..models import ShiftChangeRequest
+from ..roles import is_in_groups
 
 P = ParamSpec("P")
 User = get_user_model()
 
+WRITE_TRANSACTION_ATTEMPTS = 4
+
+# Seconds. Retries wait a random time up to this, doubled after every attempt, so that requests that collided don't
+# collide again.
+WRITE_TRANSACTION_RETRY_DELAY = 0.05
+
 
 def restrict_to_groups(
     *groups: str,
@@ -27,7 +39,7 @@ def restrict_to_groups(
         def _wrapped_view(request: HttpRequest, *args: P.args, **kwargs: P.kwargs) -> HttpResponse:
             if not request.user.is_authenticated:
                 return redirect_to_login(request.get_full_path())
-            if request.user.is_superuser or request.user.groups.filter(name__in=groups).exists():
+            if request.user.is_superuser or is_in_groups(request.user, *groups):
                 return view(request, *args, **kwargs)
             raise PermissionDenied
 
@@ -61,6 +73,59 @@ def restrict_to_http_methods(
     return decorator
 
 
+def is_database_locked(error: OperationalError) -> bool:
+    # "table is locked" comes from shared-cache connections, like those to an in-memory test database.
+    return "database is locked" in str(error) or "database table is locked" in str(error)
+
+
+def write_transaction(
+    *methods: str,
+) -> Callable[
+    [Callable[Concatenate[HttpRequest, P], HttpResponse]], Callable[Concatenate[HttpRequest, P], HttpResponse]
+]:
+    """
+    Annotation for views that write to the database. Requests made with one of the given methods run in a single
+    transaction, which takes the database's write lock when it begins (see main/backends/sqlite3). If the database stays
+    locked past its busy timeout, the transaction is retried a few times after short random delays, and if it's still
+    locked an HTTP 503 (Service Unavailable) is returned rather than an error.
+
+    Retrying runs the whole view again, so it may only be used on views whose effects are all rolled back with the
+    transaction. Writes are, and so are the caches that signals.py invalidates, since they're invalidated on commit.
+    Messages added by an attempt that's rolled back are discarded. Anything else, like sending email or hashing
+    passwords (which is too slow to do while holding the write lock anyway), belongs in a background job or outside the
+    view's transaction.
+    """
+
+    def decorator(
+        view: Callable[Concatenate[HttpRequest, P], HttpResponse]
+    ) -> Callable[Concatenate[HttpRequest, P], HttpResponse]:
+        def _wrapped_view(request: HttpRequest, *args: P.args, **kwargs: P.kwargs) -> HttpResponse:
+            # A transaction can only be retried from its start.
+            if request.method not in methods or transaction.get_connection().in_atomic_block:
+                return view(request, *args, **kwargs)
+            queued_messages = getattr(getattr(request, "_messages", None), "_queued_messages", [])
+            messages_before = len(queued_messages)
+            for attempt in range(WRITE_TRANSACTION_ATTEMPTS):
+                try:
+                    with transaction.atomic():
+                        return view(request, *args, **kwargs)
+                except OperationalError as e:
+                    if not is_database_locked(e):
+                        raise
+                    del queued_messages[messages_before:]
+                    gave_up = attempt == WRITE_TRANSACTION_ATTEMPTS - 1
+                    record_lock_retry(gave_up)
+                    if not gave_up:
+                        time.sleep(random.uniform(0, WRITE_TRANSACTION_RETRY_DELAY * 2**attempt))
+            return HttpResponse(
+                "The database is busy. Please try again in a moment.", status=503, headers={"Retry-After": "1"}
+            )
+
+        return _wrapped_view
+
+    return decorator
+
+
 def personal(
     view: Callable[Concatenate[HttpRequest, int, P], HttpResponse]
 ) -> Callable[Concatenate[HttpRequest, int, P], HttpResponse]:
@@ -79,9 +144,31 @@ def personal(
     return _wrapped_view
 
 
+def calendar_subscription(
+    kind: str,
+) -> Callable[[Callable[..., HttpResponse]], Callable[..., HttpResponse]]:
+    """
+    Annotation for the calendar feeds of users or courses (kind), which calendar apps fetch without logging in. The
+    token in the URL has to have been made for the feed being requested, and its subscriber still has to be allowed to
+    see it: a user's feed is personal to them and privileged users. Otherwise, an HTTP 404 (Not Found) is returned.
+    """
+
+    def decorator(view: Callable[..., HttpResponse]) -> Callable[..., HttpResponse]:
+        def _wrapped_view(request: HttpRequest, *args, token: str, **kwargs) -> HttpResponse:
+            feed_id = kwargs[f"{kind}_id"]
+            user = subscriber(token, kind, feed_id)
+            if user is None or (kind == "user" and user.id != feed_id and not user.is_privileged()):
+                raise Http404("No such calendar.")
+            return view(request, *args, **kwargs)
+
+        return _wrapped_view
+
+    return decorator
+
+
 @login_required
 def index(request):
-    if request.user.groups.filter(name__in=("Tutors", "SIs")).exists():
+    if is_in_groups(request.user, "Tutors", "SIs"):
         return redirect("user_profile", request.user.id)
 
     return redirect("view_shift_change_requests", "All", "New")
@@ -0,0 +1,14 @@
+from django.http import Http404, HttpRequest, JsonResponse
+
+from ..autocomplete import SEARCHES, search
+from ..routers import read_only_database
+from . import restrict_to_groups, restrict_to_http_methods
+
+
+@restrict_to_groups("Office staff", "Supervisors")
+@restrict_to_http_methods("GET")
+@read_only_database
+def autocomplete(request: HttpRequest, kind: str) -> JsonResponse:
+    if kind not in SEARCHES:
+        raise Http404
+    return JsonResponse({"results": search(kind, request.GET.get("q", ""))})
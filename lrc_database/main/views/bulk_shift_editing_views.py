@@ -1,14 +1,14 @@
-from datetime import date, datetime
+from datetime import date
 
-import pytz
 from django import forms
 from django.contrib import messages
 from django.core.exceptions import BadRequest
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect, render
 
-from ..models import Shift
-from . import restrict_to_groups, restrict_to_http_methods
+from .. import jobs
+from ..rescheduling import shifts_on
+from . import restrict_to_groups, restrict_to_http_methods, write_transaction
 
 
 class DropShiftsOnDateForm(forms.Form):
@@ -24,6 +24,7 @@ def drop_shifts_on_date(request: HttpRequest) -> HttpResponse:
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("GET")
 def drop_shifts_on_date_confirmation(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
         form = DropShiftsOnDateForm(request.POST)
@@ -31,15 +32,18 @@ def drop_shifts_on_date_confirmation(request: HttpRequest) -> HttpResponse:
             messages.add_message(request, messages.ERROR, f"Form has errors: {form.errors}")
             return redirect("drop_shifts_on_date")
         date = form.cleaned_data["date"]
-        shifts = Shift.objects.filter(start__year=date.year, start__month=date.month, start__day=date.day)
-        request.session["shift_keys"] = list(shifts.values_list("id", flat=True))
+        shifts = shifts_on(date)
+        request.session["shift_keys"] = [shift.id for shift in shifts if shift.id is not None]
+        request.session["series_keys"] = [shift.series_id for shift in shifts if shift.id is None]
+        request.session["drop_date"] = date.isoformat()
         return render(request, "shifts/drop_shifts_on_date_confirmation.html", {"affected_shifts": shifts})
     else:
-        shift_keys = request.session.get("shift_keys", [])
-        shifts = Shift.objects.filter(id__in=shift_keys)
-        deleted_count, _ = shifts.delete()
-        messages.add_message(request, messages.INFO, f"Deleted {deleted_count} shifts.")
-        return redirect("drop_shifts_on_date")
+        payload = {"shift_ids": request.session.pop("shift_keys", [])}
+        if "drop_date" in request.session:
+            payload["series_ids"] = request.session.pop("series_keys", [])
+            payload["date"] = request.session.pop("drop_date")
+        job = jobs.enqueue("drop_shifts", payload, request.user)
+        return redirect("view_job", job.id)
 
 
 class SwapShiftDates(forms.Form):
@@ -56,6 +60,7 @@ def swap_shift_dates(request: HttpRequest) -> HttpResponse:
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("GET")
 def swap_shift_dates_confirmation(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
         form = SwapShiftDates(request.POST)
@@ -65,8 +70,8 @@ def swap_shift_dates_confirmation(request: HttpRequest) -> HttpResponse:
         first_date = form.cleaned_data["first_date"]
         second_date = form.cleaned_data["second_date"]
 
-        first_date_shifts = Shift.all_on_date(first_date)
-        second_date_shifts = Shift.all_on_date(second_date)
+        first_date_shifts = shifts_on(first_date)
+        second_date_shifts = shifts_on(second_date)
 
         return render(
             request,
@@ -83,33 +88,9 @@ def swap_shift_dates_confirmation(request: HttpRequest) -> HttpResponse:
         first_date = date.fromisoformat(request.GET["first"])
         second_date = date.fromisoformat(request.GET["second"])
 
-        first_date_shifts = Shift.all_on_date(first_date)
-        second_date_shifts = Shift.all_on_date(second_date)
-
-        for shift in first_date_shifts:
-            start = shift.start.astimezone(pytz.timezone("America/New_York"))
-            start = start.replace(
-                year=second_date.year,
-                month=second_date.month,
-                day=second_date.day,
-            )
-            shift.start = start
-            shift.save()
-
-        for shift in second_date_shifts:
-            start = shift.start.astimezone(pytz.timezone("America/New_York"))
-            start = start.replace(
-                year=first_date.year,
-                month=first_date.month,
-                day=first_date.day,
-            )
-            shift.start = start
-            shift.save()
-
-        messages.add_message(
-            request, messages.INFO, f"Swapped dates for {(first_date_shifts | second_date_shifts).count()} shifts."
-        )
-        return redirect("swap_shift_dates")
+        payload = {"first_date": first_date.isoformat(), "second_date": second_date.isoformat()}
+        job = jobs.enqueue("swap_shift_dates", payload, request.user)
+        return redirect("view_job", job.id)
 
 
 class MoveShiftsFromDateForm(forms.Form):
@@ -126,6 +107,7 @@ def move_shifts_from_date(request: HttpRequest) -> HttpResponse:
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("GET")
 def move_shifts_from_date_confirmation(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
         form = MoveShiftsFromDateForm(request.POST)
@@ -135,7 +117,7 @@ def move_shifts_from_date_confirmation(request: HttpRequest) -> HttpResponse:
 
         from_date: date = form.cleaned_data["from_"]
         to_date: date = form.cleaned_data["to_"]
-        from_date_shifts = Shift.all_on_date(from_date)
+        from_date_shifts = shifts_on(from_date)
 
         return render(
             request,
@@ -145,18 +127,6 @@ def move_shifts_from_date_confirmation(request: HttpRequest) -> HttpResponse:
     else:  # request.method == "GET"
         from_date = date.fromisoformat(request.GET["from"])
         to_date = date.fromisoformat(request.GET["to"])
-        from_date_shifts = Shift.all_on_date(from_date)
-        for shift in from_date_shifts:
-            start = shift.start.astimezone(pytz.timezone("America/New_York"))
-            start = start.replace(
-                year=to_date.year,
-                month=to_date.month,
-                day=to_date.day,
-            )
-            shift.start = start
-            shift.save()
-
-        messages.add_message(
-            request, messages.INFO, f"Moved {from_date_shifts.count()} shifts from {from_date} to {to_date}."
-        )
-        return redirect("move_shifts_from_date")
+        payload = {"from_date": from_date.isoformat(), "to_date": to_date.isoformat()}
+        job = jobs.enqueue("move_shifts", payload, request.user)
+        return redirect("view_job", job.id)
@@ -1,24 +1,31 @@
 from datetime import datetime
-from typing import Any, Dict
+from typing import Tuple
 
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import BadRequest
-from django.db.models import Q
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.db.models import Exists, OuterRef, Q, QuerySet
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag
 
+from ..calendar_feeds import calendar_response, feed_token, feed_window
+from ..event_feeds import course_calendar_etag, course_feed_etag, event_feed_response
 from ..forms import CourseForm
-from ..models import Course, Shift
-from . import restrict_to_groups, restrict_to_http_methods
+from ..models import Course, Shift, ShiftSeries, ShiftSeriesQuerySet
+from ..routers import read_only_database
+from . import calendar_subscription, restrict_to_groups, restrict_to_http_methods, write_transaction
 
 User = get_user_model()
 
 
 @login_required
 @restrict_to_http_methods("GET")
+@read_only_database
 def list_courses(request: HttpRequest) -> HttpResponse:
     courses = Course.objects.order_by("department", "number")
     return render(request, "courses/list_courses.html", {"courses": courses})
@@ -26,19 +33,24 @@ def list_courses(request: HttpRequest) -> HttpResponse:
 
 @login_required
 @restrict_to_http_methods("GET")
+@read_only_database
 def view_course(request: HttpRequest, course_id: int) -> HttpResponse:
     course = get_object_or_404(Course, id=course_id)
     tutors = User.objects.filter(courses_tutored__in=(course,))
     sis = User.objects.filter(si_course=course)
+    calendar_url = request.build_absolute_uri(
+        reverse("course_calendar_feed", args=(course.id, feed_token(request.user, "course", course.id)))
+    )
     return render(
         request,
         "courses/view_course.html",
-        {"course": course, "tutors": tutors, "sis": sis},
+        {"course": course, "tutors": tutors, "sis": sis, "calendar_url": calendar_url},
     )
 
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
 def add_course(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
         form = CourseForm(request.POST)
@@ -56,6 +68,7 @@ def add_course(request: HttpRequest) -> HttpResponse:
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
 def edit_course(request: HttpRequest, course_id: int) -> HttpResponse:
     course = get_object_or_404(Course, pk=course_id)
     if request.method == "POST":
@@ -80,9 +93,22 @@ def edit_course(request: HttpRequest, course_id: int) -> HttpResponse:
         return render(request, "courses/edit_course.html", {"form": form, "course_id": course.id})
 
 
+def _course_feed(course: Course, start: datetime, end: datetime) -> Tuple[QuerySet[Shift], ShiftSeriesQuerySet]:
+    # The shifts and shift series of the course's SI leaders and tutors, for both of its feeds.
+    # A subquery rather than a join, which would list a tutor's shifts once for each course they tutor.
+    tutors = User.courses_tutored.through.objects.filter(course=course, lrcdatabaseuser=OuterRef("associated_person"))
+    staff = Q(associated_person__si_course=course) | Q(Exists(tutors))
+    shifts = Shift.objects.overlapping(start, end).filter(staff)
+    series = ShiftSeries.objects.filter(staff).select_related("associated_person")
+    return shifts, series
+
+
 @login_required
 @restrict_to_http_methods("GET")
-def course_event_feed(request: HttpRequest, course_id: int) -> JsonResponse:
+@cache_control(private=True, no_cache=True)
+@etag(course_feed_etag)
+@read_only_database
+def course_event_feed(request: HttpRequest, course_id: int) -> StreamingHttpResponse:
     try:
         start = datetime.fromisoformat(request.GET["start"])
         end = datetime.fromisoformat(request.GET["end"])
@@ -90,25 +116,26 @@ def course_event_feed(request: HttpRequest, course_id: int) -> JsonResponse:
         raise BadRequest("Both start and end dates must be specified.")
     except ValueError:
         raise BadRequest("Either start or end date is not in correct ISO8601 format.")
+    # FullCalendar sends UTC offsets, but a range without them is taken to be in local time.
+    start, end = (
+        timezone.make_aware(moment, timezone.get_current_timezone()) if timezone.is_naive(moment) else moment
+        for moment in (start, end)
+    )
 
     course = get_object_or_404(Course, id=course_id)
+    shifts, series = _course_feed(course, start, end)
 
-    # TODO: problematic, see comment on user_event_feed
-    shifts = Shift.objects.filter(
-        Q(associated_person__si_course=course) | Q(associated_person__courses_tutored=course),
-        start__gte=start,
-        start__lte=end,
-    )
+    return event_feed_response(shifts, series.occurrences(start, end))
+
+
+@restrict_to_http_methods("GET")
+@calendar_subscription("course")
+@cache_control(private=True, no_cache=True)
+@etag(course_calendar_etag)
+@read_only_database
+def course_calendar_feed(request: HttpRequest, course_id: int) -> StreamingHttpResponse:
+    course = get_object_or_404(Course, id=course_id)
+    start, end = feed_window()
+    shifts, series = _course_feed(course, start, end)
 
-    def to_json(shift: Shift) -> Dict[str, Any]:
-        return {
-            "id": str(shift.id),
-            "start": shift.start.isoformat(),
-            "end": (shift.start + shift.duration).isoformat(),
-            "title": str(shift),
-            "allDay": False,
-            "url": reverse("view_shift", args=(shift.id,)),
-        }
-
-    json_response = list(map(to_json, shifts))
-    return JsonResponse(json_response, safe=False)
+    return calendar_response(request, f"LRC shifts: {course}", shifts, series.each_occurrence(start, end))
@@ -1,32 +1,45 @@
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect, render
+from django.utils import timezone
 
-from ..forms import AddHardwareForm, NewLoanForm
+from ..autocomplete import search_hardware
+from ..forms import AddHardwareForm, HardwareSearchForm, NewLoanForm
 from ..models import Hardware, Loan
-from . import restrict_to_groups, restrict_to_http_methods
+from ..pagination import keyset_paginate
+from ..routers import read_only_database
+from . import restrict_to_groups, restrict_to_http_methods, write_transaction
 
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET")
+@read_only_database
 def show_hardware(request: HttpRequest) -> HttpResponse:
+    form = HardwareSearchForm(request.GET)
     hardware = Hardware.objects.order_by("name")
-    curLoans = Loan.objects.all()
-    return render(
-        request,
-        "hardware/hardware_table.html",
-        {"hardware": hardware, "curLoans": curLoans},
-    )
+    if form.is_valid():
+        name, start, end = (form.cleaned_data[f] for f in ("name", "start", "end"))
+        if name:
+            hardware = search_hardware(name.lower())
+        if start is not None:
+            hardware = hardware.available_between(start, end)
+    return render(request, "hardware/hardware_table.html", {"hardware": hardware.with_availability(), "form": form})
 
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET")
+@read_only_database
 def show_loans(request: HttpRequest) -> HttpResponse:
-    loanInfo = Loan.objects.order_by("return_time")
-    return render(request, "loans/show_loans.html", {"loanInfo": loanInfo})
+    now = timezone.now()
+    loans = Loan.objects.select_related("target", "hardware_user")
+    # There are at most a few per item, so these aren't paginated, unlike the ever-growing history.
+    unreturned = loans.unreturned(now).order_by("start_time", "id")
+    returned = keyset_paginate(loans.filter(return_time__lte=now), ("-return_time", "-id"), request.GET.get("after"))
+    return render(request, "loans/show_loans.html", {"unreturned": unreturned, "returned": returned, "now": now})
 
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
 def add_hardware(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
         form = AddHardwareForm(request.POST)
@@ -42,6 +55,7 @@ def add_hardware(request: HttpRequest) -> HttpResponse:
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
 def add_loans(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
         form = NewLoanForm(request.POST)
@@ -57,6 +71,7 @@ def add_loans(request: HttpRequest) -> HttpResponse:
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
 def edit_loans(request: HttpRequest, loan_id: int) -> HttpResponse:
     loan1 = Loan.objects.get(id=loan_id)
     if request.method == "POST":
@@ -72,6 +87,7 @@ def edit_loans(request: HttpRequest, loan_id: int) -> HttpResponse:
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
 def edit_hardware(request: HttpRequest, hardware_id: int) -> HttpResponse:
     hardware1 = Hardware.objects.get(id=hardware_id)
     if request.method == "POST":
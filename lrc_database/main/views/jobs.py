@@ -0,0 +1,30 @@
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, render
+
+from ..models import Job
+from ..routers import read_only_database
+from . import restrict_to_groups, restrict_to_http_methods
+
+
+@restrict_to_groups("Office staff", "Supervisors")
+@restrict_to_http_methods("GET")
+@read_only_database
+def view_job(request: HttpRequest, job_id: int) -> HttpResponse:
+    job = get_object_or_404(Job, id=job_id)
+    return render(request, "jobs/view_job.html", {"job": job})
+
+
+@restrict_to_groups("Office staff", "Supervisors")
+@restrict_to_http_methods("GET")
+@read_only_database
+def job_status(request: HttpRequest, job_id: int) -> JsonResponse:
+    job = get_object_or_404(Job.objects.only("state", "progress", "total", "result"), id=job_id)
+    return JsonResponse(
+        {
+            "state": job.state,
+            "progress": job.progress,
+            "total": job.total,
+            "result": job.result,
+            "finished": job.is_finished(),
+        }
+    )
@@ -0,0 +1,25 @@
+from hmac import compare_digest
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpRequest, HttpResponse
+
+from ..metrics import collect, render_metrics
+from ..roles import is_in_groups
+from . import restrict_to_http_methods
+
+
+def _has_metrics_token(request: HttpRequest) -> bool:
+    # Lets a Prometheus server scrape the metrics without logging in.
+    if not settings.METRICS_TOKEN:
+        return False
+    return compare_digest(request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}")
+
+
+@restrict_to_http_methods("GET")
+def metrics(request: HttpRequest) -> HttpResponse:
+    if not _has_metrics_token(request) and not (
+        request.user.is_superuser or is_in_groups(request.user, "Office staff", "Supervisors")
+    ):
+        raise PermissionDenied
+    return HttpResponse(render_metrics(collect()), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,15 +1,16 @@
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
-from django.db.models import Q
-from django.http import HttpRequest, HttpResponse, HttpResponseRedirect
+from django.db.models import Q, QuerySet
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseRedirect
 from django.shortcuts import get_list_or_404, get_object_or_404, redirect, render
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
+from .. import double_booking
 from ..forms import (
     ApproveChangeRequestForm,
     NewChangeRequestForm,
@@ -17,15 +18,18 @@ from ..forms import (
     NewShiftForm,
     NewShiftForTutorForm,
 )
-from ..models import Shift, ShiftChangeRequest
+from ..models import Shift, ShiftChangeRequest, ShiftSeries
+from ..pagination import keyset_paginate
+from ..routers import read_only_database
 from ..templatetags.groups import is_privileged
-from . import restrict_to_groups, restrict_to_http_methods
+from . import restrict_to_groups, restrict_to_http_methods, write_transaction
 
 User = get_user_model()
 
 
 @login_required
 @restrict_to_http_methods("GET")
+@read_only_database
 def view_shift(request: HttpRequest, shift_id: int) -> HttpResponse:
     shift = get_object_or_404(Shift, pk=shift_id)
     change_requests = ShiftChangeRequest.objects.filter(shift_to_update=shift)
@@ -38,6 +42,40 @@ def view_shift(request: HttpRequest, shift_id: int) -> HttpResponse:
 
 @login_required
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
+def view_occurrence(request: HttpRequest, series_id: int, day: str) -> HttpResponse:
+    """
+    Shows an occurrence of a shift series. Posting materializes it into a shift, which can then be edited, dropped or
+    requested for change like any other.
+    """
+
+    series = get_object_or_404(ShiftSeries.objects.select_related("associated_person"), pk=series_id)
+    try:
+        occurrence_date = date.fromisoformat(day)
+    except ValueError:
+        raise Http404("Invalid date.")
+    materialized = series.materialized_shifts.filter(series_date=occurrence_date).first()
+    if materialized is not None:
+        return redirect("view_shift", materialized.id)
+    if not series.occurs_on(occurrence_date):
+        raise Http404("The series has no shift on this date.")
+
+    can_change = request.user.id == series.associated_person_id or is_privileged(request.user)
+    if request.method == "POST":
+        if not can_change:
+            raise PermissionDenied
+        shift = series.materialize(occurrence_date)
+        return redirect("view_shift", shift.id)
+    return render(
+        request,
+        "shifts/view_occurrence.html",
+        {"shift": series.occurrence(occurrence_date), "series": series, "can_change": can_change},
+    )
+
+
+@login_required
+@restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
 def new_shift_change_request(request: HttpRequest, shift_id: int) -> HttpResponse:
     shift = get_object_or_404(Shift, pk=shift_id)
     if shift.associated_person.id != request.user.id:
@@ -75,48 +113,53 @@ def new_shift_change_request(request: HttpRequest, shift_id: int) -> HttpRespons
         )
 
 
+def _change_request_queue(request: HttpRequest, change_requests: QuerySet, context: Dict[str, Any]) -> HttpResponse:
+    page = keyset_paginate(
+        change_requests.select_related("new_associated_person"), ("new_start", "id"), request.GET.get("after")
+    )
+    return render(
+        request,
+        "scheduling/view_shift_change_requests.html",
+        {**context, "change_requests": page.items, "page": page},
+    )
+
+
 # View all NEW requests
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET")
+@read_only_database
 def view_shift_change_requests(request: HttpRequest, kind: str, state: str) -> HttpResponse:
     if kind == "All":
         requests = ShiftChangeRequest.objects.filter(state=state)
     else:
         requests = ShiftChangeRequest.objects.filter((Q(new_kind=kind) | Q(shift_to_update__kind=kind)), state=state, is_drop_request=False)
-    return render(
-        request,
-        "scheduling/view_shift_change_requests.html",
-        {"change_requests": requests, "kind": kind, "state": state, "drop": False},
-    )
+    return _change_request_queue(request, requests, {"kind": kind, "state": state, "drop": False})
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET")
+@read_only_database
 def view_drop_shift_requests(request: HttpRequest, kind: str, state: str) -> HttpResponse:
     requests = ShiftChangeRequest.objects.filter((Q(new_kind=kind) | Q(shift_to_update__kind=kind)), state=state, is_drop_request=True)
-    return render(
-        request,
-        "scheduling/view_shift_change_requests.html",
-        {"change_requests": requests, "kind": kind, "state": state, "drop": True},
-    )
+    return _change_request_queue(request, requests, {"kind": kind, "state": state, "drop": True})
 
 
 @login_required
 @restrict_to_http_methods("GET")
+@read_only_database
 def view_shift_change_requests_by_user(request: HttpRequest, user_id: int) -> HttpResponse:
     if not is_privileged(request.user) and request.user.id != user_id:
         raise PermissionDenied
+    # A subquery rather than a join, so that both sides of the OR can use an index.
+    users_shifts = Shift.objects.filter(associated_person__id=user_id)
     requests = ShiftChangeRequest.objects.filter(
-        (Q(new_associated_person__id=user_id) | Q(shift_to_update__associated_person__id=user_id)),
+        (Q(new_associated_person__id=user_id) | Q(shift_to_update__in=users_shifts)),
     )
     target_user = get_object_or_404(User, id=user_id)
-    return render(
-        request,
-        "scheduling/view_shift_change_requests.html",
-        {"change_requests": requests, "kind": f"{target_user.first_name}'s"},
-    )
+    return _change_request_queue(request, requests, {"kind": f"{target_user.first_name}'s"})
 
 @login_required
 @restrict_to_http_methods("GET")
+@read_only_database
 def view_shift_change_request(request: HttpRequest, request_id: int) -> HttpResponse:
     shift_request = get_object_or_404(ShiftChangeRequest, pk=request_id)
     is_for_user = False
@@ -131,6 +174,7 @@ def view_shift_change_request(request: HttpRequest, request_id: int) -> HttpResp
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET")
+@write_transaction("GET")
 def deny_request(request: HttpRequest, request_id: int) -> HttpResponse:
     shift_request = get_object_or_404(ShiftChangeRequest, id=request_id)
     shift_request.state = "Not Approved"
@@ -140,6 +184,7 @@ def deny_request(request: HttpRequest, request_id: int) -> HttpResponse:
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("GET", "POST")
 def approve_pending_request(request: HttpRequest, request_id: int) -> HttpResponse:
     request_cur = get_object_or_404(ShiftChangeRequest, id=request_id)
     shift = request_cur.shift_to_update or Shift()
@@ -164,6 +209,7 @@ def approve_pending_request(request: HttpRequest, request_id: int) -> HttpRespon
             initial=initial,
         )
 
+        # Validating the form checks the shift for double bookings (see Shift.clean()).
         if not form.is_valid():
             messages.add_message(request, messages.ERROR, f"Form errors: {form.errors}")
             return redirect("view_single_request", request_id)
@@ -180,15 +226,16 @@ def approve_pending_request(request: HttpRequest, request_id: int) -> HttpRespon
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
 def new_shift(request: HttpRequest) -> HttpResponse:
     if request.method == "GET":
         form = NewShiftForm()
         return render(request, "shifts/new_shift.html", {"form": form})
     else:
         form = NewShiftForm(request.POST)
+        # Validating the form checks the shift for double bookings (see Shift.clean()).
         if form.is_valid():
-            shift = Shift(**form.cleaned_data)
-            shift.save()
+            shift = form.save()
             return redirect("view_shift", shift.id)
         else:
             messages.add_message(request, messages.ERROR, f"Form errors: {form.errors}")
@@ -197,6 +244,7 @@ def new_shift(request: HttpRequest) -> HttpResponse:
 
 @restrict_to_groups("Tutors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
 def new_shift_tutors_only(request: HttpRequest) -> HttpResponse:
     if request.method == "GET":
         form = NewShiftForTutorForm()
@@ -209,6 +257,11 @@ def new_shift_tutors_only(request: HttpRequest) -> HttpResponse:
         form = NewShiftForTutorForm(request.POST)
         if form.is_valid():
             shift = Shift(associated_person=request.user, location="LRC", kind="Tutoring", **form.cleaned_data)
+            try:
+                double_booking.check([shift])
+            except double_booking.DoubleBookingError as e:
+                messages.add_message(request, messages.ERROR, str(e))
+                return redirect("new_shift_tutors_only")
             shift.save()
             return redirect("view_shift", shift.id)
         else:
@@ -218,6 +271,7 @@ def new_shift_tutors_only(request: HttpRequest) -> HttpResponse:
 
 @restrict_to_groups("SIs")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
 def new_shift_request(request: HttpRequest) -> HttpResponse:
     if request.method == "GET":
         form = NewChangeRequestForm()
@@ -247,6 +301,7 @@ def new_shift_request(request: HttpRequest) -> HttpResponse:
 
 @restrict_to_groups("SIs", "Tutors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
 def new_drop_request(request: HttpRequest, shift_id: int) -> HttpResponse:
     shift = get_object_or_404(Shift, id=shift_id)
     if shift.associated_person != request.user:
@@ -1,53 +1,91 @@
-import json
+import heapq
 from datetime import datetime
-from typing import Any, Dict, Optional
+from itertools import islice
+from typing import List, Optional, Tuple
 
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.models import Group
 from django.core.exceptions import BadRequest, PermissionDenied
-from django.http import HttpRequest, HttpResponse, JsonResponse
-from django.shortcuts import get_list_or_404, get_object_or_404, redirect, render
+from django.db.models import Exists, OuterRef, Q, QuerySet
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-
-from ..forms import CreateUserForm, CreateUsersInBulkForm, EditProfileForm
-from ..models import LRCDatabaseUser, Shift
-from . import personal, restrict_to_groups, restrict_to_http_methods
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag
+
+from .. import jobs
+from ..calendar_feeds import calendar_response, feed_token, feed_window
+from ..event_feeds import event_feed_response, user_calendar_etag, user_feed_etag
+from ..forms import CreateUserForm, CreateUsersInBulkForm, EditProfileForm, UserDirectoryFilterForm
+from ..models import LOCAL_TIME_ZONE, MAX_SHIFT_DURATION, LRCDatabaseUser, Shift, ShiftSeries, ShiftSeriesQuerySet
+from ..pagination import keyset_paginate
+from ..routers import read_only_database
+from ..user_import import prepare_import
+from . import calendar_subscription, personal, restrict_to_groups, restrict_to_http_methods, write_transaction
 
 User = get_user_model()
 
+# How many of a user's next shifts their profile lists.
+UPCOMING_SHIFTS = 5
+
 
 @login_required
 @restrict_to_http_methods("GET")
+@read_only_database
 def user_profile(request: HttpRequest, user_id: int) -> HttpResponse:
     target_user = get_object_or_404(User, id=user_id)
-    target_users_shifts = json.dumps(
-        list(
-            map(
-                lambda shift: {
-                    "id": str(shift.id),
-                    "start": shift.start.isoformat(),
-                    "end": (shift.start + shift.duration).isoformat(),
-                    "title": str(shift),
-                    "allDay": False,
-                    "url": reverse("view_shift", args=(shift.id,)),
-                },
-                Shift.objects.filter(associated_person=target_user),
-            )
+    # The calendar loads the shifts it shows from user_event_feed, so only the next few are listed here, to the same
+    # people that can see the feed.
+    upcoming_shifts: Optional[List[Shift]] = None
+    more_upcoming_shifts = False
+    calendar_url = None
+    if request.user.id == target_user.id or request.user.is_privileged():
+        now = timezone.now()
+        shifts = (
+            Shift.objects.filter(associated_person=target_user, start__gt=now - MAX_SHIFT_DURATION, end__gt=now)
+            .only("start", "end", "location", "kind")
+            .order_by("start")[: UPCOMING_SHIFTS + 1]
+        )
+        series = ShiftSeries.objects.filter(
+            associated_person=target_user, last_date__gte=timezone.localdate(now - MAX_SHIFT_DURATION, LOCAL_TIME_ZONE)
+        )
+        # Occurrences are expanded lazily, one series at a time, only as far as the next few.
+        occurrences = heapq.merge(*(one.occurrences(now) for one in series), key=lambda shift: shift.start)
+        upcoming = heapq.merge(shifts, occurrences, key=lambda shift: shift.start)
+        upcoming_shifts = list(islice(upcoming, UPCOMING_SHIFTS + 1))
+        more_upcoming_shifts = len(upcoming_shifts) > UPCOMING_SHIFTS
+        del upcoming_shifts[UPCOMING_SHIFTS:]
+        calendar_url = request.build_absolute_uri(
+            reverse("user_calendar_feed", args=(target_user.id, feed_token(request.user, "user", target_user.id)))
         )
-    )
 
     return render(
         request,
         "users/user_profile.html",
-        {"target_user": target_user, "target_users_shifts": target_users_shifts},
+        {
+            "target_user": target_user,
+            "upcoming_shifts": upcoming_shifts,
+            "more_upcoming_shifts": more_upcoming_shifts,
+            "calendar_url": calendar_url,
+        },
     )
 
 
+def _user_feed(user: LRCDatabaseUser, start: datetime, end: datetime) -> Tuple[QuerySet[Shift], ShiftSeriesQuerySet]:
+    # The user's shifts and shift series for both of their feeds.
+    shifts = Shift.objects.overlapping(start, end).filter(associated_person=user)
+    series = ShiftSeries.objects.filter(associated_person=user).select_related("associated_person")
+    return shifts, series
+
+
 @login_required
 @personal
 @restrict_to_http_methods("GET")
+@cache_control(private=True, no_cache=True)
+@etag(user_feed_etag)
+@read_only_database
 def user_event_feed(request: HttpRequest, user_id: int) -> HttpResponse:
     try:
         start = datetime.fromisoformat(request.GET["start"])
@@ -56,31 +94,34 @@ def user_event_feed(request: HttpRequest, user_id: int) -> HttpResponse:
         raise BadRequest("Both start and end dates must be specified.")
     except ValueError:
         raise BadRequest("Either start or end date is not in correct ISO8601 format.")
+    # FullCalendar sends UTC offsets, but a range without them is taken to be in local time.
+    start, end = (
+        timezone.make_aware(moment, timezone.get_current_timezone()) if timezone.is_naive(moment) else moment
+        for moment in (start, end)
+    )
+
+    user = get_object_or_404(User, id=user_id)
+    shifts, series = _user_feed(user, start, end)
+
+    return event_feed_response(shifts, series.occurrences(start, end))
 
+
+@restrict_to_http_methods("GET")
+@calendar_subscription("user")
+@cache_control(private=True, no_cache=True)
+@etag(user_calendar_etag)
+@read_only_database
+def user_calendar_feed(request: HttpRequest, user_id: int) -> HttpResponse:
     user = get_object_or_404(User, id=user_id)
-    shifts = Shift.objects.filter(associated_person=user, start__gte=start, start__lte=end)
-    # TODO: Due to the way we store shifts in the database (start + duration only) it's difficult to find all shifts
-    # in a range. What we have here is a dirty hack that makes two assumptions:
-    #  - all shifts are short (no more than two hours-ish)
-    #  - we don't care that much if a few extra shifts are incorrectly returned (FullCalendar should handle this)
-    # It's probably worth figuring out a better way to do this at some point.
-
-    def to_json(shift: Shift) -> Dict[str, Any]:
-        return {
-            "id": str(shift.id),
-            "start": shift.start.isoformat(),
-            "end": (shift.start + shift.duration).isoformat(),
-            "title": str(shift),
-            "allDay": False,
-            "url": reverse("view_shift", args=(shift.id,)),
-        }
-
-    json_response = list(map(to_json, shifts))
-    return JsonResponse(json_response, safe=False)
+    start, end = feed_window()
+    shifts, series = _user_feed(user, start, end)
+
+    return calendar_response(request, f"LRC shifts: {user}", shifts, series.each_occurrence(start, end))
 
 
 @login_required
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
 def edit_profile(request: HttpRequest, user_id: int) -> HttpResponse:
     if user_id != request.user.id:
         # TODO: let privileged users edit anyone's profile
@@ -104,6 +145,7 @@ def edit_profile(request: HttpRequest, user_id: int) -> HttpResponse:
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET", "POST")
+@write_transaction("POST")
 def create_user(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
         form = CreateUserForm(request.POST)
@@ -129,6 +171,7 @@ def create_user(request: HttpRequest) -> HttpResponse:
         return render(request, "users/create_user.html", {"form": form})
 
 
+# Not a write_transaction: parsing only reads, and enqueueing is one insert.
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET", "POST")
 def create_users_in_bulk(request: HttpRequest) -> HttpResponse:
@@ -137,17 +180,9 @@ def create_users_in_bulk(request: HttpRequest) -> HttpResponse:
         if not form.is_valid():
             messages.add_message(request, messages.ERROR, f"Form errors: {form.errors}")
             return redirect("create_users_in_bulk")
-        user_data = form.cleaned_data["user_data"]
-        user_data = user_data.split("\n")
-        user_data = [s.strip() for s in user_data]
-        user_data = [s.split(",") for s in user_data]
-        for username, email, first_name, last_name, primary_group, password in user_data:
-            user = LRCDatabaseUser.objects.create_user(
-                username=username, email=email, first_name=first_name, last_name=last_name, password=password
-            )
-            groups = Group.objects.filter(name=primary_group)
-            user.groups.add(*groups)
-        return redirect("index")
+        # The passwords are sealed here, so that they're never stored in plaintext, even in the job's payload.
+        job = jobs.enqueue("create_users", prepare_import(form.cleaned_data["user_data"]), request.user)
+        return redirect("view_job", job.id)
     else:
         form = CreateUsersInBulkForm()
         return render(request, "users/create_users_in_bulk.html", {"form": form})
@@ -155,10 +190,41 @@ def create_users_in_bulk(request: HttpRequest) -> HttpResponse:
 
 @restrict_to_groups("Office staff", "Supervisors")
 @restrict_to_http_methods("GET")
+@read_only_database
 def list_users(request: HttpRequest, group: Optional[str] = None) -> HttpResponse:
+    filters = request.GET.copy()
+    cursor = filters.pop("after", [None])[-1]
     if group is not None:
-        users = get_list_or_404(User.objects.order_by("last_name"), groups__name=group)
-    else:
-        group = "All users"
-        users = get_list_or_404(User.objects.order_by("last_name"))
-    return render(request, "users/list_users.html", {"users": users, "group": group})
+        filters.setdefault("group", group)
+    form = UserDirectoryFilterForm(filters)
+    if not form.is_valid():
+        raise BadRequest("Invalid filters.")
+
+    group, course = form.cleaned_data["group"], form.cleaned_data["course"]
+    # Filtering through subqueries rather than joins keeps each user to one row. Groups are big, so rather than
+    # sorting all of a group's members, the page is found by walking users in (last_name, id) order and checking each
+    # one's membership. Courses are small, so their users are looked up and sorted.
+    users = User.objects.all()
+    if group is not None:
+        users = users.filter(Exists(User.groups.through.objects.filter(lrcdatabaseuser=OuterRef("id"), group=group)))
+    if course is not None:
+        tutors = User.courses_tutored.through.objects.filter(course=course)
+        users = users.filter(Q(id__in=tutors.values("lrcdatabaseuser_id")) | Q(si_course=course))
+    page = keyset_paginate(
+        users.select_related("si_course").prefetch_related("groups", "courses_tutored"),
+        ("last_name", "id"),
+        cursor,
+    )
+
+    return render(
+        request,
+        "users/list_users.html",
+        {
+            "users": page.items,
+            "page": page,
+            "form": form,
+            "group": group or "All users",
+            "course": course,
+            "filter_query": filters.urlencode(),
+        },
+    )
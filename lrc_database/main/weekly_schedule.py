@@ -0,0 +1,152 @@
+"""
+Builds the week-long, per-course schedule shown by view_schedule.
+
+A schedule is built from four queries no matter how many shifts or courses there are (courses, the week's shifts with
+their people, the shift series that have occurrences that week with their people, and the courses those people tutor),
+and is cached per (kind, first day). Cached schedules are invalidated by bumping the "schedule" version whenever a
+shift, a course or a staff member's courses change; see signals.py. The version is bumped once the change commits, so
+that a schedule built from the old rows in the meantime can't be cached under the new version.
+"""
+
+import datetime
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import DefaultDict, Dict, List, Optional, Set, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import LOCAL_TIME_ZONE, Course, LRCDatabaseUser, Shift, ShiftSeries
+from .versions import bump_versions, get_version
+
+SCHEDULE_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class ScheduleEntry:
+    """
+    The parts of a shift that the schedule shows.
+    """
+
+    # None for occurrences of shift series.
+    shift_id: Optional[int]
+    start: datetime.datetime
+    end: datetime.datetime
+    location: str
+    kind: str
+    person_id: int
+    person_name: str
+
+
+# Maps each course's short name to its ID and its entries for each of the seven days.
+WeeklySchedule = Dict[str, Tuple[int, List[List[ScheduleEntry]]]]
+
+
+def build_weekly_schedule(kind: str, first_day: datetime.date) -> WeeklySchedule:
+    """
+    Builds the schedule for the seven days starting at first_day. kind is "SI", "Tutoring" or "All". SI shifts are
+    listed under their SI leader's course, and tutoring shifts under every course their tutor tutors.
+    """
+
+    schedule: WeeklySchedule = {}
+    short_names: Dict[int, str] = {}
+    for course_id, department, number in Course.objects.values_list("id", "department", "number"):
+        short_names[course_id] = f"{department} {number}"
+        schedule[short_names[course_id]] = (course_id, [[] for _ in range(7)])
+
+    last_day = first_day + datetime.timedelta(days=6)
+    shifts = Shift.objects.filter(local_date__gte=first_day, local_date__lte=last_day)
+    series = ShiftSeries.objects.select_related("associated_person")
+    if kind != "All":
+        shifts = shifts.filter(kind=kind)
+        series = series.filter(kind=kind)
+    rows = list(
+        shifts.values_list(
+            "id",
+            "start",
+            "end",
+            "local_date",
+            "location",
+            "kind",
+            "associated_person_id",
+            "associated_person__username",
+            "associated_person__first_name",
+            "associated_person__last_name",
+            "associated_person__si_course_id",
+        )
+    )
+    week_start = timezone.make_aware(datetime.datetime.combine(first_day, datetime.time()), LOCAL_TIME_ZONE)
+    week_end = timezone.make_aware(datetime.datetime.combine(last_day, datetime.time.max), LOCAL_TIME_ZONE)
+    for occurrence in series.occurrences(week_start, week_end):
+        if first_day <= occurrence.local_date <= last_day:
+            person = occurrence.associated_person
+            rows.append(
+                (
+                    None,
+                    occurrence.start,
+                    occurrence.end,
+                    occurrence.local_date,
+                    occurrence.location,
+                    occurrence.kind,
+                    person.id,
+                    person.username,
+                    person.first_name,
+                    person.last_name,
+                    person.si_course_id,
+                )
+            )
+    rows.sort(key=lambda row: row[1])
+
+    tutored: DefaultDict[int, Set[int]] = defaultdict(set)
+    tutor_ids = {row[6] for row in rows if row[5] == "Tutoring"}
+    if tutor_ids:
+        through = LRCDatabaseUser.courses_tutored.through
+        for person_id, course_id in through.objects.filter(lrcdatabaseuser_id__in=tutor_ids).values_list(
+            "lrcdatabaseuser_id", "course_id"
+        ):
+            tutored[person_id].add(course_id)
+
+    for row in rows:
+        (
+            shift_id,
+            start,
+            end,
+            local_date,
+            location,
+            shift_kind,
+            person_id,
+            username,
+            first_name,
+            last_name,
+            si_course_id,
+        ) = row
+        entry = ScheduleEntry(
+            shift_id=shift_id,
+            start=start,
+            end=end,
+            location=location,
+            kind=shift_kind,
+            person_id=person_id,
+            person_name=LRCDatabaseUser.display_name(username, first_name, last_name),
+        )
+        day = (local_date - first_day).days
+        course_ids = {si_course_id} if shift_kind == "SI" else tutored[person_id]
+        for course_id in course_ids:
+            if course_id in short_names:
+                schedule[short_names[course_id]][1][day].append(entry)
+
+    return schedule
+
+
+def get_weekly_schedule(kind: str, first_day: datetime.date) -> WeeklySchedule:
+    key = f"schedule:{get_version('schedule')}:{kind}:{first_day.isoformat()}"
+    schedule = cache.get(key)
+    if schedule is None:
+        schedule = build_weekly_schedule(kind, first_day)
+        cache.set(key, schedule, SCHEDULE_CACHE_TIMEOUT)
+    return schedule
+
+
+def invalidate_weekly_schedules() -> None:
+    transaction.on_commit(lambda: bump_versions(("schedule",)))